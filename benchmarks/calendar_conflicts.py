@@ -0,0 +1,78 @@
+"""Finding the bookings that clash with a new event at one location.
+
+Compares the interval tree behind the calendar's clash check with scanning
+every booking of the location, for a room booked back to back for years.
+
+Usage:
+    python -m benchmarks.calendar_conflicts [--events 20000] [--runs 20000]
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from src.calendar.interval_tree import IntervalTreap
+
+from .complaint_search import percentile
+
+START = datetime(2020, 1, 6, 8)
+
+
+def bookings(count: int, rng: random.Random):
+    """Mostly one- or two-hour slots through the day, a few days each week"""
+    found, moment = [], START
+    for event_id in range(count):
+        duration = timedelta(hours=rng.choice((1, 1, 2)))
+        found.append((moment, moment + duration, event_id))
+        moment += duration + timedelta(minutes=rng.choice((0, 0, 30, 60)))
+        if moment.hour >= 18:
+            moment = (moment + timedelta(days=rng.choice((1, 1, 2)))).replace(hour=8, minute=0)
+    return found
+
+
+def scan(items, start, end):
+    """Baseline: every booking at the location is compared"""
+    return [item for item in items if item[0] < end and item[1] > start]
+
+
+def measure(fn, probes):
+    samples = []
+    for start, end in probes:
+        started = time.perf_counter()
+        fn(start, end)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(50)
+    items = bookings(args.events, rng)
+    tree = IntervalTreap(seed=50)
+    started = time.perf_counter()
+    for start, end, event_id in items:
+        tree.insert(start, end, event_id)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    last = items[-1][1]
+    probes = []
+    for _ in range(args.runs):
+        start = START + (last - START) * rng.random()
+        probes.append((start, start + timedelta(hours=rng.choice((1, 2, 3)))))
+    for start, end in probes[:200]:
+        assert sorted(tree.overlapping(start, end)) == sorted(scan(items, start, end))
+
+    indexed = measure(tree.overlapping, probes)
+    scanned = measure(lambda start, end: scan(items, start, end), probes[:max(args.runs // 20, 1)])
+    print(f"{args.events} bookings, tree built in {build_ms:.1f} ms")
+    print(f"tree  mean {statistics.mean(indexed):8.1f} us  p95 {percentile(indexed, 0.95):8.1f} us")
+    print(f"scan  mean {statistics.mean(scanned):8.1f} us  p95 {percentile(scanned, 0.95):8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
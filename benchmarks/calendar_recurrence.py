@@ -0,0 +1,65 @@
+"""Cost of expanding recurring events for one calendar window.
+
+Compares windowed expansion (jumping straight to the window) with walking the
+series from its first occurrence, for a semester of lectures and for an
+open-ended weekly meeting that started years ago.
+
+Usage:
+    python -m benchmarks.calendar_recurrence [--runs 20000]
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from src.calendar.recurrence import expand, occurrences, parse_rule
+
+from .complaint_search import percentile
+
+SERIES = {
+    "semester MO/WE/FR": ("FREQ=WEEKLY;BYDAY=MO,WE,FR;UNTIL=20261218", datetime(2026, 9, 7, 9)),
+    "weekly since 2016": ("FREQ=WEEKLY;BYDAY=TH", datetime(2016, 1, 7, 18)),
+    "monthly since 2016": ("FREQ=MONTHLY", datetime(2016, 1, 15, 12)),
+}
+WINDOW = (datetime(2026, 11, 1), datetime(2026, 12, 1))
+DURATION = timedelta(hours=1)
+
+
+def walk_from_start(rule, dtstart, window_start, window_end):
+    """Baseline: generate every occurrence from dtstart and keep the ones in the window"""
+    found = []
+    for start in occurrences(rule, dtstart):
+        if start >= window_end:
+            break
+        if start + DURATION > window_start:
+            found.append(start)
+    return found
+
+
+def measure(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20000)
+    args = parser.parse_args()
+
+    for label, (text, dtstart) in SERIES.items():
+        rule = parse_rule(text)
+        windowed = list(expand(rule, dtstart, DURATION, *WINDOW))
+        assert windowed == walk_from_start(rule, dtstart, *WINDOW)
+        jump = measure(lambda: list(expand(rule, dtstart, DURATION, *WINDOW)), args.runs)
+        walk = measure(lambda: walk_from_start(rule, dtstart, *WINDOW), max(args.runs // 20, 1))
+        print(f"{label:<20} {len(windowed):>2} in window  "
+              f"windowed mean {statistics.mean(jump):7.1f} us  p95 {percentile(jump, 0.95):7.1f} us  |  "
+              f"walk mean {statistics.mean(walk):8.1f} us  p95 {percentile(walk, 0.95):8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
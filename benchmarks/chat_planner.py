@@ -0,0 +1,62 @@
+"""Classify-then-generate vs the single-pass planner, against the local LLM stub.
+
+Needs the app environment (DATABASE_URL etc.); GROQ_BASE_URL is pointed at the stub.
+
+Usage:
+    python -m benchmarks.chat_planner [--questions 10] [--latency-ms 800]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from .llm_stub import serve_in_thread, settings
+
+
+async def legacy_path(routes, query: str):
+    """What prepare_answer did before the planner: up to three sequential calls"""
+    schema_info = routes.schema_description.get()
+    if await routes.can_answer_with_sql(query, schema_info):
+        prepared = await routes.prepare_sql_answer(query, await routes.generate_sql(query, schema_info))
+    else:
+        prepared = routes.prepare_non_sql_answer(query)
+    return await routes.complete_answer(prepared)
+
+
+async def planner_path(routes, query: str):
+    return await routes.complete_answer(await routes.prepare_answer(query))
+
+
+async def measure(label, fn, routes, questions):
+    settings.calls.clear()
+    latencies = []
+    for i in range(questions):
+        started = time.perf_counter()
+        await fn(routes, f"Which halls have free beds? ({i})")
+        latencies.append(time.perf_counter() - started)
+    calls = sum(settings.calls.values())
+    print(f"{label:<9} mean {statistics.mean(latencies) * 1000:8.1f} ms  "
+          f"max {max(latencies) * 1000:8.1f} ms  LLM calls/question {calls / questions:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--port", type=int, default=8901)
+    args = parser.parse_args()
+
+    serve_in_thread(args.port, latency=args.latency_ms / 1000)
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+    from src.chat import routes  # after GROQ_BASE_URL so the client targets the stub
+
+    async def run():
+        await measure("classify", legacy_path, routes, args.questions)
+        await measure("planner", planner_path, routes, args.questions)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
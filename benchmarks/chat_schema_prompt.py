@@ -0,0 +1,84 @@
+"""Prompt size and latency of the chat schema description, before and after caching.
+
+Needs the app environment (DATABASE_URL etc., e.g. from .env) and a migrated database.
+
+Usage:
+    python -m benchmarks.chat_schema_prompt [--runs 20]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import inspect
+
+from src.common.db import engine
+from src.chat.schema import schema_description
+from src.chat.tokens import estimate_tokens
+
+
+def legacy_schema() -> str:
+    """The original per-message description: per-table reflection, indented JSON"""
+    inspector = inspect(engine)
+    schema_info = {}
+    for table_name in inspector.get_table_names():
+        schema_info[table_name] = []
+        for column in inspector.get_columns(table_name):
+            schema_info[table_name].append({
+                "column_name": column["name"],
+                "data_type": str(column["type"]),
+                "is_nullable": "YES" if column.get("nullable", True) else "NO",
+                "default": str(column.get("default", ""))
+            })
+        primary_keys = inspector.get_pk_constraint(table_name)
+        if primary_keys and primary_keys.get("constrained_columns"):
+            schema_info[table_name].append({
+                "constraint_type": "PRIMARY KEY",
+                "columns": primary_keys["constrained_columns"]
+            })
+        for fk in inspector.get_foreign_keys(table_name):
+            schema_info[table_name].append({
+                "constraint_type": "FOREIGN KEY",
+                "columns": fk["constrained_columns"],
+                "referred_table": fk["referred_table"],
+                "referred_columns": fk["referred_columns"]
+            })
+    return json.dumps(schema_info, indent=2)
+
+
+def timed(fn, runs):
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return result, latencies
+
+
+def report(label, text, latencies):
+    print(f"{label:<10} tokens ~{estimate_tokens(text):>6}  chars {len(text):>6}  "
+          f"latency ms mean {statistics.mean(latencies):8.3f}  max {max(latencies):8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    legacy, legacy_latencies = timed(legacy_schema, args.runs)
+
+    def cold():
+        schema_description.invalidate()
+        return schema_description.get()
+
+    compact, cold_latencies = timed(cold, args.runs)
+    _, warm_latencies = timed(schema_description.get, args.runs)
+
+    report("before", legacy, legacy_latencies)
+    report("cold", compact, cold_latencies)
+    report("cached", compact, warm_latencies)
+    print(f"hashed_password in prompt: before {'hashed_password' in legacy}, after {'hashed_password' in compact}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""End-to-end /chat/query throughput and per-stage LLM latency under concurrency.
+
+Runs the real app in-process against the local LLM stub, so only the stub's
+simulated model latency is fake; schema, SQL guard, caches and templates are real.
+Needs the app environment (DATABASE_URL etc.) and a migrated database.
+
+Usage:
+    python -m benchmarks.chat_throughput [--requests 200] [--concurrency 16] [--latency-ms 800] [--template-share 0.3]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import Counter
+
+from .complaint_search import percentile
+from .llm_stub import serve_in_thread, settings
+
+TEMPLATE_QUESTIONS = ["which halls have space", "how full is each hall", "what events are coming up", "where do i stay"]
+TOPICS = ["plumbing", "electrical", "furniture", "level 100", "level 200", "the library", "fees", "visitors"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--template-share", type=float, default=0.3)
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    serve_in_thread(args.port, latency=args.latency_ms / 1000)
+    os.environ["CHAT_LLM_BACKEND"] = "openai"
+    os.environ["CHAT_LLM_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    # One user sends every request: lift the per-user chat quotas
+    for name in ("CHAT_STUDENT_REQUESTS_PER_MINUTE", "CHAT_ADMIN_REQUESTS_PER_MINUTE",
+                 "CHAT_STUDENT_DAILY_TOKENS", "CHAT_ADMIN_DAILY_TOKENS"):
+        os.environ[name] = "1000000000"
+
+    # Imported after the environment points the chat backend at the stub
+    import httpx
+    from main import app
+    from src.auth.models import User
+    from src.common.db import SessionLocal
+    from src.common.security import get_current_user
+    from src.chat.cache import cache_stats
+    from src.chat.llm import llm
+    from src.chat.quota import usage_meter
+
+    with SessionLocal() as db:
+        user = db.query(User).first()
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    rng = random.Random(args.seed)
+    questions = [
+        rng.choice(TEMPLATE_QUESTIONS) if rng.random() < args.template_share
+        else f"How many complaints about {rng.choice(TOPICS)} were raised in week {i}?"
+        for i in range(args.requests)
+    ]
+
+    async def run():
+        statuses = Counter()
+        latencies = []
+        semaphore = asyncio.Semaphore(args.concurrency)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+            async def one(question):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post("/chat/query", json={"query": question})
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    statuses[response.status_code] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(question) for question in questions))
+            elapsed = time.perf_counter() - started
+        return statuses, latencies, elapsed
+
+    statuses, latencies, elapsed = asyncio.run(run())
+
+    print(f"requests:    {len(questions)} at concurrency {args.concurrency}, stub latency {args.latency_ms:.0f} ms")
+    print(f"throughput:  {len(questions) / elapsed:.1f} req/s over {elapsed:.1f} s")
+    print(f"latency ms:  mean {statistics.mean(latencies):.1f}  p50 {percentile(latencies, 0.5):.1f}  "
+          f"p95 {percentile(latencies, 0.95):.1f}  max {max(latencies):.1f}")
+    print(f"statuses:    {dict(statuses)}")
+    print(f"LLM calls:   {dict(settings.calls)}")
+    llm_stats = llm.stats()
+    for stage, stats in llm_stats["stages"].items():
+        print(f"  {stage:<9} calls {stats['calls']:>5}  mean {stats['mean_ms']:8.1f} ms  "
+              f"p95 {stats['p95_ms']:8.1f} ms  timeouts {stats['timeouts']}")
+    print(f"bulkhead:    {llm_stats['bulkhead']}")
+    print(f"breaker:     {llm_stats['breaker']}")
+    print(f"caches:      {cache_stats()}")
+    print(f"tokens:      {sum(s['prompt_tokens'] + s['completion_tokens'] for s in llm_stats['stages'].values())} "
+          f"charged to {user.email} today: {usage_meter.tokens_used(user.id)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Accuracy and latency of the complaint categoriser on synthetic complaints.
+
+Usage:
+    python -m benchmarks.complaint_classifier [--train 5000] [--test 1000] [--noise 0.1]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from src.complaints.classifier_model import TfidfLinearClassifier
+from .complaint_search import FILLER, PROBLEMS, percentile
+
+SUBJECTS = {
+    "plumbing": ["water", "toilet", "sink", "shower", "pipe", "tap", "drain"],
+    "electrical": ["socket", "light", "fan", "switch", "bulb", "wiring", "power"],
+    "furniture": ["bed", "wardrobe", "table", "chair", "mattress", "shelf", "desk"],
+    "general": ["noise", "neighbour", "cleaning", "security", "wifi", "visitor", "laundry"],
+}
+CATEGORIES = list(SUBJECTS)
+
+
+def synthetic_complaint(rng: random.Random, noise: float):
+    category = rng.choices(CATEGORIES, weights=[2, 2, 1, 5])[0]
+    subject, problem = rng.choice(SUBJECTS[category]), rng.choice(PROBLEMS)
+    room = f"{rng.randint(1, 4)}{rng.randint(0, 3)}{rng.randint(0, 9)}"
+    text = (f"{subject} {problem} The {subject} in room {room} is {problem} "
+            + " ".join(rng.choices(FILLER, k=rng.randint(3, 12))))
+    if rng.random() < noise:
+        category = rng.choice(CATEGORIES)  # mislabelled by the resolver
+    return text, category
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--train", type=int, default=5000)
+    parser.add_argument("--test", type=int, default=1000)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    train = [synthetic_complaint(rng, args.noise) for _ in range(args.train)]
+    test = [synthetic_complaint(rng, 0.0) for _ in range(args.test)]
+
+    started = time.perf_counter()
+    model = TfidfLinearClassifier().fit([text for text, _ in train], [label for _, label in train])
+    train_seconds = time.perf_counter() - started
+
+    correct = 0
+    latencies = []
+    for text, label in test:
+        started = time.perf_counter()
+        predicted, _ = model.predict(text)
+        latencies.append((time.perf_counter() - started) * 1000)
+        correct += predicted == label
+
+    print(f"training:    {len(train)} complaints, {len(model.idf)} features, {train_seconds:.2f} s")
+    print(f"accuracy:    {correct / len(test):.3f} on {len(test)} held-out complaints")
+    print(f"latency ms:  mean {statistics.mean(latencies):.3f}  p50 {percentile(latencies, 0.5):.3f}  "
+          f"p90 {percentile(latencies, 0.9):.3f}  p99 {percentile(latencies, 0.99):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark the in-memory complaint search index on synthetic complaints.
+
+Usage:
+    python -m benchmarks.complaint_search [--docs 50000] [--queries 2000]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from src.complaints.search_index import InvertedIndex
+
+SUBJECTS = ["water", "socket", "light", "window", "door", "bed", "fan", "toilet", "sink", "wardrobe",
+            "shower", "switch", "ceiling", "lock", "table", "chair", "pipe", "tap", "bulb", "mattress"]
+PROBLEMS = ["broken", "leaking", "not working", "sparking", "cracked", "blocked", "loose", "missing",
+            "flickering", "noisy", "dirty", "stuck"]
+FILLER = ["please", "fix", "urgent", "since", "yesterday", "again", "corridor", "floor", "block",
+          "hall", "room", "students", "night", "morning", "smell", "danger"]
+
+
+def synthetic_complaint(rng: random.Random):
+    subject, problem = rng.choice(SUBJECTS), rng.choice(PROBLEMS)
+    room = f"{rng.randint(1, 4)}{rng.randint(0, 3)}{rng.randint(0, 9)}"
+    title = f"{subject} {problem}"
+    content = f"The {subject} in room {room} is {problem} " + " ".join(rng.choices(FILLER, k=rng.randint(3, 12)))
+    return title, content
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = [(doc_id, *synthetic_complaint(rng)) for doc_id in range(args.docs)]
+
+    index = InvertedIndex()
+    started = time.perf_counter()
+    index.build(documents)
+    build_seconds = time.perf_counter() - started
+
+    queries = []
+    for _ in range(args.queries):
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(rng.choice(SUBJECTS))
+        elif kind < 0.7:
+            queries.append(rng.choice(SUBJECTS)[:3])  # prefix
+        elif kind < 0.9:
+            queries.append(f"{rng.choice(SUBJECTS)} {rng.choice(PROBLEMS).split()[0]}")
+        else:
+            queries.append(f"{rng.randint(1, 4)}{rng.randint(0, 3)}")  # room number prefix
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, limit=20)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(f"documents:   {len(index)}")
+    print(f"build:       {build_seconds:.2f} s")
+    print(f"queries:     {len(queries)}")
+    print(f"latency ms:  mean {statistics.mean(latencies):.3f}  p50 {percentile(latencies, 0.5):.3f}  "
+          f"p90 {percentile(latencies, 0.9):.3f}  p99 {percentile(latencies, 0.99):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Local OpenAI-compatible chat completions server for offline chat benchmarks.
+
+Replies are chosen by the first rule whose marker appears in the last user
+message, after a configurable delay (per rule, or the global default). Point
+the app at it with CHAT_LLM_BACKEND=openai CHAT_LLM_BASE_URL=http://127.0.0.1:8901/v1,
+or with GROQ_BASE_URL=http://127.0.0.1:8901 for the Groq SDK. Rules and delays
+can be changed at runtime with POST /stub/config; GET /stub/stats counts calls.
+
+Usage:
+    python -m benchmarks.llm_stub [--port 8901] [--latency-ms 800] [--per-token-ms 15]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# (marker in prompt, reply[, latency ms]); matched in order, last one is the fallback
+DEFAULT_RULES: List[tuple] = [
+    ("query planner", json.dumps({"action": "sql", "sql": "SELECT 1 AS halls_with_space"})),
+    ('Respond with ONLY "YES"', "YES"),
+    ("converts natural language queries to PostgreSQL", "SELECT 1 AS halls_with_space"),
+    ("explains SQL query results", "One hall currently has free beds."),
+    ("", "I can help with questions about halls, rooms, complaints and events."),
+]
+
+
+class StubSettings:
+    def __init__(self):
+        self.rules = list(DEFAULT_RULES)
+        self.latency = 0.8
+        self.per_token = 0.015
+        self.calls = Counter()  # marker -> number of completions served
+
+    def reply_for(self, prompt: str) -> Tuple[str, str, float]:
+        for marker, reply, *latency in self.rules:
+            if marker in prompt:
+                return marker, reply, latency[0] / 1000 if latency else self.latency
+        return "", "", self.latency
+
+settings = StubSettings()
+app = FastAPI()
+
+
+def _usage(prompt: str, reply: str) -> dict:
+    prompt_tokens, completion_tokens = len(prompt) // 4, max(1, len(reply) // 4)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+async def _completion(request: Request):
+    body = await request.json()
+    prompt = next((m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+    marker, reply, latency = settings.reply_for(prompt)
+    settings.calls[marker] += 1
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    model = body.get("model", "stub")
+    await asyncio.sleep(latency)
+
+    if not body.get("stream"):
+        return JSONResponse({
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": _usage(prompt, reply),
+        })
+
+    async def chunks():
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            delta = {"content": word if i == 0 else f" {word}"}
+            if i == 0:
+                delta["role"] = "assistant"
+            yield "data: " + json.dumps({
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }) + "\n\n"
+            await asyncio.sleep(settings.per_token)
+        yield "data: " + json.dumps({
+            "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"usage": _usage(prompt, reply)},
+        }) + "\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+app.add_api_route("/openai/v1/chat/completions", _completion, methods=["POST"])
+app.add_api_route("/v1/chat/completions", _completion, methods=["POST"])
+
+
+@app.post("/stub/config")
+async def configure(config: dict):
+    """Any of {"latency_ms", "per_token_ms", "rules": [[marker, reply, latency_ms?], ...]}"""
+    if "latency_ms" in config:
+        settings.latency = config["latency_ms"] / 1000
+    if "per_token_ms" in config:
+        settings.per_token = config["per_token_ms"] / 1000
+    if "rules" in config:
+        settings.rules = [tuple(rule) for rule in config["rules"]]
+    return {"latency_ms": settings.latency * 1000, "per_token_ms": settings.per_token * 1000,
+            "rules": settings.rules}
+
+
+@app.get("/stub/stats")
+async def stats():
+    return {"calls": dict(settings.calls)}
+
+
+def serve_in_thread(port: int = 8901, latency: Optional[float] = None,
+                    per_token: Optional[float] = None) -> uvicorn.Server:
+    """Start the stub on a daemon thread and wait until it accepts requests"""
+    if latency is not None:
+        settings.latency = latency
+    if per_token is not None:
+        settings.per_token = per_token
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="llm-stub", daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--per-token-ms", type=float, default=15)
+    parser.add_argument("--rules", help="JSON file of [marker, reply, latency_ms?] rules replacing the defaults")
+    args = parser.parse_args()
+
+    settings.latency = args.latency_ms / 1000
+    settings.per_token = args.per_token_ms / 1000
+    if args.rules:
+        with open(args.rules) as f:
+            settings.rules = [tuple(rule) for rule in json.load(f)]
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
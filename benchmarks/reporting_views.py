@@ -0,0 +1,51 @@
+"""Reading each reporting view vs running its underlying joins, plus refresh cost.
+
+Needs the app environment (DATABASE_URL etc.) and a migrated database.
+
+Usage:
+    python -m benchmarks.reporting_views [--runs 50]
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from src.common.db import engine
+from src.dashboard.reporting import REPORTING_VIEWS, reporting_views
+
+from .complaint_search import percentile
+
+
+def timed(connection, sql: str, runs: int):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        connection.execute(text(sql)).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    reporting_views.install()
+    started = time.perf_counter()
+    reporting_views.refresh()
+    print(f"refresh all: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    with engine.connect() as connection:
+        for view in REPORTING_VIEWS:
+            joined = timed(connection, view.query, args.runs)
+            stored = timed(connection, f"SELECT * FROM {view.name}", args.runs)
+            print(f"{view.name:<26} joins mean {statistics.mean(joined):7.2f} ms  p95 {percentile(joined, 0.95):7.2f} ms  |  "
+                  f"view mean {statistics.mean(stored):7.2f} ms  p95 {percentile(stored, 0.95):7.2f} ms")
+    for row in reporting_views.stats():
+        print(f"{row['view']:<26} rows {row['rows']:>6}  refresh {row.get('last_refresh_ms', 0):8.1f} ms  "
+              f"staleness {row['staleness_seconds']} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,17 +10,27 @@ from src.auth.routes import(
 from src.common.db import (
     Base,
     engine,
+    SessionLocal,
+    upgrade_schema,
 )
 from src.common.seed import seed_db
 from src.complaints.routes import complaint_router
+from src.complaints.search import complaint_search
+from src.complaints.dedup import complaint_deduplicator
+from src.complaints.classifier import complaint_categorizer
 from src.hostels.routes import(
     hall_router,
     room_router,
     allocation_router
 )
+from src.hostels.occupancy import occupancy_sampler
 from src.chat.routes import chat_router
+from src.chat.quota import usage_meter
 from src.dashboard.routes import dashboard_router
+from src.dashboard.reporting import reporting_views
 from src.calendar.routes import router
+from src.calendar.conflicts import location_schedule
+from src.calendar.services import repair_series_ends
 
 templates = Jinja2Templates(directory="templates")
 
@@ -29,8 +39,27 @@ app = FastAPI()
 @app.on_event("startup") #TODO: fix deprecations
 def on_startup():
     Base.metadata.create_all(bind=engine)  # create tables
+    upgrade_schema()  # add indexes/columns declared after the tables were created
     seed_db()  # seed data
+    complaint_search.install()
+    complaint_deduplicator.install()
+    reporting_views.install()
+    with SessionLocal() as db:
+        repair_series_ends(db)
+    location_schedule.install()  # after the repair, so series are indexed to their real end
+    occupancy_sampler.job.start()
+    complaint_categorizer.job.start()
+    usage_meter.job.start()
+    if reporting_views.available:
+        reporting_views.job.start()
 
+@app.on_event("shutdown")
+def on_shutdown():
+    occupancy_sampler.job.stop()
+    complaint_categorizer.job.stop()
+    usage_meter.job.stop()
+    reporting_views.job.stop()
+    usage_meter.flush()  # don't lose the last interval's counts
 
 
 app.add_middleware(
@@ -39,7 +68,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Redirect-URL"]
+    expose_headers=["X-Redirect-URL", "X-Next-Cursor"]
 )
 
 app.include_router(complaint_router)
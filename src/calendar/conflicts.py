@@ -0,0 +1,117 @@
+"""Per-location index of event times, for clash checks on create/update.
+
+Each location has an interval tree of its events: a single event by its own
+times, a recurring one by the whole span of its series (open-ended series run
+to datetime.max). An occurrence that was moved or relocated has an entry of
+its own, under its new location and times; a cancelled one has none. Looking
+up the events that may clash is O(log n + k); the candidates are then checked
+occurrence by occurrence in services.
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+from uuid import UUID
+
+from src.common.db import SessionLocal
+from .interval_tree import IntervalTreap
+from .models import Event, EventException
+
+# Index entries are (event id, original occurrence start); the event's own entry uses this
+_SERIES = datetime.min
+
+
+class EventConflict(Exception):
+    """The event would overlap others booked at the same location"""
+
+    def __init__(self, location: str, conflicts: list):
+        super().__init__(f"{location} is already booked at that time")
+        self.detail = str(self)
+        self.conflicts = conflicts  # EventSummary of each clashing event/occurrence
+
+
+def location_key(location: Optional[str]) -> Optional[str]:
+    """Locations are compared case- and space-insensitively; None if there is none"""
+    if location is None:
+        return None
+    return " ".join(location.split()).casefold() or None
+
+
+def event_span(start_time: datetime, end_time: datetime, recurrence: Optional[str],
+               series_end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    if recurrence:
+        return start_time, series_end or datetime.max
+    return start_time, end_time
+
+
+class LocationSchedule:
+    """Interval trees of events per location.
+
+    Lives in process memory and is rebuilt from the events table at startup,
+    like the complaint dedup index; each worker sees that snapshot plus its
+    own writes. Callers hold `booking` from the clash check until their
+    commit, so two requests in one worker cannot book the same slot.
+    """
+
+    def __init__(self):
+        self.booking = threading.Lock()
+        self._lock = threading.Lock()
+        self._trees: Dict[str, IntervalTreap] = {}
+        self._entries: Dict[tuple, Tuple[str, datetime]] = {}  # entry -> (location key, indexed start)
+        self._by_event: Dict[UUID, Set[tuple]] = defaultdict(set)
+
+    def install(self):
+        with SessionLocal() as db:
+            exceptions: Dict[UUID, list] = defaultdict(list)
+            for exception in db.query(EventException).yield_per(1000):
+                exceptions[exception.event_id].append(exception)
+            for event in db.query(Event).yield_per(1000):
+                self.add(event, exceptions.get(event.id, ()))
+
+    def add(self, event: Event, exceptions: Iterable[EventException] = ()):
+        """Index a created or updated event and its changed occurrences, replacing what was indexed for it"""
+        with self._lock:
+            self._remove(event.id)
+            self._put((event.id, _SERIES), event.location,
+                      *event_span(event.start_time, event.end_time, event.recurrence, event.series_end))
+            duration = event.end_time - event.start_time
+            for exception in exceptions:
+                if exception.cancelled:
+                    continue
+                start = exception.start_time or exception.occurrence_start
+                self._put((event.id, exception.occurrence_start), exception.location or event.location,
+                          start, exception.end_time or start + duration)
+
+    def _put(self, entry: tuple, location: Optional[str], start: datetime, end: datetime):
+        key = location_key(location)
+        if key is None:
+            return
+        tree = self._trees.get(key)
+        if tree is None:
+            tree = self._trees[key] = IntervalTreap()
+        tree.insert(start, end, entry)
+        self._entries[entry] = (key, start)
+        self._by_event[entry[0]].add(entry)
+
+    def remove(self, event_id: UUID):
+        with self._lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id: UUID):
+        for entry in self._by_event.pop(event_id, ()):
+            key, start = self._entries.pop(entry)
+            tree = self._trees[key]
+            tree.remove(start, entry)
+            if not len(tree):
+                del self._trees[key]
+
+    def overlapping(self, location: Optional[str], start: datetime, end: datetime) -> Set[UUID]:
+        """Events with something indexed at the location that overlaps [start, end)"""
+        key = location_key(location)
+        with self._lock:
+            tree = self._trees.get(key) if key is not None else None
+            if tree is None:
+                return set()
+            return {entry[0] for _, _, entry in tree.overlapping(start, end)}
+
+location_schedule = LocationSchedule()
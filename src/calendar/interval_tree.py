@@ -0,0 +1,127 @@
+"""Interval index for calendar clash checks.
+
+A treap (randomised balanced BST) keyed by (start, id), where every node also
+keeps the largest end in its subtree. Insert and remove are O(log n) expected;
+finding the intervals that overlap [start, end) is O(log n + k) because
+subtrees that end too early, or start too late, are never entered.
+Kept free of config/DB imports so benchmarks can use it directly.
+"""
+import random
+from typing import Hashable, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("key", "end", "max_end", "priority", "left", "right")
+
+    def __init__(self, key: tuple, end, priority: float):
+        self.key = key  # (start, id)
+        self.end = end
+        self.max_end = end
+        self.priority = priority
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+def _update(node: _Node):
+    max_end = node.end
+    if node.left is not None and node.left.max_end > max_end:
+        max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > max_end:
+        max_end = node.right.max_end
+    node.max_end = max_end
+
+
+def _split(node: Optional[_Node], key: tuple) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """(keys < key, keys >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, key)
+    _update(node)
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Every key in left is below every key in right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _insert(node: Optional[_Node], new: _Node) -> _Node:
+    if node is None:
+        return new
+    if new.priority > node.priority:
+        new.left, new.right = _split(node, new.key)
+        _update(new)
+        return new
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+    else:
+        node.right = _insert(node.right, new)
+    _update(node)
+    return node
+
+
+def _remove(node: Optional[_Node], key: tuple) -> Tuple[Optional[_Node], bool]:
+    if node is None:
+        return None, False
+    if key == node.key:
+        return _merge(node.left, node.right), True
+    if key < node.key:
+        node.left, removed = _remove(node.left, key)
+    else:
+        node.right, removed = _remove(node.right, key)
+    if removed:
+        _update(node)
+    return node, removed
+
+
+def _overlapping(node: Optional[_Node], start, end, found: list):
+    if node is None or node.max_end <= start:
+        return  # nothing below ends after start
+    _overlapping(node.left, start, end, found)
+    if node.key[0] < end:
+        if node.end > start:
+            found.append((node.key[0], node.end, node.key[1]))
+        _overlapping(node.right, start, end, found)
+    # else: this node and its right subtree all start at or after end
+
+
+class IntervalTreap:
+    """Half-open intervals [start, end) with an id each; start/end only need to be comparable"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self._root: Optional[_Node] = None
+        self._random = random.Random(seed)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, start, end, item_id: Hashable):
+        self._root = _insert(self._root, _Node((start, item_id), end, self._random.random()))
+        self._size += 1
+
+    def remove(self, start, item_id: Hashable) -> bool:
+        self._root, removed = _remove(self._root, (start, item_id))
+        if removed:
+            self._size -= 1
+        return removed
+
+    def overlapping(self, start, end) -> List[tuple]:
+        """(start, end, id) of every interval overlapping [start, end), by start"""
+        found: List[tuple] = []
+        _overlapping(self._root, start, end, found)
+        return found
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Index, ForeignKey
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from src.common.db import Base, engine
@@ -13,7 +13,32 @@ class Event(Base):
     start_time = Column(DateTime, nullable=False)
     end_time = Column(DateTime, nullable=False)
     location = Column(String(255), nullable=True)
+    # RRULE subset (see recurrence.py); start_time/end_time are the first occurrence
+    recurrence = Column(String(255), nullable=True)
+    # End of the last occurrence of a recurring event; NULL when it recurs forever
+    series_end = Column(DateTime, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
+    __table_args__ = (
+        # Range queries (start_time < to AND end_time > from) and keyset pages ordered by start_time
+        Index("ix_events_start_time_end_time", "start_time", "end_time"),
+        Index("ix_events_recurring_start_time", "start_time", "series_end",
+              postgresql_where=recurrence.isnot(None)),
+    )
+
+# One occurrence of a recurring event cancelled or changed; keyed by its original start
+class EventException(Base):
+    __tablename__ = "event_exceptions"
+
+    event_id = Column(ForeignKey("events.id", ondelete="CASCADE"), primary_key=True)
+    occurrence_start = Column(DateTime, primary_key=True)
+    cancelled = Column(Boolean(), nullable=False, default=False)
+    # Overrides; NULL keeps the series value
+    title = Column(String(255), nullable=True)
+    description = Column(Text, nullable=True)
+    location = Column(String(255), nullable=True)
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""Recurrence rules for calendar events (a subset of RFC 5545 RRULE).
+
+Supported parts: FREQ=DAILY|WEEKLY|MONTHLY, INTERVAL, BYDAY (WEEKLY only,
+MO..SU), COUNT and UNTIL (YYYYMMDD or YYYYMMDDTHHMMSS[Z], inclusive).
+Occurrences are generated lazily, starting from the first one that can matter
+for a window, so expanding a long or open-ended series costs about the same as
+a short one. Kept free of config/DB imports so benchmarks can use it directly.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+MAX_COUNT = 1000
+
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    byday: Tuple[int, ...] = ()  # weekday numbers (Monday = 0), WEEKLY only
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.byday))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until:%Y%m%dT%H%M%S}")
+        return ";".join(parts)
+
+
+def _parse_until(value: str) -> datetime:
+    value = value.rstrip("Z")  # event times are stored without a zone
+    for layout in ("%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            until = datetime.strptime(value, layout)
+        except ValueError:
+            continue
+        # A bare date includes the whole day
+        return until.replace(hour=23, minute=59, second=59) if layout == "%Y%m%d" else until
+    raise ValueError(f"Invalid UNTIL: {value}")
+
+
+def parse_rule(text: str) -> Rule:
+    """Parse "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261218"; raises ValueError"""
+    fields = {}
+    for part in text.strip().removeprefix("RRULE:").split(";"):
+        if not part:
+            continue
+        name, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Invalid recurrence part: {part}")
+        fields[name.strip().upper()] = value.strip().upper()
+
+    freq = fields.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = int(fields.pop("INTERVAL", "1"))
+    if interval < 1:
+        raise ValueError("INTERVAL must be at least 1")
+    byday = ()
+    if "BYDAY" in fields:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            byday = tuple(sorted({WEEKDAYS.index(day) for day in fields.pop("BYDAY").split(",")}))
+        except ValueError:
+            raise ValueError(f"BYDAY days must be among {', '.join(WEEKDAYS)}")
+    count = int(fields.pop("COUNT")) if "COUNT" in fields else None
+    if count is not None and not 1 <= count <= MAX_COUNT:
+        raise ValueError(f"COUNT must be between 1 and {MAX_COUNT}")
+    until = _parse_until(fields.pop("UNTIL")) if "UNTIL" in fields else None
+    if count is not None and until is not None:
+        raise ValueError("Use COUNT or UNTIL, not both")
+    if fields:
+        raise ValueError(f"Unsupported recurrence parts: {', '.join(sorted(fields))}")
+    return Rule(freq, interval, byday, count, until)
+
+
+def _daily(rule: Rule, dtstart: datetime, after: Optional[datetime]) -> Iterator[Tuple[int, datetime]]:
+    step = timedelta(days=rule.interval)
+    index = 0
+    if after is not None and after > dtstart:
+        index = -(-(after - dtstart) // step)  # ceiling division
+    while True:
+        yield index, dtstart + index * step
+        index += 1
+
+
+def _weekly(rule: Rule, dtstart: datetime, after: Optional[datetime]) -> Iterator[Tuple[int, datetime]]:
+    days = rule.byday or (dtstart.weekday(),)
+    week_start = dtstart - timedelta(days=dtstart.weekday())
+    # The first week may start before dtstart; only its later days count
+    first_week = [day for day in days if week_start + timedelta(days=day) >= dtstart]
+    period = 0
+    if after is not None and after > week_start:
+        period = (after - week_start).days // (7 * rule.interval)
+    while True:
+        base = week_start + timedelta(weeks=period * rule.interval)
+        if period == 0:
+            for position, day in enumerate(first_week):
+                yield position, base + timedelta(days=day)
+        else:
+            offset = len(first_week) + (period - 1) * len(days)
+            for position, day in enumerate(days):
+                yield offset + position, base + timedelta(days=day)
+        period += 1
+
+
+def _monthly(rule: Rule, dtstart: datetime, after: Optional[datetime]) -> Iterator[Tuple[int, datetime]]:
+    # Months without dtstart's day (e.g. the 31st) are skipped and not counted;
+    # with COUNT that makes the index depend on every earlier month, so only jump without it
+    months = 0
+    if after is not None and after > dtstart and rule.count is None:
+        months = ((after.year - dtstart.year) * 12 + after.month - dtstart.month) // rule.interval * rule.interval
+    index = 0
+    while True:
+        month_index = dtstart.month - 1 + months
+        year, month = dtstart.year + month_index // 12, month_index % 12 + 1
+        if dtstart.day <= calendar.monthrange(year, month)[1]:
+            yield index, dtstart.replace(year=year, month=month)
+            index += 1
+        months += rule.interval
+
+
+_GENERATORS = {"DAILY": _daily, "WEEKLY": _weekly, "MONTHLY": _monthly}
+
+
+def occurrences(rule: Rule, dtstart: datetime, after: Optional[datetime] = None) -> Iterator[datetime]:
+    """Occurrence starts in order, beginning with the first at or after `after`"""
+    for index, start in _GENERATORS[rule.freq](rule, dtstart, after):
+        if rule.count is not None and index >= rule.count:
+            return
+        if rule.until is not None and start > rule.until:
+            return
+        if after is None or start >= after:
+            yield start
+
+
+def expand(rule: Rule, dtstart: datetime, duration: timedelta,
+           window_start: Optional[datetime] = None, window_end: Optional[datetime] = None) -> Iterator[datetime]:
+    """Starts of the occurrences overlapping [window_start, window_end); lazy, so the end may be open"""
+    after = window_start - duration if window_start is not None else None
+    for start in occurrences(rule, dtstart, after):
+        if window_end is not None and start >= window_end:
+            return
+        if window_start is None or start + duration > window_start:
+            yield start
+
+
+def series_end(rule: Rule, dtstart: datetime, duration: timedelta) -> Optional[datetime]:
+    """End of the last occurrence, or None for a series that never ends"""
+    if rule.count is None and rule.until is None:
+        return None
+    # Bounded by COUNT (at most MAX_COUNT steps) or UNTIL. DAILY and WEEKLY have an
+    # occurrence in every period, so they can start a period before UNTIL; MONTHLY
+    # skips months without dtstart's day (e.g. only some months have a 31st), so
+    # it walks from dtstart (one step per month up to UNTIL)
+    after = None
+    if rule.until is not None and rule.freq != "MONTHLY":
+        after = rule.until - timedelta(days=62 * rule.interval)
+    last = None
+    for start in occurrences(rule, dtstart, after):
+        last = start
+    if last is None and after is not None:
+        # Nothing in that last stretch; walk from dtstart rather than guess
+        for start in occurrences(rule, dtstart):
+            last = start
+    return (last or dtstart) + duration
@@ -1,13 +1,19 @@
+from datetime import datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional, Union
 
 from .schemas import (
     EventCreate,
     EventRead,
-    EventUpdate
+    EventSummary,
+    EventUpdate,
+    EventOccurrenceUpdate,
+    EventExceptionRead
 )
+from .conflicts import EventConflict
 from src.common.db import get_db
 from src.common.security import get_current_user, is_admin
 router = APIRouter(
@@ -19,8 +25,16 @@ from .services import (
     get_events,
     create_event,
     update_event,
-    delete_event
+    delete_event,
+    set_occurrence
 )
+
+def _conflict(e: EventConflict) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"message": e.detail, "conflicts": jsonable_encoder(e.conflicts)},
+    )
+
 @router.post("/", response_model=EventRead, status_code=status.HTTP_201_CREATED)
 def create_new_event_route(
     event: EventCreate,
@@ -29,18 +43,33 @@ def create_new_event_route(
 ):
     try:
         return create_event(db=db, event=event)
+    except EventConflict as e:
+        raise _conflict(e)
     except ValueError as e: # Catch validation errors from Pydantic or CRUD
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
-@router.get("/", response_model=List[EventRead])
+@router.get("/", response_model=Union[List[EventRead], List[EventSummary]])
 def read_events_route(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    from_: Optional[datetime] = Query(None, alias="from", description="Events ending after this time"),
+    to: Optional[datetime] = Query(None, description="Events starting before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    view: Literal["full", "summary"] = Query("full", description="summary: id/title/start/end only"),
+    expand: bool = Query(True, description="false: recurring events once, as stored, instead of their occurrences"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user) # Students and Admins
 ):
-    events = get_events(db, skip=skip, limit=limit)
+    """Events in start order, with recurring events expanded into occurrences for the range.
+    Keyset paginated; the next page's cursor is in the X-Next-Cursor header"""
+    try:
+        events, next_cursor = get_events(db, start=from_, end=to, cursor=cursor, limit=limit,
+                                         summary=view == "summary", expand_recurring=expand)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return events
 
 @router.get("/{event_id}", response_model=EventRead)
@@ -63,6 +92,8 @@ def update_existing_event_route(
 ):
     try:
         db_event = update_event(db=db, event_id=event_id, event_update=event_update)
+    except EventConflict as e:
+        raise _conflict(e)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
@@ -79,4 +110,23 @@ def delete_existing_event_route(
     deleted_event = delete_event(db=db, event_id=event_id)
     if deleted_event is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found for deletion")
-    return # FastAPI handles 204 with no body
\ No newline at end of file
+    return # FastAPI handles 204 with no body
+
+@router.put("/{event_id}/occurrences/{occurrence_start}", response_model=EventExceptionRead)
+def update_occurrence_route(
+    event_id: UUID,
+    occurrence_start: datetime,
+    change: EventOccurrenceUpdate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(is_admin) # Admin only
+):
+    """Cancel or change one occurrence of a recurring event, identified by its original start"""
+    try:
+        exception = set_occurrence(db=db, event_id=event_id, occurrence_start=occurrence_start, change=change)
+    except EventConflict as e:
+        raise _conflict(e)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if exception is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return exception
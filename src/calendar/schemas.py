@@ -2,6 +2,13 @@
 from pydantic import BaseModel, validator,UUID4
 from datetime import datetime
 from typing import Optional
+from .recurrence import parse_rule
+
+
+def _normalize_recurrence(v: Optional[str]) -> Optional[str]:
+    if v is None or not v.strip():
+        return None
+    return str(parse_rule(v))
 
 class EventBase(BaseModel):
     title: str
@@ -9,6 +16,7 @@ class EventBase(BaseModel):
     start_time: datetime
     end_time: datetime
     location: Optional[str] = None
+    recurrence: Optional[str] = None # e.g. "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261218"
 
     @validator('end_time')
     def end_time_must_be_after_start_time(cls, v, values, **kwargs):
@@ -16,6 +24,10 @@ class EventBase(BaseModel):
             raise ValueError('End time must be after start time')
         return v
 
+    @validator('recurrence')
+    def recurrence_must_parse(cls, v):
+        return _normalize_recurrence(v)
+
 class EventCreate(EventBase):
     pass
 
@@ -25,6 +37,11 @@ class EventUpdate(BaseModel): # For partial updates
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     location: Optional[str] = None
+    recurrence: Optional[str] = None # empty string stops the event recurring
+
+    @validator('recurrence')
+    def recurrence_must_parse_update(cls, v):
+        return _normalize_recurrence(v)
 
     @validator('end_time', always=True) # always=True to run even if start_time is not provided in update
     def end_time_must_be_after_start_time_update(cls, v, values, **kwargs):
@@ -37,11 +54,39 @@ class EventUpdate(BaseModel): # For partial updates
         return v
 
 
+class EventSummary(BaseModel):
+    """Compact form for month views: start/end use FullCalendar's field names"""
+    id: UUID4
+    title: str
+    start: datetime
+    end: datetime
+    occurrence_start: Optional[datetime] = None # recurring events: this occurrence's original start
+
+
 class EventRead(EventBase):
     id: UUID4
+    occurrence_start: Optional[datetime] = None # recurring events: this occurrence's original start
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     # created_by_id: Optional[int] = None # If you add it to model
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class EventOccurrenceUpdate(BaseModel):
+    """Cancel or change one occurrence of a recurring event; unset fields keep the series value"""
+    cancelled: bool = False
+    title: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+
+class EventExceptionRead(EventOccurrenceUpdate):
+    event_id: UUID4
+    occurrence_start: datetime
+
+    class Config:
+        orm_mode = True
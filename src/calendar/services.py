@@ -1,25 +1,324 @@
+import base64
+import heapq
+from datetime import datetime, timedelta, UTC
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from uuid import UUID
+from sqlalchemy import and_, or_, tuple_
 from sqlalchemy.orm import Session
-from .models import Event 
-from .schemas import EventCreate, EventUpdate
-from typing import List, Optional
+from src.common.cache import TTLCache
+from src.common.config import CALENDAR_CONFLICT_HORIZON_DAYS, CALENDAR_EXPANSION_CACHE_TTL_SECONDS
+from .conflicts import EventConflict, location_key, location_schedule
+from .interval_tree import IntervalTreap
+from .models import Event, EventException
+from .schemas import EventCreate, EventUpdate, EventRead, EventSummary, EventOccurrenceUpdate
+from .recurrence import parse_rule, expand, series_end
+
+# (series id, series updated_at, window start, window end) -> [(start, end, original start, overrides)]
+_expansions = TTLCache(maxsize=4096, ttl=CALENDAR_EXPANSION_CACHE_TTL_SECONDS)
+
+OVERRIDE_FIELDS = ("title", "description", "location")
+MAX_REPORTED_CONFLICTS = 20
+
+
+class Occurrence(NamedTuple):
+    start: datetime
+    event_id: UUID
+    end: datetime
+    event: object  # Event, or a (id, title, start_time, end_time) row in summary mode
+    occurrence_start: Optional[datetime] = None  # set for occurrences of a recurring event
+    overrides: Optional[dict] = None
+
+
+def _order(occurrence: Occurrence):
+    return occurrence.start, occurrence.event_id
+
+def _set_series_end(db_event: Event):
+    if db_event.recurrence:
+        db_event.series_end = series_end(parse_rule(db_event.recurrence), db_event.start_time,
+                                         db_event.end_time - db_event.start_time)
+    else:
+        db_event.series_end = None
+
+def _stored_times(values: dict) -> dict:
+    for name in ("start_time", "end_time"):
+        if values.get(name) is not None:
+            values[name] = _as_stored(values[name])
+    return values
+
+def repair_series_ends(db: Session) -> int:
+    """Recompute series_end of bounded monthly series, which was cut short for rules
+    that skip months (e.g. INTERVAL=2 from a 31st); returns how many were corrected"""
+    fixed = 0
+    series = db.query(Event).filter(Event.recurrence.isnot(None), Event.series_end.isnot(None))
+    for db_event in series:
+        if parse_rule(db_event.recurrence).freq != "MONTHLY":
+            continue
+        stored = db_event.series_end
+        _set_series_end(db_event)
+        if db_event.series_end != stored:
+            fixed += 1
+    if fixed:
+        db.commit()
+    return fixed
 
 def create_event(db: Session, event: EventCreate) -> Event:
-    db_event = Event(**event.dict())
-    db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    # Stored the way range queries and recurrence expansion compare them: naive UTC
+    db_event = Event(**_stored_times(event.dict()))
+    _set_series_end(db_event)
+    with location_schedule.booking:
+        _check_conflicts(db, _booked(db_event, ()))
+        db.add(db_event)
+        db.commit()
+        db.refresh(db_event)
+        location_schedule.add(db_event)
     return db_event
 
 def get_event(db: Session, event_id: int) -> Optional[Event]:
     return db.query(Event).filter(Event.id == event_id).first()
 
-def get_events(db: Session, skip: int = 0, limit: int = 100) -> List[Event]:
-    return db.query(Event).order_by(Event.start_time.asc()).offset(skip).limit(limit).all()
+def encode_cursor(start_time: datetime, event_id: UUID) -> str:
+    raw = f"{start_time.isoformat()}|{event_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        start_time, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(start_time), UUID(event_id)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+def _as_stored(moment: datetime) -> datetime:
+    # Event times are stored without a zone; aware bounds are taken as UTC
+    if moment.tzinfo is not None:
+        return moment.astimezone(UTC).replace(tzinfo=None)
+    return moment
+
+def _expand_series(event: Event, exceptions: Iterable[EventException],
+                   start: Optional[datetime], end: Optional[datetime]) -> Iterator[tuple]:
+    """(start, end, original start, overrides) for occurrences overlapping [start, end), in order"""
+    duration = event.end_time - event.start_time
+    changed = {exception.occurrence_start: exception for exception in exceptions}
+    generated = (
+        (occurrence, occurrence + duration, occurrence, None)
+        for occurrence in expand(parse_rule(event.recurrence), event.start_time, duration, start, end)
+        if occurrence not in changed
+    )
+    # Changed occurrences may have moved, so they are placed by their new times
+    moved = []
+    for original, exception in changed.items():
+        if exception.cancelled:
+            continue
+        new_start = exception.start_time or original
+        new_end = exception.end_time or new_start + duration
+        if (start is None or new_end > start) and (end is None or new_start < end):
+            overrides = {name: getattr(exception, name) for name in OVERRIDE_FIELDS if getattr(exception, name)}
+            moved.append((new_start, new_end, original, overrides))
+    moved.sort(key=lambda item: item[0])
+    return heapq.merge(generated, moved, key=lambda item: item[0])
+
+def _exceptions_of(db: Session, event_ids: Iterable[UUID]) -> Dict[UUID, List[EventException]]:
+    exceptions: Dict[UUID, List[EventException]] = {event_id: [] for event_id in event_ids}
+    if exceptions:
+        for exception in db.query(EventException).filter(EventException.event_id.in_(list(exceptions))):
+            exceptions[exception.event_id].append(exception)
+    return exceptions
+
+def _booked(event: Event, exceptions: Iterable[EventException]) -> List[Tuple[datetime, datetime, Optional[str]]]:
+    """(start, end, location) of every occurrence the event books, cancelled ones left out.
+    A series that never ends is taken CALENDAR_CONFLICT_HORIZON_DAYS ahead"""
+    if not event.recurrence:
+        return [(event.start_time, event.end_time, event.location)]
+    until = event.series_end
+    if until is None:
+        until = max(event.start_time, datetime.now(UTC).replace(tzinfo=None)) + timedelta(days=CALENDAR_CONFLICT_HORIZON_DAYS)
+    return [(start, end, (overrides or {}).get("location", event.location))
+            for start, end, _, overrides in _expand_series(event, exceptions, event.start_time, until)]
+
+def _check_conflicts(db: Session, booked: List[Tuple[datetime, datetime, Optional[str]]],
+                     ignore: Optional[UUID] = None):
+    """Raise EventConflict if an existing event or occurrence overlaps one of booked at the same location.
+
+    booked holds (start, end, location) per occurrence, as from _booked(). The
+    location index narrows the check to events with something booked at those
+    locations within the same span; only those are loaded and expanded, and
+    their occurrences are looked up in an interval tree of the booked ones.
+    """
+    wanted: Dict[str, dict] = {}  # location key -> booked occurrences there
+    for start, end, location in booked:
+        key = location_key(location)
+        if key is None:
+            continue
+        place = wanted.get(key)
+        if place is None:
+            place = wanted[key] = {"location": location, "tree": IntervalTreap(), "start": start, "end": end}
+        place["tree"].insert(start, end, len(place["tree"]))
+        place["start"], place["end"] = min(place["start"], start), max(place["end"], end)
+    for place in wanted.values():
+        place["candidates"] = location_schedule.overlapping(place["location"], place["start"], place["end"]) - {ignore}
+    candidate_ids = set().union(*(place["candidates"] for place in wanted.values()))
+    if not candidate_ids:
+        return
+
+    candidates = {event.id: event for event in db.query(Event).filter(Event.id.in_(list(candidate_ids)))}
+    exceptions = _exceptions_of(db, [event.id for event in candidates.values() if event.recurrence])
+    clashes, clash_location = [], None
+    for key, place in wanted.items():
+        for event_id in place["candidates"]:
+            event = candidates.get(event_id)
+            if event is None:
+                continue  # deleted by another worker
+            if event.recurrence:
+                existing = (Occurrence(item[0], event.id, item[1], event, item[2], item[3])
+                            for item in _expand_series(event, exceptions[event.id], place["start"], place["end"]))
+            else:
+                existing = [Occurrence(event.start_time, event.id, event.end_time, event)]
+            for occurrence in existing:
+                if location_key((occurrence.overrides or {}).get("location", event.location)) != key:
+                    continue  # this occurrence is booked somewhere else
+                if place["tree"].overlapping(occurrence.start, occurrence.end):
+                    clashes.append(occurrence)
+                    clash_location = clash_location or place["location"]
+    if clashes:
+        clashes.sort(key=_order)
+        raise EventConflict(clash_location, [_to_output(occurrence, summary=True)
+                                             for occurrence in clashes[:MAX_REPORTED_CONFLICTS]])
+
+def _series_occurrences(event: Event, exceptions: List[EventException],
+                        start: Optional[datetime], end: Optional[datetime]) -> Iterator[Occurrence]:
+    if start is not None and end is not None:
+        # Bounded window: expand once and reuse until the series (or one of its exceptions) changes
+        expanded = _expansions.get_or_set(
+            (event.id, event.updated_at, start, end),
+            lambda: list(_expand_series(event, exceptions, start, end))
+        )
+    else:
+        expanded = _expand_series(event, exceptions, start, end)  # open-ended: lazy, the caller stops early
+    return (Occurrence(item[0], event.id, item[1], event, item[2], item[3]) for item in expanded)
+
+def _to_output(occurrence: Occurrence, summary: bool) -> Union[Event, EventRead, EventSummary]:
+    event, overrides = occurrence.event, occurrence.overrides or {}
+    if summary:
+        return EventSummary(id=occurrence.event_id, title=overrides.get("title", event.title),
+                            start=occurrence.start, end=occurrence.end,
+                            occurrence_start=occurrence.occurrence_start)
+    if occurrence.occurrence_start is None:
+        return event
+    return EventRead(
+        id=event.id,
+        title=overrides.get("title", event.title),
+        description=overrides.get("description", event.description),
+        location=overrides.get("location", event.location),
+        start_time=occurrence.start,
+        end_time=occurrence.end,
+        recurrence=event.recurrence,
+        occurrence_start=occurrence.occurrence_start,
+        created_at=event.created_at,
+        updated_at=event.updated_at,
+    )
+
+def get_events(db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               cursor: Optional[str] = None, limit: int = 100, summary: bool = False,
+               expand_recurring: bool = True) -> Tuple[List[Union[Event, EventRead, EventSummary]], Optional[str]]:
+    """Events and occurrences of recurring events overlapping [start, end) by start time,
+    one keyset page at a time.
+
+    Returns the page and the cursor for the next one (None on the last page).
+    Single events are paged in SQL; recurring ones are expanded only for the
+    window and merged in, so a series costs one row however long it runs.
+    With expand_recurring=False each recurring event is listed once, as stored.
+    """
+    start = _as_stored(start) if start is not None else None
+    end = _as_stored(end) if end is not None else None
+    if start is not None and end is not None and end <= start:
+        raise ValueError("'to' must be after 'from'")
+    after = decode_cursor(cursor) if cursor else None
+
+    columns = (Event.id, Event.title, Event.start_time, Event.end_time) if summary else (Event,)
+    singles = db.query(*columns)
+    if expand_recurring:
+        singles = singles.filter(Event.recurrence.is_(None))
+    if start is not None:
+        ends_after = Event.end_time > start
+        if not expand_recurring:
+            # A stored recurring event is listed while it has occurrences after start
+            ends_after = or_(ends_after, and_(Event.recurrence.isnot(None),
+                                              or_(Event.series_end.is_(None), Event.series_end > start)))
+        singles = singles.filter(ends_after)
+    if end is not None:
+        singles = singles.filter(Event.start_time < end)
+    if after:
+        singles = singles.filter(tuple_(Event.start_time, Event.id) > tuple_(*after))
+    # One extra row tells us whether there is a next page
+    single_rows = singles.order_by(Event.start_time.asc(), Event.id.asc()).limit(limit + 1).all()
+
+    # Occurrences starting before the cursor are not needed, so expansion can start there
+    window_start = start
+    if after and (window_start is None or after[0] > window_start):
+        window_start = after[0]
+    series = []
+    if expand_recurring:
+        query = db.query(Event).filter(Event.recurrence.isnot(None))
+        if end is not None:
+            query = query.filter(Event.start_time < end)
+        if window_start is not None:
+            query = query.filter(or_(Event.series_end.is_(None), Event.series_end > window_start))
+        series = query.all()
+    exceptions = _exceptions_of(db, [event.id for event in series])
+
+    streams = [(Occurrence(row.start_time, row.id, row.end_time, row) for row in single_rows)]
+    streams += [_series_occurrences(event, exceptions[event.id], window_start, end) for event in series]
+    merged = heapq.merge(*streams, key=_order)
+    if after:
+        merged = (occurrence for occurrence in merged if _order(occurrence) > after)
+    page = list(islice(merged, limit + 1))
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1].start, page[-1].event_id)
+    return [_to_output(occurrence, summary) for occurrence in page], next_cursor
+
+def set_occurrence(db: Session, event_id: UUID, occurrence_start: datetime,
+                   change: EventOccurrenceUpdate) -> Optional[EventException]:
+    """Cancel or change one occurrence of a recurring event; None if the event does not exist"""
+    db_event = get_event(db, event_id)
+    if db_event is None:
+        return None
+    if not db_event.recurrence:
+        raise ValueError("Only occurrences of recurring events can be changed")
+    occurrence_start = _as_stored(occurrence_start)
+    duration = db_event.end_time - db_event.start_time
+    probe = expand(parse_rule(db_event.recurrence), db_event.start_time, duration,
+                   occurrence_start, occurrence_start + timedelta(microseconds=1))
+    if occurrence_start not in probe:
+        raise ValueError("The event has no occurrence starting at that time")
+
+    values = _stored_times(change.dict())
+    new_start = values["start_time"] or occurrence_start
+    new_end = values["end_time"] or new_start + duration
+    if new_end <= new_start:
+        raise ValueError("End time must be after start time")
+
+    with location_schedule.booking:
+        if not values["cancelled"]:
+            _check_conflicts(db, [(new_start, new_end, values["location"] or db_event.location)], ignore=event_id)
+        exception = db.get(EventException, (event_id, occurrence_start))
+        if exception is None:
+            exception = EventException(event_id=event_id, occurrence_start=occurrence_start)
+            db.add(exception)
+        for key, value in values.items():
+            setattr(exception, key, value)
+        db_event.updated_at = datetime.now(UTC)  # retires cached expansions of this series
+        db.commit()
+        db.refresh(exception)
+        location_schedule.add(db_event, _exceptions_of(db, [event_id])[event_id])
+    return exception
 
 def update_event(db: Session, event_id: int, event_update: EventUpdate) -> Optional[Event]:
     db_event = get_event(db, event_id)
     if db_event:
-        update_data = event_update.dict(exclude_unset=True)
+        update_data = _stored_times(event_update.dict(exclude_unset=True))
         
         # Handle potential start_time/end_time validation for updates
         current_start_time = db_event.start_time
@@ -31,11 +330,30 @@ def update_event(db: Session, event_id: int, event_update: EventUpdate) -> Optio
         if new_start_time and new_end_time and new_end_time <= new_start_time:
             raise ValueError("End time must be after start time")
 
-        for key, value in update_data.items():
-            setattr(db_event, key, value)
-        
-        db.commit()
-        db.refresh(db_event)
+        reshaped = any(key in update_data and update_data[key] != getattr(db_event, key)
+                       for key in ("start_time", "recurrence"))
+        moved = any(key in update_data and update_data[key] != getattr(db_event, key)
+                    for key in ("start_time", "end_time", "recurrence", "location"))
+        with location_schedule.booking:
+            if moved:
+                # Checked as it will be stored, without touching db_event (a query would autoflush it)
+                proposed = Event(id=db_event.id, **{
+                    key: update_data.get(key, getattr(db_event, key))
+                    for key in ("start_time", "end_time", "location", "recurrence")
+                })
+                _set_series_end(proposed)
+                kept = [] if reshaped or not proposed.recurrence else _exceptions_of(db, [db_event.id])[db_event.id]
+                _check_conflicts(db, _booked(proposed, kept), ignore=db_event.id)
+            for key, value in update_data.items():
+                setattr(db_event, key, value)
+            _set_series_end(db_event)
+            if reshaped:
+                # Exceptions are keyed by original occurrence starts, which no longer line up
+                db.query(EventException).filter(EventException.event_id == db_event.id).delete()
+
+            db.commit()
+            db.refresh(db_event)
+            location_schedule.add(db_event, _exceptions_of(db, [db_event.id])[db_event.id])
     return db_event
 
 def delete_event(db: Session, event_id: int) -> Optional[Event]:
@@ -43,4 +361,5 @@ def delete_event(db: Session, event_id: int) -> Optional[Event]:
     if db_event:
         db.delete(db_event)
         db.commit()
+        location_schedule.remove(db_event.id)
     return db_event # Returns the deleted object or None
\ No newline at end of file
@@ -0,0 +1,37 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from src.common.cache import TTLCache
+from src.common.config import (
+    CHAT_CACHE_MAXSIZE,
+    CHAT_SQL_CACHE_TTL_SECONDS,
+    CHAT_ANSWER_CACHE_TTL_SECONDS
+)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_FILLER = {"please", "pls", "kindly", "hi", "hello", "hey", "thanks", "thank", "you"}
+
+# Generated SQL is re-executed on every hit, so it can live long
+sql_cache = TTLCache(maxsize=CHAT_CACHE_MAXSIZE, ttl=CHAT_SQL_CACHE_TTL_SECONDS)
+# Answers are reused only while the question's results are byte-for-byte unchanged
+answer_cache = TTLCache(maxsize=CHAT_CACHE_MAXSIZE, ttl=CHAT_ANSWER_CACHE_TTL_SECONDS)
+
+
+def normalize_question(query: str) -> str:
+    """Lower-case words without punctuation or pleasantries, so rephrasings share an entry"""
+    return " ".join(word for word in _WORD_RE.findall(query.lower()) if word not in _FILLER)
+
+
+def results_digest(rows: List[Dict[str, Any]]) -> str:
+    return hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def answer_key(question: str, digest: Optional[str] = None, context: Optional[str] = None) -> tuple:
+    """SQL answers are keyed by their results; direct answers by the context they were given"""
+    return (question, digest, context)
+
+
+def cache_stats() -> dict:
+    return {"sql": sql_cache.stats(), "answer": answer_cache.stats()}
@@ -0,0 +1,206 @@
+"""Template answers for the chat questions students ask most.
+
+A question is answered straight from the hostel and calendar services, with
+no LLM call, only when its whole wording fits one template's question shape
+(and any hall it names is a known hall). Anything else, including questions
+that fit more than one shape or are long enough to be more specific than a
+template, goes to the LLM pipeline. Every routing decision is logged under
+"src.chat.intents" so frequent unmatched questions can be turned into new
+templates.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional
+
+from src.auth.models import User
+from src.calendar.services import get_events
+from src.common.cache import TTLCache
+from src.common.db import SessionLocal
+from src.hostels.models import Hall
+from src.hostels.service import RoomAllocationService
+
+logger = logging.getLogger(__name__)
+
+# Longer questions usually carry conditions a template would silently drop
+MAX_TEMPLATE_WORDS = 14
+UPCOMING_EVENTS = 5
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Patterns match the whole question after it is reduced to lower-case words
+# joined by single spaces ("What's free in Kuti Hall?" -> "what s free in kuti hall")
+_PREFIX = r"(?:(?:hi|hello|hey|please) )?(?:(?:can|could) you (?:tell|show) me |tell me |show me )?"
+_SUFFIX = r"(?: (?:now|right now|today|please))?"
+_WHAT = r"what(?: s| is|s)?"
+_HALL = r"(?P<hall>[a-z0-9]+(?: [a-z0-9]+){0,4})"
+_SPACE = (r"(?:space|spaces|free (?:beds?|rooms?|spaces?)|available (?:beds?|rooms?)|vacant (?:beds?|rooms?)"
+          r"|vacanc(?:y|ies)|(?:beds?|rooms?) (?:available|free|left))")
+_ALL_HALLS = re.compile(r"(?:all |each |every )?(?:of )?(?:the )?halls?")
+
+
+def _shapes(*alternatives: str) -> List[re.Pattern]:
+    # One pattern per shape: a group name such as "hall" can only appear once per pattern
+    return [re.compile(f"{_PREFIX}{alternative}{_SUFFIX}") for alternative in alternatives]
+
+
+_INTENTS = [
+    ("my_room", _shapes(
+        rf"(?:{_WHAT}|which|where s|where is) my (?:room|room number|hall|allocation|room allocation)",
+        r"where (?:do|am) i (?:stay|staying|live|living)",
+        r"(?:which|what) (?:room|hall) (?:am i (?:in|allocated to|assigned to)|do i (?:have|stay in|live in))",
+    )),
+    ("events", _shapes(
+        r"(?:(?:what|which)(?: s| is| are)? )?(?:the |any )?(?:upcoming|next) events?",
+        r"are there (?:any )?upcoming events",
+        r"(?:what|which) events are (?:coming up|upcoming|on|happening)(?: soon| this week)?",
+        rf"{_WHAT} (?:on|happening|coming up)(?: soon| this week| on campus)?",
+        r"when is the next event",
+        r"(?:show|list)(?: me)? (?:the )?(?:upcoming events|calendar|events calendar)",
+    )),
+    ("occupancy", _shapes(
+        rf"(?:{_WHAT} )?(?:the )?(?:current )?(?:hall )?occupancy(?: rate)?(?: (?:of|in|for|at) {_HALL})?",
+        rf"how (?:full|occupied) (?:is|are) {_HALL}",
+    )),
+    ("availability", _shapes(
+        rf"(?:is there|are there|any)(?: any)? {_SPACE}(?: left)?(?: (?:in|at) {_HALL})?",
+        rf"(?:which|what) halls? (?:still )?(?:have|has) (?:any )?{_SPACE}(?: left)?",
+        rf"(?:does|do) {_HALL} (?:still )?(?:have|has) (?:any )?{_SPACE}(?: left)?",
+        rf"how many {_SPACE}(?: are)?(?: there| left| remaining)?(?: (?:in|at) {_HALL})?",
+        rf"{_WHAT} (?:free|available)(?: (?:in|at) {_HALL})?",
+    )),
+]
+
+# (hall id, lower-cased name) pairs; halls are rarely renamed
+_hall_names = TTLCache(maxsize=1, ttl=60)
+
+
+@dataclass
+class TemplateAnswer:
+    intent: str
+    answer: str
+    data: List[Dict[str, Any]]
+
+
+def _halls(db) -> List[tuple]:
+    return _hall_names.get_or_set("halls", lambda: [(hall.id, hall.name.lower()) for hall in db.query(Hall.id, Hall.name)])
+
+
+def _find_hall(text: str, db) -> Optional[tuple]:
+    """(hall id, name) of the hall named by text, also accepting the name without "hall" or a leading "the" """
+    words = " ".join(word for word in _WORD_RE.findall(text))
+    words = words.removeprefix("the ")
+    for hall_id, name in _halls(db):
+        full = " ".join(_WORD_RE.findall(name))
+        short = " ".join(word for word in _WORD_RE.findall(name) if word != "hall")
+        if words == full or words == full.removeprefix("the ") or (len(short) >= 3 and words == short):
+            return hall_id, name
+    return None
+
+
+def _availability(service: RoomAllocationService, hall: Optional[tuple]) -> TemplateAnswer:
+    halls = [service.get_hall(hall[0])] if hall else service.get_all_halls()
+    data = []
+    for h in halls:
+        rooms = service.get_available_rooms(h.id)
+        data.append({
+            "hall": h.name,
+            "rooms_with_space": len(rooms),
+            "free_beds": sum(room.capacity - room.current_occupancy for room in rooms),
+            "open_for_allocation": bool(h.is_open_for_allocation),
+        })
+    with_space = [row for row in data if row["free_beds"] > 0]
+    if hall:
+        row = data[0]
+        answer = (f"{row['hall']} has {row['free_beds']} free bed(s) across {row['rooms_with_space']} room(s)."
+                  if row["free_beds"] else f"{row['hall']} has no free beds right now.")
+        if row["free_beds"] and not row["open_for_allocation"]:
+            answer += " It is not open for allocation at the moment."
+    elif with_space:
+        answer = "Halls with space: " + "; ".join(
+            f"{row['hall']} ({row['free_beds']} free bed(s))" for row in with_space) + "."
+    else:
+        answer = "No hall has free beds right now."
+    return TemplateAnswer("availability", answer, data)
+
+
+def _occupancy(service: RoomAllocationService, hall: Optional[tuple]) -> TemplateAnswer:
+    hall_ids = [hall[0]] if hall else [h.id for h in service.get_all_halls()]
+    data = [service.get_hall_occupancy_stats(hall_id).model_dump() for hall_id in hall_ids]
+    answer = " ".join(
+        f"{row['hall_name']} is {row['occupancy_rate']:.0f}% occupied "
+        f"({row['current_occupancy']}/{row['total_capacity']}, {row['available_spaces']} space(s) left)."
+        for row in data
+    ) or "There are no halls yet."
+    return TemplateAnswer("occupancy", answer, data)
+
+
+def _events(db) -> TemplateAnswer:
+    # Event times are stored as naive UTC; say so rather than pass them off as local
+    upcoming, _ = get_events(db, start=datetime.now(UTC), limit=UPCOMING_EVENTS)
+    data = [{
+        "title": event.title,
+        "start_time": event.start_time.replace(tzinfo=UTC).isoformat(),
+        "end_time": event.end_time.replace(tzinfo=UTC).isoformat(),
+        "location": event.location,
+    } for event in upcoming]
+    if not upcoming:
+        return TemplateAnswer("events", "There are no upcoming events on the calendar.", data)
+    answer = "Upcoming events: " + "; ".join(
+        f"{event.title} on {event.start_time:%a %d %b at %H:%M} UTC" + (f" at {event.location}" if event.location else "")
+        for event in upcoming) + "."
+    return TemplateAnswer("events", answer, data)
+
+
+def _my_room(service: RoomAllocationService, user: User) -> TemplateAnswer:
+    allocation = service.get_user_allocation(user.id)
+    if not allocation:
+        return TemplateAnswer("my_room", "You don't have a room allocated at the moment.", [])
+    room = service.get_room(allocation.room_id)
+    hall = service.get_hall(allocation.hall_id)
+    data = [{"hall": hall.name, "room_number": room.room_number, "academic_year": allocation.academic_year}]
+    return TemplateAnswer(
+        "my_room",
+        f"You are in room {room.room_number}, {hall.name}, for {allocation.academic_year}.",
+        data
+    )
+
+
+def answer_from_template(query: str, user: User) -> Optional[TemplateAnswer]:
+    """Template answer for a recognised question, else None (blocking; call from the threadpool)"""
+    words = _WORD_RE.findall(query.lower())
+    if len(words) > MAX_TEMPLATE_WORDS:
+        logger.info("chat route=llm reason=long question=%r", query)
+        return None
+    text = " ".join(words)
+    matches = []
+    for name, shapes in _INTENTS:
+        match = next((match for shape in shapes if (match := shape.fullmatch(text))), None)
+        if match:
+            matches.append((name, match))
+    if len(matches) != 1:
+        logger.info("chat route=llm reason=%s question=%r", "ambiguous" if matches else "no_intent", query)
+        return None
+    intent, match = matches[0]
+    hall_text = match.groupdict().get("hall")
+
+    with SessionLocal() as db:
+        service = RoomAllocationService(db)
+        hall = None
+        if hall_text and not _ALL_HALLS.fullmatch(hall_text):
+            hall = _find_hall(hall_text, db)
+            if hall is None:
+                logger.info("chat route=llm reason=unknown_hall question=%r", query)
+                return None
+        if intent == "availability":
+            result = _availability(service, hall)
+        elif intent == "occupancy":
+            result = _occupancy(service, hall)
+        elif intent == "events":
+            result = _events(db)
+        else:
+            result = _my_room(service, user)
+
+    logger.info("chat route=template intent=%s hall=%s question=%r", intent, hall[1] if hall else None, query)
+    return result
@@ -0,0 +1,299 @@
+"""LLM backends for the chat pipeline.
+
+Routes call llm.complete()/llm.stream() with a stage name ("plan", "classify",
+"sql", "answer"); the backend checks the circuit breaker, takes a bulkhead
+slot, applies that stage's deadline and records its latency and token usage
+(charged to the requesting user by the usage meter). CHAT_LLM_BACKEND
+selects Groq or any OpenAI-compatible server (a local model, or
+benchmarks/llm_stub.py), so the chat path can run offline.
+"""
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, NamedTuple, Optional, Tuple, Union
+
+import anyio
+import groq
+import httpx
+
+from src.common.config import (
+    GROQ_API_KEY,
+    CHAT_LLM_BACKEND,
+    CHAT_LLM_MODEL,
+    CHAT_LLM_BASE_URL,
+    CHAT_LLM_API_KEY,
+    CHAT_LLM_TIMEOUTS,
+    CHAT_LLM_MAX_CONCURRENCY,
+    CHAT_LLM_MAX_QUEUE,
+    CHAT_LLM_QUEUE_TIMEOUT_SECONDS,
+    CHAT_LLM_BREAKER_THRESHOLD,
+    CHAT_LLM_BREAKER_RESET_SECONDS
+)
+from .resilience import Bulkhead, CircuitBreaker
+from .quota import usage_meter
+from .tokens import estimate_tokens
+
+TIMING_WINDOW = 1000
+
+
+class LLMError(Exception):
+    """The model call failed"""
+
+
+class LLMTimeout(LLMError):
+    """The stage's deadline passed before the model answered"""
+
+
+class LLMRejected(LLMError):
+    """The provider refused the request (4xx), e.g. JSON mode output that didn't validate"""
+
+
+class Usage(NamedTuple):
+    prompt_tokens: int
+    completion_tokens: int
+
+    @classmethod
+    def from_fields(cls, usage) -> Optional["Usage"]:
+        """From a provider usage object or dict; None when it is missing"""
+        if usage is None:
+            return None
+        if isinstance(usage, dict):
+            return cls(usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0)
+        return cls(usage.prompt_tokens or 0, usage.completion_tokens or 0)
+
+    @classmethod
+    def estimate(cls, prompt: str, completion: str) -> "Usage":
+        return cls(estimate_tokens(prompt), estimate_tokens(completion))
+
+
+class LLMBackend(ABC):
+
+    def __init__(self, model: str, timeouts: Dict[str, float]):
+        self.model = model
+        self.timeouts = timeouts
+        self.bulkhead = Bulkhead(CHAT_LLM_MAX_CONCURRENCY, CHAT_LLM_MAX_QUEUE, CHAT_LLM_QUEUE_TIMEOUT_SECONDS)
+        self.breaker = CircuitBreaker(CHAT_LLM_BREAKER_THRESHOLD, CHAT_LLM_BREAKER_RESET_SECONDS)
+        self._timings: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=TIMING_WINDOW))
+        self._timeouts_hit: Dict[str, int] = defaultdict(int)
+        self._tokens: Dict[str, list] = defaultdict(lambda: [0, 0])
+
+    @abstractmethod
+    async def _complete(self, messages: list, temperature: float, max_tokens: int,
+                        json_mode: bool) -> Tuple[str, Optional[Usage]]:
+        ...
+
+    @abstractmethod
+    def _stream(self, messages: list, temperature: float, max_tokens: int) -> AsyncIterator[Union[str, Usage]]:
+        """Async generator of text deltas, then the Usage if the provider reports it;
+        must release the upstream connection when closed"""
+
+    def _record(self, stage: str, started: float):
+        self._timings[stage].append(time.perf_counter() - started)
+
+    def _account(self, stage: str, usage: Usage):
+        self._tokens[stage][0] += usage.prompt_tokens
+        self._tokens[stage][1] += usage.completion_tokens
+        usage_meter.record(usage.prompt_tokens, usage.completion_tokens)
+
+    @asynccontextmanager
+    async def _guard(self):
+        """Breaker check, then a bulkhead slot; the outcome is reported back to the breaker"""
+        self.breaker.before_call()
+        try:
+            async with self.bulkhead.slot():
+                yield
+        except LLMRejected:
+            self.breaker.on_success()  # the provider answered, just not with what we wanted
+            raise
+        except LLMError:
+            self.breaker.on_failure()
+            raise
+        except BaseException:
+            self.breaker.on_neutral()
+            raise
+        else:
+            self.breaker.on_success()
+
+    async def complete(self, stage: str, prompt: str, temperature: float, max_tokens: int,
+                       json_mode: bool = False) -> str:
+        async with self._guard():
+            started = time.perf_counter()
+            try:
+                with anyio.fail_after(self.timeouts[stage]):
+                    content, usage = await self._complete([{"role": "user", "content": prompt}], temperature,
+                                                          max_tokens, json_mode)
+            except TimeoutError:
+                self._timeouts_hit[stage] += 1
+                raise LLMTimeout(f"{stage} exceeded {self.timeouts[stage]}s")
+            finally:
+                self._record(stage, started)
+            self._account(stage, usage or Usage.estimate(prompt, content))
+            return content
+
+    async def stream(self, stage: str, prompt: str, temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """Text deltas; the stage deadline covers the whole stream, which holds one bulkhead slot"""
+        async with self._guard():
+            started = time.perf_counter()
+            deadline = time.monotonic() + self.timeouts[stage]
+            deltas = self._stream([{"role": "user", "content": prompt}], temperature, max_tokens)
+            parts, usage = [], None
+            try:
+                while True:
+                    # A cancel scope must not span a yield, so each step gets the remaining time
+                    try:
+                        with anyio.fail_after(max(deadline - time.monotonic(), 0)):
+                            delta = await deltas.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    except TimeoutError:
+                        self._timeouts_hit[stage] += 1
+                        raise LLMTimeout(f"{stage} exceeded {self.timeouts[stage]}s")
+                    if isinstance(delta, Usage):
+                        usage = delta
+                        continue
+                    parts.append(delta)
+                    yield delta
+            finally:
+                with anyio.CancelScope(shield=True):
+                    await deltas.aclose()
+                self._record(stage, started)
+                # A stream cut short reports no usage, but what was generated is still billed
+                if usage is not None or parts:
+                    self._account(stage, usage or Usage.estimate(prompt, "".join(parts)))
+
+    def stats(self) -> dict:
+        stages = {}
+        for stage, samples in self._timings.items():
+            ordered = sorted(samples)
+            stages[stage] = {
+                "calls": len(ordered),
+                "timeouts": self._timeouts_hit[stage],
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p95_ms": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+                "prompt_tokens": self._tokens[stage][0],
+                "completion_tokens": self._tokens[stage][1],
+            }
+        return {
+            "backend": type(self).__name__,
+            "model": self.model,
+            "stages": stages,
+            "bulkhead": self.bulkhead.stats(),
+            "breaker": self.breaker.stats(),
+        }
+
+
+class GroqBackend(LLMBackend):
+
+    def __init__(self, model: str, timeouts: Dict[str, float], api_key: str, base_url: Optional[str] = None):
+        super().__init__(model, timeouts)
+        # Async client: a slow completion awaits on the event loop instead of pinning a worker thread
+        self.client = groq.AsyncGroq(api_key=api_key, base_url=base_url)
+
+    async def _complete(self, messages, temperature, max_tokens, json_mode):
+        options = {"response_format": {"type": "json_object"}} if json_mode else {}
+        try:
+            response = await self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **options
+            )
+        except groq.APITimeoutError as e:
+            raise LLMTimeout(str(e)) from e
+        except groq.BadRequestError as e:
+            raise LLMRejected(str(e)) from e
+        except groq.GroqError as e:
+            raise LLMError(str(e)) from e
+        return response.choices[0].message.content.strip(), Usage.from_fields(response.usage)
+
+    async def _stream(self, messages, temperature, max_tokens):
+        try:
+            stream = await self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+        except groq.GroqError as e:
+            raise LLMError(str(e)) from e
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                # Groq reports usage on the last chunk under x_groq
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                    yield Usage.from_fields(x_groq.usage)
+        except groq.GroqError as e:
+            raise LLMError(str(e)) from e
+        finally:
+            with anyio.CancelScope(shield=True):
+                await stream.close()
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Plain /chat/completions over HTTP (vLLM, llama.cpp, Ollama, the benchmark stub)"""
+
+    def __init__(self, model: str, timeouts: Dict[str, float], base_url: str, api_key: Optional[str] = None):
+        super().__init__(model, timeouts)
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(base_url=base_url.rstrip("/") + "/", headers=headers, timeout=None)
+
+    def _body(self, messages, temperature, max_tokens, **extra) -> dict:
+        return {"model": self.model, "messages": messages, "temperature": temperature,
+                "max_tokens": max_tokens, **extra}
+
+    async def _complete(self, messages, temperature, max_tokens, json_mode):
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+        try:
+            response = await self.client.post("chat/completions", json=self._body(messages, temperature, max_tokens, **extra))
+        except httpx.HTTPError as e:
+            raise LLMError(str(e)) from e
+        if 400 <= response.status_code < 500:
+            raise LLMRejected(f"{response.status_code}: {response.text[:200]}")
+        if response.status_code >= 500:
+            raise LLMError(f"{response.status_code}: {response.text[:200]}")
+        body = response.json()
+        return body["choices"][0]["message"]["content"].strip(), Usage.from_fields(body.get("usage"))
+
+    async def _stream(self, messages, temperature, max_tokens):
+        body = self._body(messages, temperature, max_tokens, stream=True)
+        try:
+            async with self.client.stream("POST", "chat/completions", json=body) as response:
+                if response.status_code >= 400:
+                    raise LLMError(f"{response.status_code} from chat/completions")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == "[DONE]":
+                        return
+                    chunk = json.loads(payload)
+                    choices = chunk.get("choices") or []
+                    if choices and choices[0].get("delta", {}).get("content"):
+                        yield choices[0]["delta"]["content"]
+                    usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+                    if usage:
+                        yield Usage.from_fields(usage)
+        except httpx.HTTPError as e:
+            raise LLMError(str(e)) from e
+
+
+def _build_backend() -> LLMBackend:
+    if CHAT_LLM_BACKEND == "groq":
+        return GroqBackend(CHAT_LLM_MODEL, CHAT_LLM_TIMEOUTS, api_key=CHAT_LLM_API_KEY or GROQ_API_KEY,
+                           base_url=CHAT_LLM_BASE_URL)
+    if CHAT_LLM_BACKEND == "openai":
+        if not CHAT_LLM_BASE_URL:
+            raise ValueError("CHAT_LLM_BASE_URL must be set for CHAT_LLM_BACKEND=openai")
+        return OpenAICompatibleBackend(CHAT_LLM_MODEL, CHAT_LLM_TIMEOUTS, base_url=CHAT_LLM_BASE_URL,
+                                       api_key=CHAT_LLM_API_KEY)
+    raise ValueError(f"Unknown CHAT_LLM_BACKEND: {CHAT_LLM_BACKEND}")
+
+llm = _build_backend()
@@ -0,0 +1,22 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    Date,
+    DateTime,
+    ForeignKey,
+    func
+)
+from sqlalchemy.dialects.postgresql import UUID
+from src.common.db import Base, engine
+
+# Chat consumption per user per UTC day; written in batches by the usage meter
+class ChatUsage(Base):
+    __tablename__ = "chat_usage"
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date(), primary_key=True)
+    requests = Column(Integer(), nullable=False, default=0)
+    prompt_tokens = Column(Integer(), nullable=False, default=0)
+    completion_tokens = Column(Integer(), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now(), nullable=False)
+
+Base.metadata.create_all(bind=engine)
@@ -0,0 +1,279 @@
+"""Per-user chat quotas and token accounting.
+
+Two limits, chosen by role: a request rate (token bucket, per worker) and a
+daily token budget per user. Token usage comes from the provider's usage fields
+(estimated when a call ends without them) and is counted in memory, then
+flushed to chat_usage in batches. A user's spend for the day is what is stored
+plus what this worker has not flushed yet; other workers' spend shows up after
+their next flush, so the budget is soft by at most one flush interval.
+"""
+import contextvars
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta, UTC
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from src.auth.models import User
+from src.common.cache import TTLCache
+from src.common.config import (
+    CHAT_RATE_LIMITS,
+    CHAT_DAILY_TOKEN_BUDGETS,
+    CHAT_USAGE_FLUSH_SECONDS
+)
+from src.common.db import SessionLocal, engine
+from src.common.jobs import PeriodicJob
+from .models import ChatUsage
+
+logger = logging.getLogger(__name__)
+
+# Both dialects support INSERT ... ON CONFLICT DO UPDATE with the same API (SQLite in development)
+_insert = sqlite.insert if engine.dialect.name == "sqlite" else postgresql.insert
+
+# User the current request's LLM calls are charged to. Set in the request task,
+# so it is also seen by the streamed response that task goes on to send.
+_usage_owner: contextvars.ContextVar = contextvars.ContextVar("chat_usage_owner", default=None)
+
+
+class QuotaExceeded(Exception):
+    """Over the request rate or the daily token budget"""
+
+    def __init__(self, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def role_of(user: User) -> str:
+    return "admin" if user.is_admin else "student"
+
+
+def _today() -> date:
+    return datetime.now(UTC).date()
+
+
+def _seconds_until_tomorrow() -> float:
+    now = datetime.now(UTC)
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=UTC)
+    return (tomorrow - now).total_seconds()
+
+
+class UsageMeter:
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush (or report) at a time; they share _flushing
+        self._buckets: Dict[object, Tuple[float, float]] = {}  # user id -> (requests left, last refill)
+        self._pending: Dict[tuple, list] = {}  # (user id, day) -> [requests, prompt tokens, completion tokens]
+        self._flushing: Dict[tuple, list] = {}  # batch being written; still counted until it is stored
+        self._stored = TTLCache(maxsize=4096, ttl=CHAT_USAGE_FLUSH_SECONDS)  # (user id, day) -> tokens in chat_usage
+        self.flushed_rows = 0
+        self.job = PeriodicJob("chat-usage-flush", CHAT_USAGE_FLUSH_SECONDS, self.flush)
+
+    def _add(self, user_id, requests: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0):
+        with self._lock:
+            counts = self._pending.setdefault((user_id, _today()), [0, 0, 0])
+            counts[0] += requests
+            counts[1] += prompt_tokens
+            counts[2] += completion_tokens
+
+    def _take_request(self, user_id, per_minute: int) -> float:
+        """Take one request from the user's bucket; seconds until one is free if it is empty"""
+        rate = per_minute / 60
+        now = time.monotonic()
+        with self._lock:
+            available, last = self._buckets.get(user_id, (per_minute, now))
+            available = min(per_minute, available + (now - last) * rate)
+            if available < 1:
+                self._buckets[user_id] = (available, now)
+                return (1 - available) / rate
+            self._buckets[user_id] = (available - 1, now)
+            return 0.0
+
+    def _stored_tokens(self, user_id, day: date) -> int:
+        def load():
+            with self.session_factory() as db:
+                return db.execute(
+                    select(ChatUsage.prompt_tokens + ChatUsage.completion_tokens)
+                    .where(ChatUsage.user_id == user_id, ChatUsage.day == day)
+                ).scalar() or 0
+        return self._stored.get_or_set((user_id, day), load)
+
+    def tokens_used(self, user_id, day: Optional[date] = None) -> int:
+        """Tokens charged to the user on day (today by default), as far as this worker knows"""
+        day = day or _today()
+        with self._lock:
+            unflushed = sum(
+                counts[1] + counts[2]
+                for batch in (self._pending, self._flushing)
+                if (counts := batch.get((user_id, day)))
+            )
+        return self._stored_tokens(user_id, day) + unflushed
+
+    def admit(self, user: User):
+        """Count a chat request against the user's quotas, or raise QuotaExceeded (blocking on a cache miss)"""
+        role = role_of(user)
+        budget = CHAT_DAILY_TOKEN_BUDGETS[role]
+        if self.tokens_used(user.id) >= budget:
+            raise QuotaExceeded(f"Daily chat budget of {budget} tokens used up", _seconds_until_tomorrow())
+        wait = self._take_request(user.id, CHAT_RATE_LIMITS[role])
+        if wait > 0:
+            raise QuotaExceeded(f"More than {CHAT_RATE_LIMITS[role]} chat requests per minute", wait)
+        self._add(user.id, requests=1)
+
+    def charge_to(self, user: User):
+        """Charge LLM usage in the current request to user"""
+        _usage_owner.set(user.id)
+
+    def record(self, prompt_tokens: int, completion_tokens: int):
+        """Add one completion's usage to the current request's user, if any"""
+        user_id = _usage_owner.get()
+        if user_id is not None:
+            self._add(user_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def flush(self) -> int:
+        """Write pending counts to chat_usage in one upsert; kept for the next flush on failure"""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+        if not batch:
+            return 0
+
+        rows = [
+            {"user_id": user_id, "day": day, "requests": counts[0],
+             "prompt_tokens": counts[1], "completion_tokens": counts[2]}
+            for (user_id, day), counts in batch.items()
+        ]
+        statement = _insert(ChatUsage)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ChatUsage.user_id, ChatUsage.day],
+            set_={
+                "requests": ChatUsage.requests + statement.excluded.requests,
+                "prompt_tokens": ChatUsage.prompt_tokens + statement.excluded.prompt_tokens,
+                "completion_tokens": ChatUsage.completion_tokens + statement.excluded.completion_tokens,
+                "updated_at": func.now(),
+            }
+        )
+        try:
+            with self.session_factory() as db:
+                db.execute(statement, rows)
+                db.commit()
+        except Exception:
+            with self._lock:
+                for key, counts in batch.items():
+                    merged = self._pending.setdefault(key, [0, 0, 0])
+                    for i, value in enumerate(counts):
+                        merged[i] += value
+                self._flushing = {}
+            raise
+
+        with self._lock:
+            for key in batch:
+                self._stored.pop(key)
+            self._flushing = {}
+        self.flushed_rows += len(rows)
+        logger.debug("Flushed chat usage for %d user-days", len(rows))
+        return len(rows)
+
+    def _unflushed(self, start: date, end: date) -> Dict[object, list]:
+        """This worker's counts for days in [start, end] that are not in chat_usage yet, per user"""
+        totals: Dict[object, list] = {}
+        with self._lock:
+            for batch in (self._pending, self._flushing):
+                for (user_id, day), counts in batch.items():
+                    if start <= day <= end:
+                        merged = totals.setdefault(user_id, [0, 0, 0])
+                        for i, value in enumerate(counts):
+                            merged[i] += value
+        return totals
+
+    def report(self, db: Session, start: date, end: date, limit: int = 50) -> dict:
+        """Consumption per user for days in [start, end], heaviest users first.
+
+        Stored rows plus this worker's unflushed counts, so the report is still
+        complete for this worker when the last flush failed.
+        """
+        with self._flush_lock:  # no flush moves counts between memory and the table meanwhile
+            return self._report(db, start, end, limit)
+
+    def _report(self, db: Session, start: date, end: date, limit: int) -> dict:
+        prompt_tokens = func.sum(ChatUsage.prompt_tokens)
+        completion_tokens = func.sum(ChatUsage.completion_tokens)
+        rows = db.execute(
+            select(
+                User.id,
+                User.email,
+                User.name,
+                User.is_admin,
+                func.sum(ChatUsage.requests),
+                prompt_tokens,
+                completion_tokens,
+            )
+            .join(ChatUsage, ChatUsage.user_id == User.id)
+            .where(ChatUsage.day >= start, ChatUsage.day <= end)
+            .group_by(User.id)
+            .order_by((prompt_tokens + completion_tokens).desc())
+            .limit(limit)
+        ).all()
+        users = {
+            row[0]: {
+                "user_id": str(row[0]),
+                "email": row[1],
+                "name": row[2],
+                "role": "admin" if row[3] else "student",
+                "requests": row[4],
+                "prompt_tokens": row[5],
+                "completion_tokens": row[6],
+            }
+            for row in rows
+        }
+        totals = list(db.execute(
+            select(
+                func.coalesce(func.sum(ChatUsage.requests), 0),
+                func.coalesce(func.sum(ChatUsage.prompt_tokens), 0),
+                func.coalesce(func.sum(ChatUsage.completion_tokens), 0),
+            )
+            .where(ChatUsage.day >= start, ChatUsage.day <= end)
+        ).one())
+
+        unflushed = self._unflushed(start, end)
+        missing = [user_id for user_id in unflushed if user_id not in users]
+        if missing:
+            for user_id, email, name, is_admin in db.execute(
+                select(User.id, User.email, User.name, User.is_admin).where(User.id.in_(missing))
+            ):
+                users[user_id] = {"user_id": str(user_id), "email": email, "name": name,
+                                  "role": "admin" if is_admin else "student",
+                                  "requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        for user_id, counts in unflushed.items():
+            for i, value in enumerate(counts):
+                totals[i] += value
+            if user_id in users:
+                for i, field in enumerate(("requests", "prompt_tokens", "completion_tokens")):
+                    users[user_id][field] += counts[i]
+        for user in users.values():
+            user["total_tokens"] = user["prompt_tokens"] + user["completion_tokens"]
+
+        return {
+            "start": start,
+            "end": end,
+            "totals": {
+                "requests": totals[0],
+                "prompt_tokens": totals[1],
+                "completion_tokens": totals[2],
+                "total_tokens": totals[1] + totals[2],
+            },
+            "limits": {"requests_per_minute": CHAT_RATE_LIMITS, "daily_token_budgets": CHAT_DAILY_TOKEN_BUDGETS},
+            "users": sorted(users.values(), key=lambda user: user["total_tokens"], reverse=True)[:limit],
+        }
+
+usage_meter = UsageMeter()
@@ -0,0 +1,142 @@
+"""Bulkhead and circuit breaker around LLM calls.
+
+Both are per process and must be used from the event loop. The bulkhead caps
+concurrent model calls and the number waiting for a slot; anything beyond that
+is refused at once, so a slow provider turns into quick 503s rather than a pile
+of stuck requests. The breaker opens after consecutive timeouts/provider
+failures and lets a single probe through once its cool-down has passed.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Optional
+
+
+class Overloaded(Exception):
+    """No LLM slot became free in time, or the wait queue is full"""
+
+
+class CircuitOpen(Exception):
+    """Recent LLM calls kept failing; not trying again until the cool-down ends"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+
+    def __init__(self, max_concurrent: int, max_waiting: int, wait_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.rejected = 0
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+        if len(self._waiters) >= self.max_waiting:
+            self.rejected += 1
+            raise Overloaded("LLM wait queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(f"No LLM slot within {self.wait_timeout}s")
+        except asyncio.CancelledError:
+            # Cancelled just after being handed a slot: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self):
+        # Hand the slot straight to the next waiter so nobody can jump the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    def before_call(self):
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpen(remaining)
+            self.state = self.HALF_OPEN
+        # Half open: exactly one probe at a time
+        if self._probe_in_flight:
+            raise CircuitOpen(self.reset_timeout)
+        self._probe_in_flight = True
+
+    def on_success(self):
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self.state = self.CLOSED
+
+    def on_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def on_neutral(self):
+        """The call ended without saying anything about provider health (cancelled, or never sent)"""
+        self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = round(max(self._opened_at + self.reset_timeout - time.monotonic(), 0), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "trips": self.trips,
+            "retry_in_seconds": retry_in,
+        }
@@ -0,0 +1,93 @@
+"""Compact rendering of query results for the answer prompt.
+
+Rows are written as a pipe-separated table with the column names once. When
+that exceeds the token budget, per-column aggregates are computed over every
+row and only the head and tail rows are shown.
+"""
+import json
+from collections import Counter
+from typing import Any, Dict, List
+
+from src.common.config import CHAT_RESULT_TOKEN_BUDGET
+from .tokens import estimate_tokens
+
+MAX_CELL_CHARS = 80
+MAX_LISTED_VALUES = 5
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, (list, dict)):
+        text = json.dumps(value, default=str)
+    else:
+        text = str(value)
+    if len(text) > MAX_CELL_CHARS:
+        text = text[:MAX_CELL_CHARS - 1] + "…"
+    if "|" in text or "\n" in text:
+        text = json.dumps(text)
+    return text
+
+
+def _table(columns: List[str], rows: List[Dict[str, Any]]) -> List[str]:
+    return [" | ".join(_cell(row.get(column)) for column in columns) for row in rows]
+
+
+def _aggregates(columns: List[str], rows: List[Dict[str, Any]]) -> List[str]:
+    lines = []
+    for column in columns:
+        values = [row.get(column) for row in rows if row.get(column) is not None]
+        summary = f"{column}: {len(values)} non-null"
+        if values:
+            counts = Counter(_cell(value) for value in values)
+            distinct = set(counts)
+            summary += f", {len(distinct)} distinct"
+            numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+            if len(numbers) == len(values):
+                summary += f", min {min(numbers)}, max {max(numbers)}, sum {round(sum(numbers), 4)}"
+            elif len(distinct) > MAX_LISTED_VALUES:
+                # ISO dates/timestamps and most labels still order sensibly as text
+                ordered = sorted(distinct)
+                summary += f", min {ordered[0]}, max {ordered[-1]}"
+            if len(distinct) <= MAX_LISTED_VALUES:
+                summary += ", values " + ", ".join(f"{value} ({count})" for value, count in counts.items())
+        lines.append(summary)
+    return lines
+
+
+def encode_results(rows: List[Dict[str, Any]], truncated: bool = False,
+                   budget: int = CHAT_RESULT_TOKEN_BUDGET) -> str:
+    if not rows:
+        return "(no rows)"
+    columns = list(rows[0].keys())
+    more = " or more (row cap reached)" if truncated else ""
+    header = " | ".join(columns)
+
+    full = [f"{len(rows)} rows{more}", header, *_table(columns, rows)]
+    text = "\n".join(full)
+    if estimate_tokens(text) <= budget:
+        return text
+
+    aggregates = [f"{len(rows)} rows{more}; aggregates over all rows:", *_aggregates(columns, rows)]
+    # Largest head/tail sample (2:1) that still fits, down to a floor of 3 + 2
+    sample = min(len(rows) - 1, 60)
+    while True:
+        head_count = max(3, (sample * 2 + 2) // 3)
+        tail_count = max(2, sample - head_count)
+        if head_count + tail_count >= len(rows):
+            lines = [*aggregates, header, *_table(columns, rows)]
+        else:
+            lines = [
+                *aggregates,
+                f"first {head_count} and last {tail_count} rows:",
+                header,
+                *_table(columns, rows[:head_count]),
+                "...",
+                *_table(columns, rows[-tail_count:]),
+            ]
+        text = "\n".join(lines)
+        if sample <= 5 or estimate_tokens(text) <= budget:
+            return text
+        sample //= 2
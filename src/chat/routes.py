@@ -1,17 +1,40 @@
+import logging
 import os
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Depends
-import groq
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, UTC
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import json
+import re
+import anyio
 from .schemas import (
     QueryRequest,
     QueryResponse
 )
 from src.auth.models import User
-from src.common.db import engine, Base
-from src.common.security import get_current_user
-from src.common.config import DATABASE_URL, GROQ_API_KEY
-from sqlalchemy import text, inspect
+from src.common.db import get_db
+from src.common.security import get_current_user, is_admin
+from src.common.config import DATABASE_URL
+from .schema import schema_description
+from .sql_guard import run_guarded_select, SQLGuardError
+from .result_encoding import encode_results
+from .intents import answer_from_template
+from .llm import llm, LLMError, LLMTimeout, LLMRejected
+from .resilience import Overloaded, CircuitOpen
+from .quota import usage_meter, QuotaExceeded
+from .cache import (
+    sql_cache,
+    answer_cache,
+    normalize_question,
+    results_digest,
+    answer_key,
+    cache_stats
+)
+
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI chat_router
 chat_router = APIRouter(
@@ -19,59 +42,13 @@ chat_router = APIRouter(
     tags=["CHAT"]
 )
 
-# Initialize Groq client
-groq_api_key = GROQ_API_KEY
-if not groq_api_key:
-    raise ValueError("GROQ_API_KEY environment variable not set")
-
-groq_client = groq.Client(api_key=groq_api_key)
-
 # Database connection parameters
 DB_CONNECTION_STRING = DATABASE_URL
 if not DB_CONNECTION_STRING:
     raise ValueError("DATABASE_URL environment variable not set")
 
-# Get database schema information using SQLAlchemy
-def get_db_schema() -> str:
-    """Fetch database schema information including tables and columns using SQLAlchemy"""
-    inspector = inspect(engine)
-    schema_info = {}
-    
-    # Get all tables
-    for table_name in inspector.get_table_names():
-        schema_info[table_name] = []
-        
-        # Get columns for each table
-        for column in inspector.get_columns(table_name):
-            schema_info[table_name].append({
-                "column_name": column["name"],
-                "data_type": str(column["type"]),
-                "is_nullable": "YES" if column.get("nullable", True) else "NO",
-                "default": str(column.get("default", ""))
-            })
-            
-        # Get primary key constraints
-        primary_keys = inspector.get_pk_constraint(table_name)
-        if primary_keys and primary_keys.get("constrained_columns"):
-            schema_info[table_name].append({
-                "constraint_type": "PRIMARY KEY",
-                "columns": primary_keys["constrained_columns"]
-            })
-            
-        # Get foreign key constraints
-        foreign_keys = inspector.get_foreign_keys(table_name)
-        for fk in foreign_keys:
-            schema_info[table_name].append({
-                "constraint_type": "FOREIGN KEY",
-                "columns": fk["constrained_columns"],
-                "referred_table": fk["referred_table"],
-                "referred_columns": fk["referred_columns"]
-            })
-    
-    return json.dumps(schema_info, indent=2)
-
 # Determine if a query can be answered with SQL
-def can_answer_with_sql(query: str, schema_info: str) -> bool:
+async def can_answer_with_sql(query: str, schema_info: str) -> bool:
     """Determine if a query can be answered with SQL using the available schema"""
     
     # Ask Groq to determine if the query can be answered with SQL
@@ -92,22 +69,102 @@ Respond with ONLY "YES" if the query can be answered with SQL using the given sc
 Respond with ONLY "NO" if the query cannot be answered with SQL using the given schema.
 """
 
-    assessment_response = groq_client.chat.completions.create(
-        messages=[{"role": "user", "content": assessment_prompt}],
-        model="llama3-70b-8192",
-        temperature=0.1,
-        max_tokens=10
-    )
-
-    # Extract assessment
-    assessment = assessment_response.choices[0].message.content.strip().upper()
+    assessment = (await llm.complete("classify", assessment_prompt, temperature=0.1, max_tokens=10)).upper()
     return assessment == "YES"
 
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+# Plan a query in one call: SQL to run, or a direct answer
+async def plan_query(query: str, schema_info: str, context: Optional[str] = None) -> Optional[dict]:
+    """Single-pass replacement for can_answer_with_sql + SQL generation.
+
+    Returns {"action": "sql", "sql": ...} or {"action": "answer", "answer": ...},
+    or None when the model's output is not a valid plan.
+    """
+    context_info = f"\nADDITIONAL CONTEXT:\n{context}" if context else ""
+
+    planner_prompt = f"""
+You are the query planner for a student management system.
+Decide whether the user query can be answered from the database below.
+
+DATABASE SCHEMA:
+{schema_info}
+
+USER QUERY:
+{query}{context_info}
+
+If it can, respond with {{"action": "sql", "sql": "<one PostgreSQL SELECT statement>"}}.
+Keeping user security as a priority so passwords should not be included in answers
+and if a user that is not an admin tries to access admin data, select nothing.
+
+If it cannot, respond with {{"action": "answer", "answer": "<your answer>"}}, answering directly and
+helpfully within the scope of a student management system. Politely decline vague or out-of-scope questions.
+For registration questions say: go to the registration page and fill in the form.
+For complaint questions say: go to the complaints page and fill in the form.
+You are not a human and cannot provide personal opinions or experiences.
+UNDER NO CIRCUMSTANCES SHOULD YOU MENTION WHAT MODEL YOU ARE.
+
+Respond with ONLY the JSON object.
+"""
+
+    try:
+        content = await llm.complete("plan", planner_prompt, temperature=0.1, max_tokens=1024, json_mode=True)
+    except LLMRejected as e:
+        # JSON mode rejects output that doesn't parse; treat it like any malformed plan
+        logger.warning("Chat planner output rejected: %s", e)
+        return None
+
+    content = _FENCE_RE.sub("", content)
+    try:
+        plan = json.loads(content)
+    except ValueError:
+        return None
+    if not isinstance(plan, dict):
+        return None
+    if plan.get("action") == "sql" and isinstance(plan.get("sql"), str) and plan["sql"].strip():
+        return {"action": "sql", "sql": plan["sql"].strip()}
+    if plan.get("action") == "answer" and isinstance(plan.get("answer"), str) and plan["answer"].strip():
+        return {"action": "answer", "answer": plan["answer"].strip()}
+    return None
+
+@dataclass
+class PreparedAnswer:
+    """Everything up to the final completion, so it can be awaited whole or streamed"""
+    prompt: Optional[str]
+    temperature: float
+    data: List[Dict[str, Any]] = field(default_factory=list)
+    used_sql: bool = False
+    truncated: bool = False # data stopped at the row cap
+    answer: Optional[str] = None # Already final (planner answered directly); no completion needed
+    cache_key: Optional[tuple] = None # Where to keep the completed answer in answer_cache
+
+
+def execute_sql(sql_query: str) -> Tuple[List[Dict[str, Any]], bool]:
+    """Run generated SQL through the guard and return JSON-safe rows and whether
+    they were truncated (blocking; call from the threadpool)"""
+    try:
+        result = run_guarded_select(sql_query)
+    except SQLGuardError as e:
+        raise HTTPException(status_code=400, detail=f"Query refused: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    # Convert any non-serializable objects in results to strings
+    serializable_results = []
+    for row in result.rows:
+        serializable_row = {}
+        for key, value in row.items():
+            # Handle non-serializable types like Decimal, Date, etc.
+            if not isinstance(value, (str, int, float, bool, type(None), list, dict)):
+                serializable_row[key] = str(value)
+            else:
+                serializable_row[key] = value
+        serializable_results.append(serializable_row)
+    return serializable_results, result.truncated
+
 # Process SQL answerable queries
-def process_sql_query(query: str, schema_info: str) -> dict:
-    """Generate SQL from natural language, execute it, and generate a response"""
-    
-    # Step 1: Generate SQL using Groq
+async def generate_sql(query: str, schema_info: str) -> str:
+    """Generate SQL from natural language"""
     sql_prompt = f"""
 You are an expert SQL assistant that converts natural language queries to PostgreSQL queries.
 Based on the following database schema and user query, generate a valid PostgreSQL query.
@@ -124,32 +181,28 @@ Respond with ONLY the SQL query with no explanation or commentary.
 The SQL should be correct PostgreSQL syntax and appropriate for the schema provided.
 """
 
-    sql_response = groq_client.chat.completions.create(
-        messages=[{"role": "user", "content": sql_prompt}],
-        model="llama3-70b-8192",
-        temperature=0.1,
-        max_tokens=1024
-    )
+    return await llm.complete("sql", sql_prompt, temperature=0.1, max_tokens=1024)
 
-    # Extract SQL query
-    sql_query = sql_response.choices[0].message.content.strip()
-    
-    # Step 2: Execute the SQL query using SQLAlchemy
+async def prepare_sql_answer(query: str, sql_query: str, from_cache: bool = False) -> PreparedAnswer:
+    """Execute the SQL and build the answer prompt"""
+    question = normalize_question(query)
+    # Execute the SQL query off the event loop
     try:
-        with engine.connect() as connection:
-            # Execute the query
-            result = connection.execute(text(sql_query))
-            
-            # Convert results to dictionaries
-            if result.returns_rows:
-                column_names = result.keys()
-                results = [dict(zip(column_names, row)) for row in result.fetchall()]
-            else:
-                results = []
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        results, truncated = await run_in_threadpool(execute_sql, sql_query)
+    except HTTPException:
+        sql_cache.pop(question)
+        raise
+    if not from_cache:
+        sql_cache.set(question, sql_query)
+
+    # Same question, same rows: the earlier answer still holds
+    key = answer_key(question, results_digest(results))
+    cached_answer = answer_cache.get(key)
+    if cached_answer is not None:
+        return PreparedAnswer(prompt=None, temperature=0.3, data=results, used_sql=True,
+                              truncated=truncated, answer=cached_answer)
     
-    # Step 3: Generate natural language answer using Groq
+    # Prompt for the natural language answer
     answer_prompt = f"""
 You are an expert data analyst that explains SQL query results in natural language.
 
@@ -160,45 +213,19 @@ SQL QUERY EXECUTED:
 {sql_query}
 
 QUERY RESULTS:
-{json.dumps(results, default=str, indent=2)}
+{encode_results(results, truncated)}
 
 Respond with a natural language answer to the user's original question based on these results.
 Be direct and concise. Don't mention the SQL or that you ran a query.
 Just answer the question naturally as if you're having a conversation.
 """
 
-    answer_response = groq_client.chat.completions.create(
-        messages=[{"role": "user", "content": answer_prompt}],
-        model="llama3-70b-8192",
-        temperature=0.3,
-        max_tokens=1024,
-        stream=False
-    )
-
-    # Extract answer
-    answer = answer_response.choices[0].message.content.strip()
-    
-    # Convert any non-serializable objects in results to strings
-    serializable_results = []
-    for row in results:
-        serializable_row = {}
-        for key, value in row.items():
-            # Handle non-serializable types like Decimal, Date, etc.
-            if not isinstance(value, (str, int, float, bool, type(None), list, dict)):
-                serializable_row[key] = str(value)
-            else:
-                serializable_row[key] = value
-        serializable_results.append(serializable_row)
-    
-    return {
-        "answer": answer,
-        "data": serializable_results,
-        "used_sql": True
-    }
+    return PreparedAnswer(prompt=answer_prompt, temperature=0.3, data=results, used_sql=True,
+                          truncated=truncated, cache_key=key)
 
 # Process non-SQL answerable queries
-def process_non_sql_query(query: str, context: Optional[str] = None) -> dict:
-    """Generate a response for queries that can't be answered with SQL"""
+def prepare_non_sql_answer(query: str, context: Optional[str] = None) -> PreparedAnswer:
+    """Build the prompt for queries that can't be answered with SQL"""
     
     # Build prompt with context if provided
     context_info = f"\nADDITIONAL CONTEXT:\n{context}" if context else ""
@@ -219,42 +246,173 @@ Understand that you are not a human and cannot provide personal opinions or expe
 UNDER NO CIRCUMSTANCES SHOULD YOU MENTION WHAT MODEL YOU ARE.
 """
 
-    # Get response from Groq
-    response = groq_client.chat.completions.create(
-        messages=[{"role": "user", "content": non_sql_prompt}],
-        model="llama3-70b-8192",
+    return PreparedAnswer(
+        prompt=non_sql_prompt,
         temperature=0.5,
-        max_tokens=1024,
-        stream=False
+        cache_key=answer_key(normalize_question(query), context=context)
     )
 
-    # Extract answer
-    answer = response.choices[0].message.content.strip()
+async def prepare_answer(query: str, context: Optional[str] = None, user: Optional[User] = None) -> PreparedAnswer:
+    """Decide between SQL and a direct answer and do everything before the final completion"""
+    # Common questions are answered from the services directly, without the LLM
+    if user is not None:
+        template = await run_in_threadpool(answer_from_template, query, user)
+        if template is not None:
+            return PreparedAnswer(prompt=None, temperature=0.0, data=template.data, answer=template.answer)
+
+    # Cached compact schema; reflecting again (blocking) only after DDL
+    schema_info = schema_description.peek() or await run_in_threadpool(schema_description.get)
     
-    return {
-        "answer": answer,
-        "data": [],
-        "used_sql": False
-    }
+    # Seen before: re-run the cached SQL on fresh data, or reuse the direct answer
+    question = normalize_question(query)
+    cached_sql = sql_cache.get(question)
+    if cached_sql is not None:
+        return await prepare_sql_answer(query, cached_sql, from_cache=True)
+    direct_key = answer_key(question, context=context)
+    cached_answer = answer_cache.get(direct_key)
+    if cached_answer is not None:
+        return PreparedAnswer(prompt=None, temperature=0.5, answer=cached_answer)
+
+    plan = await plan_query(query, schema_info, context)
+    if plan is not None:
+        if plan["action"] == "sql":
+            return await prepare_sql_answer(query, plan["sql"])
+        answer_cache.set(direct_key, plan["answer"])
+        return PreparedAnswer(prompt=None, temperature=0.5, answer=plan["answer"])
+
+    # Malformed plan: fall back to the classify-then-generate path
+    if await can_answer_with_sql(query, schema_info):
+        return await prepare_sql_answer(query, await generate_sql(query, schema_info))
+    return prepare_non_sql_answer(query, context)
+
+async def complete_answer(prepared: PreparedAnswer) -> str:
+    if prepared.answer is not None:
+        return prepared.answer
+    answer = await llm.complete("answer", prepared.prompt, temperature=prepared.temperature, max_tokens=1024)
+    if prepared.cache_key is not None:
+        answer_cache.set(prepared.cache_key, answer)
+    return answer
 
 # Main function to process all types of queries
-def process_query(query: str, context: Optional[str] = None) -> dict:
+async def process_query(query: str, context: Optional[str] = None, user: Optional[User] = None) -> dict:
     """Process a query, determining whether to use SQL or not"""
-    # Get schema info
-    schema_info = get_db_schema()
-    
-    # Determine if query can be answered with SQL
-    use_sql = can_answer_with_sql(query, schema_info)
-    
-    if use_sql:
-        return process_sql_query(query, schema_info)
-    else:
-        return process_non_sql_query(query, context)
+    prepared = await prepare_answer(query, context, user)
+    return {
+        "answer": await complete_answer(prepared),
+        "data": prepared.data,
+        "used_sql": prepared.used_sql,
+        "truncated": prepared.truncated
+    }
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, default=str, separators=(',', ':'))}\n\n"
+
+async def stream_answer(prepared: PreparedAnswer) -> AsyncIterator[str]:
+    """SSE frames: one "meta" with the data rows, a "token" per delta, then "done".
+
+    If the client disconnects Starlette cancels this generator; closing the
+    delta stream closes the upstream request so generation stops being paid for.
+    """
+    yield _sse("meta", {"data": prepared.data, "used_sql": prepared.used_sql, "truncated": prepared.truncated})
+    if prepared.answer is not None:
+        yield _sse("token", {"text": prepared.answer})
+        yield _sse("done", {})
+        return
+    deltas = llm.stream("answer", prepared.prompt, temperature=prepared.temperature, max_tokens=1024)
+    try:
+        parts = []
+        async for delta in deltas:
+            parts.append(delta)
+            yield _sse("token", {"text": delta})
+        if prepared.cache_key is not None:
+            answer_cache.set(prepared.cache_key, "".join(parts).strip())
+        yield _sse("done", {})
+    except (Overloaded, CircuitOpen) as e:
+        logger.warning("Chat answer shed: %s", e)
+        yield _sse("error", {"detail": "The assistant is busy right now. Please try again shortly."})
+    except LLMError as e:
+        logger.warning("Error streaming chat answer: %s", e)
+        yield _sse("error", {"detail": "The assistant failed to finish this answer."})
+    finally:
+        # Shielded: we may be here because the request task was cancelled
+        with anyio.CancelScope(shield=True):
+            await deltas.aclose()
+
+LLM_FAILURES = (LLMError, Overloaded, CircuitOpen)
+
+def _llm_failure(e: Exception) -> HTTPException:
+    logger.warning("Chat LLM call failed: %s", e)
+    # Shed load: fail fast and tell the client when it is worth retrying
+    if isinstance(e, CircuitOpen):
+        return HTTPException(status_code=503, detail="The assistant is temporarily unavailable. Please try again shortly.",
+                             headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    if isinstance(e, Overloaded):
+        return HTTPException(status_code=503, detail="The assistant is busy right now. Please try again shortly.",
+                             headers={"Retry-After": "1"})
+    if isinstance(e, LLMTimeout):
+        return HTTPException(status_code=504, detail="The assistant took too long to respond. Please try again.")
+    return HTTPException(status_code=502, detail="The assistant is unavailable right now. Please try again.")
+
+async def _admit(user: User):
+    """Apply the user's chat quotas and charge this request's LLM usage to them"""
+    try:
+        await run_in_threadpool(usage_meter.admit, user)
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=e.detail,
+                            headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    usage_meter.charge_to(user)
 
 # Single API route for all queries
 @chat_router.post("/query", response_model=QueryResponse)
-def query_handler(request: QueryRequest,
-                  current_user: User = Depends(get_current_user)):
+async def query_handler(request: QueryRequest,
+                        current_user: User = Depends(get_current_user)):
     """Process any type of query and return appropriate response"""
-    result = process_query(request.query, request.context)
+    await _admit(current_user)
+    try:
+        result = await process_query(request.query, request.context, current_user)
+    except LLM_FAILURES as e:
+        raise _llm_failure(e)
     return QueryResponse(**result)
+
+@chat_router.post("/query/stream")
+async def stream_query_handler(request: QueryRequest,
+                               current_user: User = Depends(get_current_user)):
+    """Same pipeline as /query, with the final answer streamed as Server-Sent Events"""
+    await _admit(current_user)
+    try:
+        prepared = await prepare_answer(request.query, request.context, current_user)
+    except LLM_FAILURES as e:
+        raise _llm_failure(e)
+    return StreamingResponse(
+        stream_answer(prepared),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@chat_router.get("/cache/stats")
+def chat_cache_stats(current_admin: User = Depends(is_admin)):
+    """Size and hit rate of the question -> SQL and answer caches"""
+    return cache_stats()
+
+@chat_router.get("/metrics")
+def chat_metrics(current_admin: User = Depends(is_admin)):
+    """Per-stage LLM latency and timeouts, bulkhead occupancy and breaker state for the configured backend"""
+    return {"llm": llm.stats()}
+
+@chat_router.get("/usage")
+def chat_usage(start: Optional[date] = Query(None, description="First day (UTC), default 6 days before end"),
+               end: Optional[date] = Query(None, description="Last day (UTC), default today"),
+               limit: int = Query(50, ge=1, le=500),
+               current_admin: User = Depends(is_admin),
+               db: Session = Depends(get_db)):
+    """Chat requests and LLM tokens per user, heaviest first, with the configured limits"""
+    end = end or datetime.now(UTC).date()
+    start = start or end - timedelta(days=6)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    try:
+        usage_meter.flush()  # other workers' counts arrive with their own periodic flushes
+    except Exception:
+        # The counts stay in memory and report() still includes them
+        logger.exception("Flushing chat usage failed")
+    return usage_meter.report(db, start, end, limit)
@@ -0,0 +1,128 @@
+import re
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine.reflection import ObjectKind
+from sqlalchemy.sql.ddl import ExecutableDDLElement
+from sqlalchemy.sql.elements import TextClause
+
+from src.common.config import (
+    CHAT_SCHEMA_EXCLUDED_TABLES,
+    CHAT_SCHEMA_EXCLUDED_COLUMNS,
+    REPORTING_REFRESH_SECONDS
+)
+from src.common.db import engine
+from src.dashboard.reporting import VIEWS_BY_NAME
+
+# REFRESH MATERIALIZED VIEW changes data, not shape, so it is not listed
+_DDL_RE = re.compile(r"^\s*(CREATE|ALTER|DROP)\b", re.IGNORECASE)
+_SIZE_RE = re.compile(r"\(\d+(,\s*\d+)?\)")
+
+
+def _render_type(column_type) -> str:
+    enums = getattr(column_type, "enums", None)
+    if enums:
+        return f"enum({'|'.join(enums)})"
+    rendered = str(column_type).lower().replace(" without time zone", "")
+    return _SIZE_RE.sub("", rendered).replace("character varying", "varchar")
+
+
+def _reflect() -> str:
+    """One line per table: name(column type[?] [pk] [->table.column], ...)
+
+    Uses the batched get_multi_* reflection calls, so it is a handful of
+    catalogue queries regardless of how many tables there are. Reporting views
+    come first, with a hint to prefer them over joining the raw tables.
+    """
+    inspector = inspect(engine)
+    columns = inspector.get_multi_columns(kind=ObjectKind.ANY)
+    primary_keys = inspector.get_multi_pk_constraint(kind=ObjectKind.ANY)
+    foreign_keys = inspector.get_multi_foreign_keys(kind=ObjectKind.ANY)
+
+    views, tables = [], []
+    for key in sorted(columns, key=lambda item: item[1]):
+        table_name = key[1]
+        if table_name in CHAT_SCHEMA_EXCLUDED_TABLES:
+            continue
+        pk = set((primary_keys.get(key) or {}).get("constrained_columns") or [])
+        references: Dict[str, str] = {}
+        for fk in foreign_keys.get(key, []):
+            for local, remote in zip(fk["constrained_columns"], fk["referred_columns"]):
+                references[local] = f"{fk['referred_table']}.{remote}"
+
+        rendered = []
+        for column in columns[key]:
+            if column["name"] in CHAT_SCHEMA_EXCLUDED_COLUMNS:
+                continue
+            part = f"{column['name']} {_render_type(column['type'])}"
+            if column.get("nullable", True) and column["name"] not in pk:
+                part += "?"
+            if column["name"] in pk:
+                part += " pk"
+            if column["name"] in references:
+                part += f" ->{references[column['name']]}"
+            rendered.append(part)
+        line = f"{table_name}({', '.join(rendered)})"
+        if table_name in VIEWS_BY_NAME:
+            views.append(f"{line} -- {VIEWS_BY_NAME[table_name].description}")
+        else:
+            tables.append(line)
+
+    lines = ["-- name(column type; ? = nullable; pk = primary key; ->table.column = foreign key)"]
+    if views:
+        lines.append(
+            f"-- Reporting views, refreshed every {REPORTING_REFRESH_SECONDS / 60:g} min (see refreshed_at). "
+            "Prefer them to joining the tables below."
+        )
+        lines.extend(views)
+        lines.append("-- Tables")
+    lines.extend(tables)
+    return "\n".join(lines)
+
+
+class SchemaDescription:
+    """Schema text for the chat prompt, reflected once and kept until DDL runs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._text: Optional[str] = None
+        self._generation = 0
+
+    def peek(self) -> Optional[str]:
+        """Cached text without reflecting; None when a (blocking) reflection is needed"""
+        return self._text
+
+    def get(self) -> str:
+        text = self._text
+        if text is not None:
+            return text
+        with self._lock:
+            if self._text is None:
+                generation = self._generation
+                text = _reflect()
+                # DDL during reflection: return what we saw, but don't keep it
+                if generation != self._generation:
+                    return text
+                self._text = text
+            return self._text
+
+    def invalidate(self):
+        self._generation += 1
+        self._text = None
+
+schema_description = SchemaDescription()
+
+
+@event.listens_for(engine, "after_execute")
+def _invalidate_on_ddl(conn, clauseelement, multiparams, params, execution_options, result):
+    if isinstance(clauseelement, ExecutableDDLElement) or (
+        isinstance(clauseelement, TextClause) and _DDL_RE.match(clauseelement.text)
+    ):
+        schema_description.invalidate()
+
+
+def get_db_schema() -> str:
+    """Compact schema description for prompts (cached)"""
+    return schema_description.get()
+
@@ -8,4 +8,5 @@ class QueryRequest(BaseModel):
 class QueryResponse(BaseModel):
     answer: str = Field(..., description="Natural language answer to the query")
     data: List[Dict[str, Any]] = Field(default=[], description="Query results if SQL was used")
-    used_sql: bool = Field(..., description="Whether SQL was used to answer the query")
\ No newline at end of file
+    used_sql: bool = Field(..., description="Whether SQL was used to answer the query")
+    truncated: bool = Field(default=False, description="Whether data was cut off at the row cap")
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""Guarded execution of model-generated SQL.
+
+The read-only transaction and statement_timeout are what actually protect the
+database; the statement check up front only turns obvious misuse into a clear
+error before a connection is taken.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from sqlalchemy.exc import DBAPIError
+
+from src.common.config import (
+    CHAT_SQL_STATEMENT_TIMEOUT_MS,
+    CHAT_SQL_MAX_COST,
+    CHAT_SQL_MAX_ROWS
+)
+from src.common.db import engine
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\$\$.*?\$\$", re.DOTALL)
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_WORD_RE = re.compile(r"[a-z_][a-z0-9_]*")
+_FORBIDDEN = {
+    "insert", "update", "delete", "merge", "drop", "alter", "create", "truncate", "grant", "revoke",
+    "copy", "vacuum", "analyze", "call", "do", "execute", "prepare", "listen", "notify", "lock", "into",
+    "pg_sleep", "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "lo_import", "lo_export",
+    "dblink", "pg_terminate_backend", "pg_cancel_backend", "set_config",
+}
+QUERY_CANCELED = "57014"
+
+
+class SQLGuardError(ValueError):
+    """Generated SQL was refused before or while running"""
+
+
+@dataclass
+class GuardedResult:
+    rows: List[Dict[str, Any]]
+    truncated: bool
+    estimated_cost: float
+
+
+def check_select(sql: str) -> str:
+    """Single SELECT/WITH statement without a trailing semicolon, or SQLGuardError"""
+    statement = _COMMENT_RE.sub(" ", sql).strip().rstrip(";").strip()
+    # Judge the statement with literals blanked so their contents can't trip (or hide) anything
+    skeleton = _LITERAL_RE.sub("''", statement).lower()
+    if ";" in skeleton:
+        raise SQLGuardError("Only a single statement is allowed.")
+    words = _WORD_RE.findall(skeleton)
+    if not words or words[0] not in ("select", "with"):
+        raise SQLGuardError("Only SELECT queries are allowed.")
+    forbidden = _FORBIDDEN.intersection(words)
+    if forbidden:
+        raise SQLGuardError(f"Query uses a disallowed keyword: {sorted(forbidden)[0]}.")
+    return statement
+
+
+def run_guarded_select(sql: str, max_rows: int = CHAT_SQL_MAX_ROWS) -> GuardedResult:
+    """Run one SELECT read-only, under a timeout and cost ceiling, returning at most max_rows rows"""
+    statement = check_select(sql)
+    limited = f"SELECT * FROM ({statement}) AS chat_query LIMIT {max_rows + 1}"
+
+    # no_parameters: the SQL goes to the driver untouched, so '%' and ':' need no escaping
+    with engine.connect().execution_options(no_parameters=True) as connection:
+        with connection.begin():
+            connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(CHAT_SQL_STATEMENT_TIMEOUT_MS)}")
+            try:
+                plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {limited}").scalar()
+                estimated_cost = float(plan[0]["Plan"]["Total Cost"])
+                if estimated_cost > CHAT_SQL_MAX_COST:
+                    raise SQLGuardError(
+                        f"Query is too expensive to run (estimated cost {estimated_cost:.0f}, "
+                        f"limit {CHAT_SQL_MAX_COST:.0f})."
+                    )
+
+                # Server-side cursor: rows arrive in batches instead of all at once
+                result = connection.execution_options(stream_results=True, max_row_buffer=100).exec_driver_sql(limited)
+                columns = list(result.keys())
+                fetched = result.fetchmany(max_rows + 1)
+                result.close()
+            except DBAPIError as e:
+                if getattr(e.orig, "pgcode", None) == QUERY_CANCELED:
+                    raise SQLGuardError(
+                        f"Query exceeded the {int(CHAT_SQL_STATEMENT_TIMEOUT_MS)} ms time limit."
+                    ) from e
+                raise
+
+    return GuardedResult(
+        rows=[dict(zip(columns, row)) for row in fetched[:max_rows]],
+        truncated=len(fetched) > max_rows,
+        estimated_cost=estimated_cost
+    )
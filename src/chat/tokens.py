@@ -0,0 +1,8 @@
+import re
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count: words, digit runs and punctuation, long words split every 4 chars"""
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _PIECE_RE.findall(text))
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, Hashable, Set
+
+
+class TickBroadcaster:
+    """Coalescing fan-out of keyed updates to Server-Sent Events subscribers.
+
+    publish() may be called from any thread (sync routes run in the threadpool).
+    Updates are collected per channel and key, so only the latest value of a key
+    within a tick is sent. Once per tick the pending deltas are encoded a single
+    time and the same bytes are queued to every subscriber. Subscribers that fall
+    behind are disconnected and expected to reconnect and refetch.
+
+    With dedupe, a key is only re-sent when its value changed since it was last
+    sent; that remembers every key ever published, so keep it for fixed key sets.
+    """
+
+    def __init__(self, event: str, tick: float = 0.5, max_queue: int = 64, keepalive: float = 15.0,
+                 dedupe: bool = True):
+        self.event = event
+        self.tick = tick
+        self.dedupe = dedupe
+        self.max_queue = max_queue
+        self.keepalive = keepalive
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[Hashable, Any]] = {}
+        self._last_sent: Dict[str, Dict[Hashable, Any]] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, channel: str, key: Hashable, value: Any):
+        """Queue the latest value for key; delivered on the next tick"""
+        if not self._subscribers:
+            return
+        with self._lock:
+            self._pending.setdefault(channel, {})[key] = value
+
+    def _drain(self) -> Dict[str, Dict[Hashable, Any]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not self.dedupe:
+            return {channel: {str(key): value for key, value in updates.items()}
+                    for channel, updates in pending.items() if updates}
+
+        deltas = {}
+        for channel, updates in pending.items():
+            last_sent = self._last_sent.setdefault(channel, {})
+            changed = {}
+            for key, value in updates.items():
+                if last_sent.get(key) != value:
+                    last_sent[key] = value
+                    changed[str(key)] = value
+            if changed:
+                deltas[channel] = changed
+        return deltas
+
+    async def _run(self):
+        while self._subscribers:
+            await asyncio.sleep(self.tick)
+            deltas = self._drain()
+            if not deltas:
+                continue
+
+            message = f"event: {self.event}\ndata: {json.dumps(deltas, default=str, separators=(',', ':'))}\n\n"
+            for queue in list(self._subscribers):
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # Slow consumer: drop it rather than buffer without bound
+                    self._subscribers.discard(queue)
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+
+        # Nobody listening: forget delivered state so a later subscriber starts clean
+        self._last_sent.clear()
+        self._task = None
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Async generator of SSE frames for one subscriber"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self._subscribers.discard(queue)
@@ -8,6 +8,91 @@ JWT_KEY = os.environ["JWT_KEY"]
 ACCESS_TOKEN_EXPIRES = int(os.environ["ACCESS_TOKEN_EXPIRES"])
 GROQ_API_KEY = os.environ["GROQ_API_KEY"]
 
+# Seconds between coalesced pushes on the live availability stream
+AVAILABILITY_TICK_SECONDS = float(os.environ.get("AVAILABILITY_TICK_SECONDS", "0.5"))
+
+# Idempotency-Key support: "memory" (single worker) or "database" (shared by all workers)
+IDEMPOTENCY_BACKEND = os.environ.get("IDEMPOTENCY_BACKEND", "memory")
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+# Hall occupancy time series: sampling period and how long each resolution is kept
+OCCUPANCY_SAMPLE_SECONDS = float(os.environ.get("OCCUPANCY_SAMPLE_SECONDS", "60"))
+OCCUPANCY_MINUTE_RETENTION_HOURS = int(os.environ.get("OCCUPANCY_MINUTE_RETENTION_HOURS", "48"))
+OCCUPANCY_HOUR_RETENTION_DAYS = int(os.environ.get("OCCUPANCY_HOUR_RETENTION_DAYS", "90"))
+
+# Complaint search: "auto" uses Postgres full-text search when available, else the in-memory index
+COMPLAINT_SEARCH_BACKEND = os.environ.get("COMPLAINT_SEARCH_BACKEND", "auto")
+
+# How long complaint analytics results are reused before re-aggregating
+COMPLAINT_ANALYTICS_TTL_SECONDS = float(os.environ.get("COMPLAINT_ANALYTICS_TTL_SECONDS", "60"))
+
+# Seconds between batched pushes on the admin complaint feed
+COMPLAINT_FEED_TICK_SECONDS = float(os.environ.get("COMPLAINT_FEED_TICK_SECONDS", "1.0"))
+
+# How long a recurring event's occurrences for one calendar window are reused
+CALENDAR_EXPANSION_CACHE_TTL_SECONDS = float(os.environ.get("CALENDAR_EXPANSION_CACHE_TTL_SECONDS", "300"))
+
+# How far ahead a recurring event that never ends is checked for location clashes
+CALENDAR_CONFLICT_HORIZON_DAYS = int(os.environ.get("CALENDAR_CONFLICT_HORIZON_DAYS", "730"))
+
+# Seconds between refreshes of the materialized reporting views (report_*)
+REPORTING_REFRESH_SECONDS = float(os.environ.get("REPORTING_REFRESH_SECONDS", "300"))
+
+# Tables and columns never described to the chat model (comma separated)
+CHAT_SCHEMA_EXCLUDED_TABLES = [name for name in os.environ.get("CHAT_SCHEMA_EXCLUDED_TABLES", "idempotency_keys,chat_usage").split(",") if name]
+CHAT_SCHEMA_EXCLUDED_COLUMNS = [name for name in os.environ.get("CHAT_SCHEMA_EXCLUDED_COLUMNS", "hashed_password,search_vector").split(",") if name]
+
+# Chat question cache: normalised question -> generated SQL, and -> final answer for unchanged results
+CHAT_CACHE_MAXSIZE = int(os.environ.get("CHAT_CACHE_MAXSIZE", "1024"))
+CHAT_SQL_CACHE_TTL_SECONDS = float(os.environ.get("CHAT_SQL_CACHE_TTL_SECONDS", "86400"))
+CHAT_ANSWER_CACHE_TTL_SECONDS = float(os.environ.get("CHAT_ANSWER_CACHE_TTL_SECONDS", "600"))
+
+# Limits on model-generated chat SQL: per-statement timeout, EXPLAIN cost ceiling and rows returned
+CHAT_SQL_STATEMENT_TIMEOUT_MS = int(os.environ.get("CHAT_SQL_STATEMENT_TIMEOUT_MS", "3000"))
+CHAT_SQL_MAX_COST = float(os.environ.get("CHAT_SQL_MAX_COST", "100000"))
+CHAT_SQL_MAX_ROWS = int(os.environ.get("CHAT_SQL_MAX_ROWS", "200"))
+
+# Approximate tokens of query results embedded in the answer prompt before sampling/aggregating
+CHAT_RESULT_TOKEN_BUDGET = int(os.environ.get("CHAT_RESULT_TOKEN_BUDGET", "1500"))
+
+# Chat LLM: "groq" or "openai" (any OpenAI-compatible server at CHAT_LLM_BASE_URL, e.g. a local model or stub)
+CHAT_LLM_BACKEND = os.environ.get("CHAT_LLM_BACKEND", "groq")
+CHAT_LLM_MODEL = os.environ.get("CHAT_LLM_MODEL", "llama3-70b-8192")
+CHAT_LLM_BASE_URL = os.environ.get("CHAT_LLM_BASE_URL") or None
+CHAT_LLM_API_KEY = os.environ.get("CHAT_LLM_API_KEY") or None
+# Per-stage deadlines in seconds; "answer" covers the whole streamed reply
+CHAT_LLM_TIMEOUTS = {
+    "plan": float(os.environ.get("CHAT_LLM_PLAN_TIMEOUT_SECONDS", "15")),
+    "classify": float(os.environ.get("CHAT_LLM_CLASSIFY_TIMEOUT_SECONDS", "5")),
+    "sql": float(os.environ.get("CHAT_LLM_SQL_TIMEOUT_SECONDS", "15")),
+    "answer": float(os.environ.get("CHAT_LLM_ANSWER_TIMEOUT_SECONDS", "30")),
+}
+# LLM bulkhead (per worker): concurrent calls, callers allowed to wait, and how long they wait
+CHAT_LLM_MAX_CONCURRENCY = int(os.environ.get("CHAT_LLM_MAX_CONCURRENCY", "8"))
+CHAT_LLM_MAX_QUEUE = int(os.environ.get("CHAT_LLM_MAX_QUEUE", "16"))
+CHAT_LLM_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("CHAT_LLM_QUEUE_TIMEOUT_SECONDS", "2"))
+# Circuit breaker: consecutive timeouts/provider failures before opening, and the cool-down
+CHAT_LLM_BREAKER_THRESHOLD = int(os.environ.get("CHAT_LLM_BREAKER_THRESHOLD", "5"))
+CHAT_LLM_BREAKER_RESET_SECONDS = float(os.environ.get("CHAT_LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Chat quotas by role: requests per minute per user (per worker) and LLM tokens per user per UTC day
+CHAT_RATE_LIMITS = {
+    "student": int(os.environ.get("CHAT_STUDENT_REQUESTS_PER_MINUTE", "10")),
+    "admin": int(os.environ.get("CHAT_ADMIN_REQUESTS_PER_MINUTE", "60")),
+}
+CHAT_DAILY_TOKEN_BUDGETS = {
+    "student": int(os.environ.get("CHAT_STUDENT_DAILY_TOKENS", "50000")),
+    "admin": int(os.environ.get("CHAT_ADMIN_DAILY_TOKENS", "500000")),
+}
+# Seconds between batched writes of chat usage counters to chat_usage
+CHAT_USAGE_FLUSH_SECONDS = float(os.environ.get("CHAT_USAGE_FLUSH_SECONDS", "30"))
+
+# Offline complaint categoriser: retrain period, training set cap and confidence needed to apply a suggestion
+CLASSIFIER_RETRAIN_SECONDS = float(os.environ.get("CLASSIFIER_RETRAIN_SECONDS", "3600"))
+CLASSIFIER_MAX_TRAINING_ROWS = int(os.environ.get("CLASSIFIER_MAX_TRAINING_ROWS", "20000"))
+CLASSIFIER_MIN_CONFIDENCE = float(os.environ.get("CLASSIFIER_MIN_CONFIDENCE", "0.6"))
+
 from fastapi_mail import ConnectionConfig
 
 EMAIL_CONFIG = ConnectionConfig(
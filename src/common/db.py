@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, create_engine, inspect, text
 from sqlalchemy.orm import (
     declarative_base,
     sessionmaker,
 )
+from sqlalchemy.schema import CreateColumn
 from .config import DATABASE_URL
 
 engine = create_engine(DATABASE_URL)
@@ -16,4 +17,38 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def upgrade_schema():
+    """Bring existing tables up to the models.
+
+    create_all() only creates missing tables, so indexes and nullable columns
+    added to a model later never reach a database created earlier. This adds them,
+    and on PostgreSQL turns timestamp columns the model now declares with a time
+    zone into timestamptz (existing values are read in the server's time zone,
+    as they were when compared with timestamptz columns before).
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {column["name"]: column for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns and column.nullable:
+                    column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+                elif (engine.dialect.name == "postgresql" and column.name in existing_columns
+                      and isinstance(column.type, DateTime) and column.type.timezone
+                      and not getattr(existing_columns[column.name]["type"], "timezone", True)):
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                        f"TYPE TIMESTAMP WITH TIME ZONE USING {column.name}::timestamptz"
+                    ))
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Optional, Type
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+
+from .config import (
+    IDEMPOTENCY_BACKEND,
+    IDEMPOTENCY_TTL_SECONDS,
+    IDEMPOTENCY_WAIT_SECONDS
+)
+from .db import SessionLocal
+from .models import IdempotencyRecord
+
+
+@dataclass
+class StoredResponse:
+    status_code: int
+    body: str
+
+
+class IdempotencyStore(ABC):
+    """Interface for Idempotency-Key storage.
+
+    claim() returns a StoredResponse when the key already completed, or None when
+    the caller now owns the key and must call complete() or release(). When
+    another request holds the key, claim() blocks until it finishes.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, wait: float = IDEMPOTENCY_WAIT_SECONDS):
+        self.ttl = ttl
+        self.wait = wait
+
+    @abstractmethod
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        ...
+
+    @abstractmethod
+    def complete(self, key: str, response: StoredResponse):
+        ...
+
+    @abstractmethod
+    def release(self, key: str):
+        ...
+
+
+def _mismatch(key: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"Idempotency-Key {key.split(':', 1)[-1]} was already used with a different request body"
+    )
+
+
+def _in_progress(key: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"A request with Idempotency-Key {key.split(':', 1)[-1]} is still being processed"
+    )
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "expires_at", "done", "response")
+
+    def __init__(self, fingerprint: str, expires_at: float):
+        self.fingerprint = fingerprint
+        self.expires_at = expires_at
+        self.done = threading.Event()
+        self.response: Optional[StoredResponse] = None
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store; entries kept in insertion (= expiry) order for cheap sweeps"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def _sweep(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now or not entry.done.is_set():
+                break
+            self._entries.popitem(last=False)
+
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + self.wait
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                self._sweep(now)
+                entry = self._entries.get(key)
+                if entry is None or (entry.done.is_set() and entry.expires_at <= now):
+                    self._entries.pop(key, None)
+                    self._entries[key] = _Entry(fingerprint, now + self.ttl)
+                    return None
+            if entry.fingerprint != fingerprint:
+                raise _mismatch(key)
+            if not entry.done.wait(timeout=max(deadline - now, 0)):
+                raise _in_progress(key)
+            if entry.response is not None:
+                return entry.response
+            # Released after a failure: loop round and try to claim it ourselves
+
+    def complete(self, key: str, response: StoredResponse):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            entry.response = response
+            entry.done.set()
+
+    def release(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Table-backed store shared by every worker; in-flight duplicates poll the row"""
+
+    poll_interval = 0.05
+
+    def __init__(self, session_factory=SessionLocal, **kwargs):
+        super().__init__(**kwargs)
+        self.session_factory = session_factory
+        self._last_purge = 0.0
+
+    def _purge_expired(self, db):
+        now = time.monotonic()
+        if now - self._last_purge < min(self.ttl, 300):
+            return
+        self._last_purge = now
+        db.query(IdempotencyRecord).filter(
+            IdempotencyRecord.expires_at < datetime.now(UTC),
+            IdempotencyRecord.status_code.isnot(None)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + self.wait
+        delay = self.poll_interval
+        with self.session_factory() as db:
+            self._purge_expired(db)
+            while True:
+                try:
+                    db.add(IdempotencyRecord(
+                        key=key,
+                        fingerprint=fingerprint,
+                        expires_at=datetime.now(UTC) + timedelta(seconds=self.ttl)
+                    ))
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()
+
+                record = db.query(IdempotencyRecord).filter(IdempotencyRecord.key == key).first()
+                if record is None:
+                    continue  # released between our insert and select
+                now = datetime.now(UTC)
+                expired = record.status_code is not None and record.expires_at <= now
+                # A claim whose worker died never completes; let it go once waiters would give up
+                abandoned = record.status_code is None and record.created_at <= now - timedelta(seconds=self.wait * 2)
+                if expired or abandoned:
+                    db.delete(record)
+                    db.commit()
+                    continue
+                if record.fingerprint != fingerprint:
+                    raise _mismatch(key)
+                if record.status_code is not None:
+                    return StoredResponse(status_code=record.status_code, body=record.response)
+
+                db.expunge(record)
+                if time.monotonic() + delay > deadline:
+                    raise _in_progress(key)
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    def complete(self, key: str, response: StoredResponse):
+        with self.session_factory() as db:
+            db.query(IdempotencyRecord).filter(IdempotencyRecord.key == key).update(
+                {"status_code": response.status_code, "response": response.body},
+                synchronize_session=False
+            )
+            db.commit()
+
+    def release(self, key: str):
+        with self.session_factory() as db:
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.status_code.is_(None)
+            ).delete(synchronize_session=False)
+            db.commit()
+
+
+def _build_store() -> IdempotencyStore:
+    if IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore()
+    if IDEMPOTENCY_BACKEND == "memory":
+        return InMemoryIdempotencyStore()
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND: {IDEMPOTENCY_BACKEND}")
+
+idempotency_store = _build_store()
+
+
+def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Any],
+    response_model: Type[BaseModel],
+    status_code: int = status.HTTP_200_OK,
+    store: Optional[IdempotencyStore] = None
+) -> Any:
+    """Execute handler at most once per (scope, Idempotency-Key).
+
+    Without a key the handler runs as usual. With a key, a replay returns the
+    stored response without re-executing; failures release the key so a retry
+    runs again.
+    """
+    if not key:
+        return handler()
+
+    store = store or idempotency_store
+    full_key = f"{scope}:{key}"
+    fingerprint = hashlib.sha256(
+        json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+    stored = store.claim(full_key, fingerprint)
+    if stored is not None:
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    try:
+        result = handler()
+        body = response_model.model_validate(result, from_attributes=True).model_dump(mode="json")
+    except BaseException:
+        store.release(full_key)
+        raise
+
+    store.complete(full_key, StoredResponse(
+        status_code=status_code,
+        body=json.dumps(body, separators=(",", ":"))
+    ))
+    return JSONResponse(content=body, status_code=status_code)
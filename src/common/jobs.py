@@ -0,0 +1,43 @@
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Run fn every interval seconds on a daemon thread until stopped"""
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], None], run_immediately: bool = False):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.run_immediately = run_immediately
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _loop(self):
+        if self.run_immediately:
+            self._run_once()
+        while not self._stop.wait(self.interval):
+            self._run_once()
+
+    def _run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            # Keep the schedule alive; the next tick retries
+            logger.exception("Periodic job %s failed", self.name)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
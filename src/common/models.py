@@ -0,0 +1,20 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    func
+)
+from src.common.db import Base, engine
+
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_keys"
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer(), nullable=True)  # NULL while the first request is in flight
+    response = Column(Text(), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+Base.metadata.create_all(bind=engine)
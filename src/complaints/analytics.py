@@ -0,0 +1,90 @@
+from datetime import datetime, UTC
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from src.auth.models import User
+from src.common.cache import TTLCache
+from src.common.config import COMPLAINT_ANALYTICS_TTL_SECONDS
+from .models import Complaint, ComplaintUser
+
+analytics_cache = TTLCache(maxsize=64, ttl=COMPLAINT_ANALYTICS_TTL_SECONDS)
+
+
+def _resolution_percentiles(seconds):
+    return (
+        func.count(seconds),
+        func.percentile_cont(0.5).within_group(seconds),
+        func.percentile_cont(0.9).within_group(seconds),
+        func.percentile_cont(0.99).within_group(seconds),
+    )
+
+
+def _times(count, p50, p90, p99) -> dict:
+    return {
+        "resolved": count,
+        "p50_seconds": float(p50) if p50 is not None else None,
+        "p90_seconds": float(p90) if p90 is not None else None,
+        "p99_seconds": float(p99) if p99 is not None else None,
+    }
+
+
+def _compute(db: Session, bucket: str, start: datetime, end: datetime) -> dict:
+    in_range = (ComplaintUser.created_at >= start, ComplaintUser.created_at < end)
+
+    # Counts per period/category/status in one GROUP BY
+    period = func.date_trunc(bucket, ComplaintUser.created_at).label("period")
+    volume = db.query(
+        period,
+        Complaint.category,
+        Complaint.status,
+        func.count(Complaint.id)
+    ).join(
+        ComplaintUser, Complaint.id == ComplaintUser.complaint_id
+    ).filter(*in_range).group_by(
+        period, Complaint.category, Complaint.status
+    ).order_by(period).all()
+
+    seconds = func.extract("epoch", ComplaintUser.resolved_at - ComplaintUser.created_at)
+    resolved = (*in_range, ComplaintUser.resolved_at.isnot(None))
+
+    overall = db.query(*_resolution_percentiles(seconds)).filter(*resolved).one()
+
+    by_resolver = db.query(
+        ComplaintUser.resolved_by,
+        User.name,
+        *_resolution_percentiles(seconds)
+    ).outerjoin(
+        User, ComplaintUser.resolved_by == User.id
+    ).filter(*resolved).group_by(
+        ComplaintUser.resolved_by, User.name
+    ).order_by(func.count(seconds).desc()).all()
+
+    return {
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "generated_at": datetime.now(UTC),
+        "volume": [
+            {
+                "period": row_period,
+                "category": category.value if category else None,
+                "status": complaint_status.value if complaint_status else None,
+                "count": count,
+            }
+            for row_period, category, complaint_status, count in volume
+        ],
+        "resolution": _times(*overall),
+        "by_resolver": [
+            {"resolver_id": str(resolver_id) if resolver_id else None, "resolver_name": name, **_times(*stats)}
+            for resolver_id, name, *stats in by_resolver
+        ],
+    }
+
+
+def get_complaint_analytics(db: Session, bucket: str, start: datetime, end: datetime) -> dict:
+    """Aggregated in SQL; identical requests within the TTL reuse the last result"""
+    # Minute granularity so dashboards polling "last 30 days" share a cache entry
+    start = start.replace(second=0, microsecond=0)
+    end = end.replace(second=0, microsecond=0)
+    return analytics_cache.get_or_set((bucket, start, end), lambda: _compute(db, bucket, start, end))
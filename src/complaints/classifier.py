@@ -0,0 +1,80 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from src.common.config import (
+    CLASSIFIER_RETRAIN_SECONDS,
+    CLASSIFIER_MAX_TRAINING_ROWS,
+    CLASSIFIER_MIN_CONFIDENCE
+)
+from src.common.db import SessionLocal
+from src.common.enums import Status, ComplainCategory
+from src.common.jobs import PeriodicJob
+from .models import Complaint, ComplaintUser
+from .classifier_model import TfidfLinearClassifier, train
+
+logger = logging.getLogger(__name__)
+
+MIN_TRAINING_ROWS = 20
+
+
+def complaint_text(title: Optional[str], content: Optional[str]) -> str:
+    return f"{title or ''} {content or ''}"
+
+
+def load_training_data(limit: int = CLASSIFIER_MAX_TRAINING_ROWS) -> Tuple[List[str], List[ComplainCategory]]:
+    """Most recently resolved complaints, labelled with their category.
+
+    The category is the one the student filed (or an admin set); model output
+    lives in suggested_category and is never trained on, so the classifier
+    does not learn from its own guesses.
+    """
+    with SessionLocal() as db:
+        rows = db.query(
+            Complaint.title,
+            Complaint.content,
+            Complaint.category
+        ).join(
+            ComplaintUser, Complaint.id == ComplaintUser.complaint_id
+        ).filter(
+            Complaint.status == Status.RESOLVED,
+            Complaint.category.isnot(None)
+        ).order_by(ComplaintUser.resolved_at.desc()).limit(limit).all()
+    return [complaint_text(title, content) for title, content, _ in rows], [row.category for row in rows]
+
+
+class ComplaintCategorizer:
+    """Suggests a category for new complaints without any network call"""
+
+    def __init__(self):
+        self.model: Optional[TfidfLinearClassifier] = None
+        self.trained_on = 0
+        self.job = PeriodicJob("complaint-categorizer", CLASSIFIER_RETRAIN_SECONDS, self.retrain, run_immediately=True)
+
+    def retrain(self):
+        texts, labels = load_training_data()
+        if len(texts) < MIN_TRAINING_ROWS or len(set(labels)) < 2:
+            return
+        started = time.perf_counter()
+        # Fitting is pure Python; in a child process it does not hold this
+        # worker's GIL while requests are being served
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            model = pool.submit(train, texts, labels).result()
+        # Swap in one assignment; readers never see a half-trained model
+        self.model = model
+        self.trained_on = len(texts)
+        logger.info("Complaint categorizer trained on %d complaints in %.1fs",
+                    len(texts), time.perf_counter() - started)
+
+    def suggest(self, title: Optional[str], content: Optional[str]) -> Optional[ComplainCategory]:
+        model = self.model
+        if model is None:
+            return None
+        label, confidence = model.predict(complaint_text(title, content))
+        if label is None or confidence < CLASSIFIER_MIN_CONFIDENCE:
+            return None
+        return label
+
+complaint_categorizer = ComplaintCategorizer()
@@ -0,0 +1,107 @@
+"""TF-IDF + multinomial logistic regression, in pure Python.
+
+Small enough to train from the complaints table in a child process and
+cheap to apply: a prediction touches only the handful of weights for the
+terms in one complaint. No database imports, so it can be benchmarked alone.
+"""
+import math
+import random
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .search_index import tokenize
+
+
+def features(text: str) -> List[str]:
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class TfidfLinearClassifier:
+
+    def __init__(self, epochs: int = 8, learning_rate: float = 0.5, l2: float = 1e-5,
+                 min_df: int = 2, seed: int = 13):
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.min_df = min_df
+        self.seed = seed
+        self.labels: List[Hashable] = []
+        self.idf: Dict[str, float] = {}
+        # term -> per-class weights; biases kept separately
+        self.weights: Dict[str, List[float]] = {}
+        self.bias: List[float] = []
+
+    def _vectorize(self, text: str) -> Dict[str, float]:
+        counts = Counter(term for term in features(text) if term in self.idf)
+        vector = {term: (1 + math.log(count)) * self.idf[term] for term, count in counts.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm:
+            for term in vector:
+                vector[term] /= norm
+        return vector
+
+    def _scores(self, vector: Dict[str, float]) -> List[float]:
+        scores = list(self.bias)
+        for term, value in vector.items():
+            for k, weight in enumerate(self.weights[term]):
+                scores[k] += weight * value
+        return scores
+
+    @staticmethod
+    def _softmax(scores: List[float]) -> List[float]:
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def fit(self, texts: Sequence[str], labels: Sequence[Hashable]) -> "TfidfLinearClassifier":
+        document_frequency = Counter()
+        for text in texts:
+            document_frequency.update(set(features(text)))
+        n = len(texts)
+        self.idf = {
+            term: math.log((1 + n) / (1 + df)) + 1
+            for term, df in document_frequency.items() if df >= self.min_df
+        }
+
+        self.labels = sorted(set(labels), key=str)
+        label_index = {label: k for k, label in enumerate(self.labels)}
+        classes = len(self.labels)
+        self.weights = {term: [0.0] * classes for term in self.idf}
+        self.bias = [0.0] * classes
+
+        # Inverse-frequency class weights so GENERAL does not drown the rest
+        label_counts = Counter(labels)
+        class_weight = {label: n / (classes * count) for label, count in label_counts.items()}
+
+        samples = [(self._vectorize(text), label_index[label], class_weight[label])
+                   for text, label in zip(texts, labels)]
+        rng = random.Random(self.seed)
+        for epoch in range(self.epochs):
+            rng.shuffle(samples)
+            rate = self.learning_rate / (1 + epoch)
+            for vector, target, weight in samples:
+                probabilities = self._softmax(self._scores(vector))
+                for k in range(classes):
+                    gradient = (probabilities[k] - (1.0 if k == target else 0.0)) * weight * rate
+                    if gradient == 0.0:
+                        continue
+                    self.bias[k] -= gradient
+                    for term, value in vector.items():
+                        w = self.weights[term]
+                        w[k] -= gradient * value + rate * self.l2 * w[k]
+        return self
+
+    def predict(self, text: str) -> Tuple[Optional[Hashable], float]:
+        """Most likely label and its probability"""
+        if not self.labels:
+            return None, 0.0
+        probabilities = self._softmax(self._scores(self._vectorize(text)))
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return self.labels[best], probabilities[best]
+
+
+def train(texts: Sequence[str], labels: Sequence[Hashable]) -> TfidfLinearClassifier:
+    """Module-level so a process pool can run it"""
+    return TfidfLinearClassifier().fit(texts, labels)
@@ -0,0 +1,50 @@
+from typing import Iterable, Optional
+from uuid import UUID
+
+from src.common.db import SessionLocal
+from src.common.enums import Status
+from .models import Complaint, ComplaintUser
+from .dedup_index import LSHIndex, Signature, signature
+
+
+class ComplaintDeduplicator:
+    """Links new complaints to an open cluster of near-identical ones.
+
+    The LSH index holds unresolved complaints only and lives in process memory;
+    it is rebuilt from the complaints table at startup. Each worker only sees
+    complaints created since its own start in addition to that snapshot.
+    """
+
+    def __init__(self):
+        self._index = LSHIndex()
+
+    def install(self):
+        with SessionLocal() as db:
+            rows = db.query(
+                Complaint.id,
+                Complaint.title,
+                Complaint.content,
+                Complaint.cluster_id
+            ).join(
+                ComplaintUser, Complaint.id == ComplaintUser.complaint_id
+            ).filter(
+                Complaint.status != Status.RESOLVED
+            ).order_by(ComplaintUser.created_at).yield_per(1000)
+            for complaint_id, title, content, cluster_id in rows:
+                self._index.add(complaint_id, signature(title, content), cluster_id)
+
+    def find_cluster(self, title: Optional[str], content: Optional[str]):
+        """Return (signature, cluster_id or None) for a complaint about to be created"""
+        sig = signature(title, content)
+        match = self._index.match(sig)
+        return sig, (match[0] if match else None)
+
+    def add(self, complaint_id: UUID, sig: Signature, cluster_id: Optional[UUID]):
+        self._index.add(complaint_id, sig, cluster_id)
+
+    def discard(self, complaint_ids: Iterable[UUID]):
+        """Resolved complaints no longer attract new duplicates"""
+        for complaint_id in complaint_ids:
+            self._index.remove(complaint_id)
+
+complaint_deduplicator = ComplaintDeduplicator()
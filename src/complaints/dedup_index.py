@@ -0,0 +1,111 @@
+"""MinHash/LSH index for near-duplicate complaint detection.
+
+Signatures use one-permutation hashing: every character shingle is hashed once
+and only the minimum per bin is kept, so signing costs O(shingles) rather than
+O(shingles x permutations). Like search_index this has no database imports.
+"""
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from .search_index import tokenize
+
+SHINGLE_SIZE = 4
+NUM_BINS = 32
+BANDS = 16
+ROWS_PER_BAND = NUM_BINS // BANDS
+# Estimated Jaccard similarity needed to join a cluster
+SIMILARITY_THRESHOLD = 0.45
+
+_EMPTY = 0xFFFFFFFF
+
+Signature = Tuple[int, ...]
+
+
+def signature(title: Optional[str], content: Optional[str]) -> Signature:
+    text = " ".join(tokenize(title) + tokenize(content))
+    if len(text) < SHINGLE_SIZE:
+        text = text.ljust(SHINGLE_SIZE)
+
+    bins = [_EMPTY] * NUM_BINS
+    encoded = text.encode()
+    for start in range(len(encoded) - SHINGLE_SIZE + 1):
+        value = zlib.crc32(encoded[start:start + SHINGLE_SIZE])
+        slot = value % NUM_BINS
+        if value < bins[slot]:
+            bins[slot] = value
+
+    # Densify: an empty bin borrows the next filled bin to its right (rotation)
+    if _EMPTY in bins:
+        filled = [i for i, value in enumerate(bins) if value != _EMPTY]
+        for i in range(NUM_BINS):
+            if bins[i] == _EMPTY:
+                source = next((j for j in filled if j > i), filled[0])
+                bins[i] = bins[source] ^ (((source - i) % NUM_BINS) * 0x9E3779B1 & _EMPTY)
+    return tuple(bins)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+
+class LSHIndex:
+    """Banded LSH over signatures, tracking which cluster each document belongs to"""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._bands: List[Dict[Signature, Set[Hashable]]] = [defaultdict(set) for _ in range(BANDS)]
+        self._signatures: Dict[Hashable, Signature] = {}
+        self._clusters: Dict[Hashable, Hashable] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def _band_keys(sig: Signature):
+        for band in range(BANDS):
+            yield band, sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+
+    def add(self, doc_id: Hashable, sig: Signature, cluster_id: Optional[Hashable] = None):
+        with self._lock:
+            self._remove(doc_id)
+            self._signatures[doc_id] = sig
+            self._clusters[doc_id] = cluster_id or doc_id
+            for band, key in self._band_keys(sig):
+                self._bands[band][key].add(doc_id)
+
+    def _remove(self, doc_id: Hashable):
+        sig = self._signatures.pop(doc_id, None)
+        if sig is None:
+            return
+        self._clusters.pop(doc_id, None)
+        for band, key in self._band_keys(sig):
+            bucket = self._bands[band].get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._bands[band][key]
+
+    def remove(self, doc_id: Hashable):
+        with self._lock:
+            self._remove(doc_id)
+
+    def match(self, sig: Signature) -> Optional[Tuple[Hashable, float]]:
+        """Cluster of the most similar indexed document, if it clears the threshold"""
+        with self._lock:
+            candidates = set()
+            for band, key in self._band_keys(sig):
+                bucket = self._bands[band].get(key)
+                if bucket:
+                    candidates.update(bucket)
+
+            best, best_score = None, self.threshold
+            for doc_id in candidates:
+                score = similarity(sig, self._signatures[doc_id])
+                if score >= best_score:
+                    best, best_score = doc_id, score
+            if best is None:
+                return None
+            return self._clusters[best], best_score
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from src.common.broadcast import TickBroadcaster
+from src.common.config import COMPLAINT_FEED_TICK_SECONDS
+from src.common.enums import Status
+
+# Create/resolve events for the admin dashboard, batched per tick and keyed by complaint id.
+# Not deduplicated: complaint ids are unbounded, and each event is sent once anyway
+complaint_feed = TickBroadcaster("complaints", tick=COMPLAINT_FEED_TICK_SECONDS, dedupe=False)
+
+
+def publish_created(complaint: dict):
+    """complaint is a FullComplaintResponse dumped in JSON mode; call only after commit"""
+    complaint_feed.publish("created", complaint["complaint_id"], complaint)
+
+
+def publish_resolved(complaint_id: UUID, resolved_by: Optional[UUID], resolved_at: Optional[datetime]):
+    """Patch for a row the admin already has; call only after commit"""
+    complaint_feed.publish("resolved", str(complaint_id), {
+        "status": Status.RESOLVED.value,
+        "resolved_by": str(resolved_by) if resolved_by else None,
+        "resolved_at": resolved_at.isoformat() if resolved_at else None,
+    })
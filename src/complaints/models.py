@@ -6,6 +6,7 @@ from sqlalchemy import (
     String,
     Boolean,
     DateTime,
+    Index,
     func
 )
 from sqlalchemy.dialects.postgresql import(
@@ -25,8 +26,16 @@ class Complaint(Base):
     title = Column(String(64), nullable=False)
     content = Column(String(128), nullable=True)
     category = Column(ENUM(ComplainCategory), default=ComplainCategory.GENERAL)
+    # Classifier's guess at the category; shown to admins, never written over category
+    suggested_category = Column(ENUM(ComplainCategory), nullable=True)
     status = Column(ENUM(Status), default=Status.PENDING)
     # no_of_complaints = Column(Integer())
+    # First complaint of a near-duplicate cluster; NULL when this complaint started its own
+    cluster_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+
+    __table_args__ = (
+        Index("ix_complaints_status_category", "status", "category"),
+    )
 
 class ComplaintUser(Base):
     __tablename__ = "complains_logs"
@@ -35,6 +44,12 @@ class ComplaintUser(Base):
     created_at = Column(DateTime(timezone=True), default=func.now())
     resolved_by = Column(ForeignKey("users.id", ondelete="CASCADE"),
                          nullable=True)
-    resolved_at = Column(DateTime(timezone=False), nullable=True)
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination walks (created_at, complaint_id) newest first
+        Index("ix_complains_logs_created_at_complaint_id", "created_at", "complaint_id"),
+        Index("ix_complains_logs_created_by_created_at", "created_by", "created_at"),
+    )
 
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
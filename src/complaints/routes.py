@@ -1,5 +1,8 @@
-from typing import List, Optional
+import base64
+import logging
+from typing import List, Literal, Optional
 from uuid import UUID
+from sqlalchemy import func, or_, tuple_, update
 from sqlalchemy.orm import Session
 from fastapi import (
     APIRouter,
@@ -8,9 +11,12 @@ from fastapi import (
     status,
     HTTPException,
     Request,
-    Body
+    Body,
+    Header,
+    Query
 )
-from datetime import datetime
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta, UTC
 from .models import (
     Complaint,
     ComplaintUser,
@@ -22,16 +28,26 @@ from .schemas import(
     # ComplaintResponse, # Will define a more complete one below for clarity
     ResolveComplaintRequest,
     BulkResolveRequest,
-    ResolveResponse
+    ResolveResponse,
+    ComplaintCounts,
+    ComplaintAnalytics
 )
 from src.auth.models import User # Import User model
 from src.common.db import get_db
+from src.common.idempotency import run_idempotent
+from .search import complaint_search
+from .dedup import complaint_deduplicator
+from .classifier import complaint_categorizer
+from .analytics import get_complaint_analytics
+from .feed import complaint_feed, publish_created, publish_resolved
 from src.common.security import(
     get_current_user,
     is_admin
 )
 # from src.common.enums import Status # Already imported
 
+logger = logging.getLogger(__name__)
+
 complaint_router = APIRouter(
     prefix="/complaint",
     tags=['COMPLAINTS']
@@ -46,6 +62,7 @@ class FullComplaintResponse(BaseModel):
     title: Optional[str] = None
     details: Optional[str] = None # Mapped from Complaint.content
     category: Optional[ComplainCategory] = None
+    suggested_category: Optional[ComplainCategory] = None # Classifier's suggestion, if it had one
     created_by: str # User ID of the creator
     created_by_name: Optional[str] = None # Name of the creator
     user_level: Optional[str] = None # Level of the creator
@@ -53,20 +70,83 @@ class FullComplaintResponse(BaseModel):
     status: Status
     resolved_by: Optional[str] = None # User ID of the resolver
     resolved_at: Optional[datetime] = None
+    cluster_id: Optional[str] = None # Near-duplicate cluster this complaint was linked to
 
     class Config:
         from_attributes = True # Pydantic V2, or orm_mode = True for V1
         use_enum_values = True # Ensures enum values (e.g., "PENDING") are used
 
 
-@complaint_router.get("/", response_model=List[FullComplaintResponse])
+class ComplaintPage(BaseModel):
+    items: List[FullComplaintResponse]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page
+    counts: Optional[ComplaintCounts] = None
+
+
+def _to_full_response(complaint: Complaint, complaint_log: ComplaintUser, creator_user: User) -> FullComplaintResponse:
+    return FullComplaintResponse(
+        complaint_id=str(complaint.id),
+        title=complaint.title,
+        details=complaint.content, # Use content for details
+        category=complaint.category,
+        suggested_category=complaint.suggested_category,
+        created_by=str(complaint_log.created_by),
+        created_by_name=creator_user.name, # Get creator's name
+        user_level=str(creator_user.level) if creator_user.level else None, # Get creator's level
+        created_at=complaint_log.created_at,
+        status=complaint.status,
+        resolved_by=str(complaint_log.resolved_by) if complaint_log.resolved_by else None,
+        resolved_at=complaint_log.resolved_at,
+        cluster_id=str(complaint.cluster_id) if complaint.cluster_id else None
+    )
+
+def _encode_cursor(created_at: datetime, complaint_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{complaint_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, complaint_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(complaint_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor."
+        )
+
+
+@complaint_router.get("/", response_model=ComplaintPage)
 def get_all_complaints(
     request: Request,
+    status_filter: Optional[Status] = Query(None, alias="status"),
+    category: Optional[ComplainCategory] = None,
+    created_by: Optional[UUID] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    with_counts: bool = True,
     current_admin: User = Depends(is_admin),
     db: Session = Depends(get_db)
 ):
+    """
+    List complaints newest first using keyset pagination.
+    Counts per status/category cover all matching complaints and come from one aggregate query.
+    """
+    filters = []
+    if status_filter:
+        filters.append(Complaint.status == status_filter)
+    if category:
+        filters.append(Complaint.category == category)
+    if created_by:
+        filters.append(ComplaintUser.created_by == created_by)
+    if created_from:
+        filters.append(ComplaintUser.created_at >= created_from)
+    if created_to:
+        filters.append(ComplaintUser.created_at < created_to)
+
     # Join Complaint, ComplaintUser, and User (for creator details)
-    complaint_data = db.query(
+    query = db.query(
         Complaint,
         ComplaintUser,
         User  # User model for the creator
@@ -74,25 +154,132 @@ def get_all_complaints(
         ComplaintUser, Complaint.id == ComplaintUser.complaint_id
     ).join(
         User, ComplaintUser.created_by == User.id  # Join on creator's ID
-    ).all()
-
-    result = []
-    for complaint, complaint_log, creator_user in complaint_data:
-        result.append(FullComplaintResponse(
-            complaint_id=str(complaint.id),
-            title=complaint.title,
-            details=complaint.content, # Use content for details
-            category=complaint.category,
-            created_by=str(complaint_log.created_by),
-            created_by_name=creator_user.name, # Get creator's name
-            user_level=str(creator_user.level) if creator_user.level else None, # Get creator's level
-            created_at=complaint_log.created_at,
-            status=complaint.status, # This is the crucial field
-            resolved_by=str(complaint_log.resolved_by) if complaint_log.resolved_by else None,
-            resolved_at=complaint_log.resolved_at
-        ))
-        
-    return result
+    ).filter(*filters)
+
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.filter(
+            tuple_(ComplaintUser.created_at, ComplaintUser.complaint_id) < tuple_(cursor_created_at, cursor_id)
+        )
+
+    # One extra row tells us whether there is a next page
+    rows = query.order_by(
+        ComplaintUser.created_at.desc(),
+        ComplaintUser.complaint_id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_log = rows[-1][1]
+        next_cursor = _encode_cursor(last_log.created_at, last_log.complaint_id)
+
+    counts = None
+    if with_counts:
+        grouped = db.query(
+            Complaint.status,
+            Complaint.category,
+            func.count(Complaint.id)
+        ).join(
+            ComplaintUser, Complaint.id == ComplaintUser.complaint_id
+        ).filter(*filters).group_by(Complaint.status, Complaint.category).all()
+
+        by_status, by_category = {}, {}
+        for complaint_status, complaint_category, count in grouped:
+            status_key = complaint_status.value if complaint_status else "unknown"
+            category_key = complaint_category.value if complaint_category else "unknown"
+            by_status[status_key] = by_status.get(status_key, 0) + count
+            by_category[category_key] = by_category.get(category_key, 0) + count
+        counts = ComplaintCounts(
+            total=sum(by_status.values()),
+            by_status=by_status,
+            by_category=by_category
+        )
+
+    return ComplaintPage(
+        items=[_to_full_response(*row) for row in rows],
+        next_cursor=next_cursor,
+        counts=counts
+    )
+
+@complaint_router.get("/analytics", response_model=ComplaintAnalytics)
+def complaint_analytics(
+    bucket: Literal["day", "week"] = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_admin: User = Depends(is_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Complaint counts per day/week by category and status, plus resolution-time
+    percentiles overall and per resolver. Defaults to the last 30 days.
+    """
+    end = end or datetime.now(UTC)
+    start = start or end - timedelta(days=30)
+    # Naive datetimes are taken as UTC
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=UTC)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=UTC)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end."
+        )
+    return get_complaint_analytics(db, bucket, start, end)
+
+
+class ComplaintSearchHit(FullComplaintResponse):
+    rank: float
+
+
+@complaint_router.get("/feed")
+def stream_complaint_feed(current_admin: User = Depends(is_admin)):
+    """
+    Server-Sent Events stream of complaint changes for the admin dashboard.
+    Each event carries a "created" map of full complaints and a "resolved" map
+    of status patches, both keyed by complaint id.
+    """
+    return StreamingResponse(
+        complaint_feed.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@complaint_router.get("/search", response_model=List[ComplaintSearchHit])
+def search_complaints(
+    q: str = Query(..., min_length=1, max_length=200),
+    status_filter: Optional[Status] = Query(None, alias="status"),
+    category: Optional[ComplainCategory] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_admin: User = Depends(is_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked search over complaint titles and content.
+    Every word matches as a prefix, so "wat 20" finds "water in room 202".
+    """
+    hits = complaint_search.search(db, q, status=status_filter, category=category, limit=limit)
+    if not hits:
+        return []
+
+    ranks = dict(hits)
+    rows = db.query(
+        Complaint,
+        ComplaintUser,
+        User
+    ).join(
+        ComplaintUser, Complaint.id == ComplaintUser.complaint_id
+    ).join(
+        User, ComplaintUser.created_by == User.id
+    ).filter(Complaint.id.in_(ranks)).all()
+
+    results = [
+        ComplaintSearchHit(**_to_full_response(*row).model_dump(), rank=ranks[row[0].id])
+        for row in rows
+    ]
+    results.sort(key=lambda hit: hit.rank, reverse=True)
+    return results
 
 @complaint_router.get("/{complaint_id}", response_model=FullComplaintResponse)
 def get_complaint_by_id(
@@ -119,29 +306,25 @@ def get_complaint_by_id(
             detail=f"Complaint with id {complaint_id} not found."
         )
     
-    complaint, complaint_log, creator_user = data
-    
-    return FullComplaintResponse(
-        complaint_id=str(complaint.id),
-        title=complaint.title,
-        details=complaint.content,
-        category=complaint.category,
-        created_by=str(complaint_log.created_by),
-        created_by_name=creator_user.name,
-        user_level=str(creator_user.level) if creator_user.level else None,
-        created_at=complaint_log.created_at,
-        status=complaint.status,
-        resolved_by=str(complaint_log.resolved_by) if complaint_log.resolved_by else None,
-        resolved_at=complaint_log.resolved_at
-    )
+    return _to_full_response(*data)
 
 @complaint_router.post("/create-complaint", response_model=FullComplaintResponse)
 def create_complaint(
     request: Request,
     complaint: ComplaintCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user) # This is the creator
+    current_user: User = Depends(get_current_user), # This is the creator
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
+    return run_idempotent(
+        idempotency_key,
+        scope=f"complaint:{current_user.id}",
+        payload=complaint,
+        handler=lambda: _create_complaint(complaint, db, current_user),
+        response_model=FullComplaintResponse
+    )
+
+def _create_complaint(complaint: ComplaintCreate, db: Session, current_user: User) -> FullComplaintResponse:
     try:
         if not current_user: # Safeguard, though get_current_user should raise 401
             raise HTTPException(
@@ -149,10 +332,14 @@ def create_complaint(
                 detail="User not authenticated."
             )
             
+        signature, cluster_id = complaint_deduplicator.find_cluster(complaint.title, complaint.content)
         new_complaint = Complaint(
             title = complaint.title,
             content = complaint.content,
-            category = complaint.category,            )
+            category = complaint.category,
+            suggested_category = complaint_categorizer.suggest(complaint.title, complaint.content),
+            cluster_id = cluster_id,
+        )
         db.add(new_complaint)
         db.flush() 
         log = ComplaintUser(
@@ -163,20 +350,6 @@ def create_complaint(
         db.commit()
         db.refresh(new_complaint)
         db.refresh(log)
-
-        return FullComplaintResponse(
-            complaint_id=str(new_complaint.id), 
-            title=new_complaint.title,
-            details=new_complaint.content,
-            category=new_complaint.category,
-            created_by=str(log.created_by), # Should be current_user.id
-            created_by_name=current_user.name, # Creator's name
-            user_level=str(current_user.level) if current_user.level else None, # Creator's level
-            created_at=log.created_at,
-            status=new_complaint.status, # Should be PENDING
-            resolved_by=None, # New complaints are not resolved
-            resolved_at=None  # New complaints are not resolved
-        )
     except Exception as e:
         db.rollback()
         # It's good practice to log the actual error e
@@ -186,6 +359,35 @@ def create_complaint(
             detail=f"An error occurred while creating the complaint."
         )
 
+    response = FullComplaintResponse(
+        complaint_id=str(new_complaint.id), 
+        title=new_complaint.title,
+        details=new_complaint.content,
+        category=new_complaint.category,
+        suggested_category=new_complaint.suggested_category,
+        created_by=str(log.created_by), # Should be current_user.id
+        created_by_name=current_user.name, # Creator's name
+        user_level=str(current_user.level) if current_user.level else None, # Creator's level
+        created_at=log.created_at,
+        status=new_complaint.status, # Should be PENDING
+        resolved_by=None, # New complaints are not resolved
+        resolved_at=None,  # New complaints are not resolved
+        cluster_id=str(cluster_id) if cluster_id else None
+    )
+    # The complaint is saved by now: a failure past this point must not turn into
+    # an error response, or the client would retry and create it twice
+    post_commit = (
+        ("search index", lambda: complaint_search.index(new_complaint.id, new_complaint.title, new_complaint.content)),
+        ("dedup index", lambda: complaint_deduplicator.add(new_complaint.id, signature, cluster_id)),
+        ("admin feed", lambda: publish_created(response.model_dump(mode="json"))),
+    )
+    for name, step in post_commit:
+        try:
+            step()
+        except Exception:
+            logger.exception("Updating the %s for complaint %s failed", name, new_complaint.id)
+    return response
+
 @complaint_router.put("/{complaint_id}/resolve", response_model=ResolveResponse)
 def resolve_complaint(
     complaint_id: UUID = Path(...),
@@ -233,11 +435,13 @@ def resolve_complaint(
             raise HTTPException(status_code=500, detail="Complaint log missing for existing complaint. Resolution aborted.")
 
         complaint_log.resolved_by = current_admin.id # This line caused the error if current_admin was None
-        complaint_log.resolved_at = datetime.now()
+        complaint_log.resolved_at = datetime.now(UTC)
         
         db.commit()
+        complaint_deduplicator.discard([complaint.id])
         db.refresh(complaint)
         db.refresh(complaint_log)
+        publish_resolved(complaint.id, complaint_log.resolved_by, complaint_log.resolved_at)
         
         return ResolveResponse(
             complaint_id=str(complaint.id), # Ensure complaint_id is string
@@ -262,127 +466,117 @@ def bulk_resolve_complaints(
     db: Session = Depends(get_db),
     current_admin: User = Depends(is_admin)
 ):
-    # if not current_admin: # Safeguard for current_admin being None
-    #     # This case should ideally be caught by the is_admin dependency
-    #     raise HTTPException(
-    #         status_code=status.HTTP_403_FORBIDDEN,
-    #         detail="Admin user not properly authenticated or authorized."
-    #     )
-
-    if not request.complaint_ids:
+    """
+    Resolve many complaints in one transaction.
+    One UPDATE ... RETURNING on complaints, one on complains_logs, and one lookup
+    for ids that were already resolved or do not exist.
+    """
+    if not request.complaint_ids and not request.cluster_ids:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No complaint IDs provided for bulk resolution."
         )
-    
-    results = []
-    current_time = datetime.now() 
-    
-    complaint_uuids = []
-    for complaint_id_str_or_uuid in request.complaint_ids:
-        try:
-            # Handle both string UUIDs and UUID objects if the frontend sends mixed types
-            if isinstance(complaint_id_str_or_uuid, UUID):
-                complaint_uuids.append(complaint_id_str_or_uuid)
-            else:
-                complaint_uuids.append(UUID(str(complaint_id_str_or_uuid)))
-        except ValueError:
-            results.append(ResolveResponse(
-                complaint_id=str(complaint_id_str_or_uuid),
-                status=None, # Explicitly set None for status as per schema
-                resolved_by=None,
-                resolved_at=None,
-                message=f"Invalid UUID format: {str(complaint_id_str_or_uuid)}"
-            ))
-    
-    # Filter out complaint_ids that already have a result due to invalid format
-    valid_complaint_uuids_to_process = [
-        uid for uid in complaint_uuids 
-        if str(uid) not in (r.complaint_id for r in results if r.message and "Invalid UUID format" in r.message)
-    ]
 
-    if not valid_complaint_uuids_to_process:
-        return results # Return results if all were invalid UUIDs or list was empty
+    # Pydantic already rejected malformed UUIDs; drop duplicates but keep request order
+    requested_ids = list(dict.fromkeys(request.complaint_ids))
+    current_time = datetime.now(UTC)
 
-    # Fetch complaints that are not yet resolved
-    complaints_to_update = db.query(Complaint).filter(
-        Complaint.id.in_(valid_complaint_uuids_to_process),
-        Complaint.status != Status.RESOLVED
-    ).all()
-    
-    complaint_ids_to_update = {c.id for c in complaints_to_update}
+    try:
+        if request.cluster_ids:
+            # A cluster is its first complaint plus everything linked to it
+            cluster_members = db.query(Complaint.id).filter(
+                or_(Complaint.id.in_(request.cluster_ids), Complaint.cluster_id.in_(request.cluster_ids)),
+                Complaint.status != Status.RESOLVED
+            ).all()
+            requested_ids = list(dict.fromkeys(requested_ids + [row.id for row in cluster_members]))
 
-    # Fetch corresponding complaint logs for those to be updated
-    complaint_logs_dict = {
-        log.complaint_id: log 
-        for log in db.query(ComplaintUser).filter(ComplaintUser.complaint_id.in_(complaint_ids_to_update)).all()
-    }
-    
-    # Handle complaints that were not found or already resolved among the valid UUIDs
-    for uid in valid_complaint_uuids_to_process:
-        if uid not in complaint_ids_to_update: # Not in the list of "to be updated"
-            # Check if it exists at all or is already resolved
-            existing_complaint = db.query(Complaint).filter(Complaint.id == uid).first()
-            if existing_complaint:
-                if existing_complaint.status == Status.RESOLVED:
-                    # Fetch its log to provide resolved_by/at details
-                    existing_log = db.query(ComplaintUser).filter(ComplaintUser.complaint_id == uid).first()
-                    results.append(ResolveResponse(
-                        complaint_id=str(uid),
-                        status=existing_complaint.status,
-                        resolved_by=str(existing_log.resolved_by) if existing_log and existing_log.resolved_by else None,
-                        resolved_at=existing_log.resolved_at if existing_log else None,
-                        message="Complaint was already resolved."
-                    ))
-                # else: complaint exists but status is not PENDING nor RESOLVED (if other statuses exist)
-                # This case is unlikely if only PENDING/RESOLVED are used for this flow.
-            else: # Complaint not found
-                results.append(ResolveResponse(
-                    complaint_id=str(uid),
-                    status=None, # Explicitly set None for status
-                    resolved_by=None,
-                    resolved_at=None,
-                    message=f"Complaint with ID {str(uid)} not found."
-                ))
+        resolved_ids = set(db.execute(
+            update(Complaint)
+            .where(Complaint.id.in_(requested_ids), Complaint.status != Status.RESOLVED)
+            .values(status=Status.RESOLVED)
+            .returning(Complaint.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
 
-    if not complaints_to_update: # All valid UUIDs were either not found or already resolved
-        return results
+        resolved_logs = {}
+        if resolved_ids:
+            resolved_logs = {
+                row.complaint_id: row
+                for row in db.execute(
+                    update(ComplaintUser)
+                    .where(ComplaintUser.complaint_id.in_(resolved_ids))
+                    .values(resolved_by=current_admin.id, resolved_at=current_time)
+                    .returning(ComplaintUser.complaint_id, ComplaintUser.resolved_by, ComplaintUser.resolved_at)
+                    .execution_options(synchronize_session=False)
+                )
+            }
+
+        # Whatever the UPDATE skipped is either already resolved or missing
+        skipped_ids = [uid for uid in requested_ids if uid not in resolved_ids]
+        existing = {}
+        if skipped_ids:
+            existing = {
+                row.id: row
+                for row in db.query(
+                    Complaint.id,
+                    Complaint.status,
+                    ComplaintUser.resolved_by,
+                    ComplaintUser.resolved_at
+                ).outerjoin(
+                    ComplaintUser, Complaint.id == ComplaintUser.complaint_id
+                ).filter(Complaint.id.in_(skipped_ids)).all()
+            }
 
-    try:
-        for complaint in complaints_to_update:
-            complaint.status = Status.RESOLVED
-            
-            complaint_log = complaint_logs_dict.get(complaint.id)
-            
-            if complaint_log:
-                complaint_log.resolved_by = current_admin.id # This line caused the error
-                complaint_log.resolved_at = current_time
-                
-                results.append(ResolveResponse(
-                    complaint_id=str(complaint.id),
-                    status=complaint.status,
-                    resolved_by=str(complaint_log.resolved_by) if complaint_log.resolved_by else None,
-                    resolved_at=complaint_log.resolved_at
-                ))
-            else: 
-                # Data inconsistency: complaint exists but its log doesn't.
-                # The status of this complaint is updated in memory, but we might choose to not commit it
-                # or handle it differently. For now, report it.
-                results.append(ResolveResponse(
-                    complaint_id=str(complaint.id),
-                    status=complaint.status, # Status is updated in memory
-                    resolved_by=None,
-                    resolved_at=None,
-                    message=f"Complaint log not found for {complaint.id}. Status updated in transaction, but log details incomplete."
-                ))
-        
         db.commit()
-        
-        return results  
     except Exception as e:
         db.rollback()
         print(f"Error in bulk_resolve_complaints: {e}") # Log the original error
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during bulk resolution: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+    complaint_deduplicator.discard(resolved_ids)
+    for uid in resolved_ids:
+        log = resolved_logs.get(uid)
+        publish_resolved(uid, log.resolved_by if log else None, log.resolved_at if log else None)
+
+    results = []
+    for uid in requested_ids:
+        if uid in resolved_ids:
+            log = resolved_logs.get(uid)
+            if log:
+                results.append(ResolveResponse(
+                    complaint_id=str(uid),
+                    status=Status.RESOLVED,
+                    resolved_by=str(log.resolved_by) if log.resolved_by else None,
+                    resolved_at=log.resolved_at
+                ))
+            else:
+                # Data inconsistency: complaint exists but its log doesn't.
+                results.append(ResolveResponse(
+                    complaint_id=str(uid),
+                    status=Status.RESOLVED,
+                    resolved_by=None,
+                    resolved_at=None,
+                    message=f"Complaint log not found for {uid}. Status updated, but log details incomplete."
+                ))
+        elif uid in existing:
+            row = existing[uid]
+            results.append(ResolveResponse(
+                complaint_id=str(uid),
+                status=row.status,
+                resolved_by=str(row.resolved_by) if row.resolved_by else None,
+                resolved_at=row.resolved_at,
+                message="Complaint was already resolved."
+            ))
+        else:
+            results.append(ResolveResponse(
+                complaint_id=str(uid),
+                status=None, # Explicitly set None for status
+                resolved_by=None,
+                resolved_at=None,
+                message=f"Complaint with ID {str(uid)} not found."
+            ))
+
+    return results
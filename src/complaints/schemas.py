@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Union
 from uuid import UUID
 
 from src.common.enums import Status, ComplainCategory
@@ -22,7 +22,8 @@ class ResolveComplaintRequest(BaseModel):
 
 class BulkResolveRequest(BaseModel):
     """Schema for bulk resolving complaints request."""
-    complaint_ids: List[UUID]
+    complaint_ids: List[UUID] = []
+    cluster_ids: List[UUID] = [] # Resolve every open complaint in these near-duplicate clusters
 
 class ResolveResponse(BaseModel):
     """Schema for complaint resolution response."""
@@ -30,4 +31,36 @@ class ResolveResponse(BaseModel):
     status: Optional[Status]
     resolved_by: Optional[str]
     resolved_at: Optional[datetime]
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+
+class ComplaintCounts(BaseModel):
+    """Counts over every complaint matching the filters, not just the page."""
+    total: int
+    by_status: Dict[str, int]
+    by_category: Dict[str, int]
+
+class ComplaintVolume(BaseModel):
+    period: datetime
+    category: Optional[str]
+    status: Optional[str]
+    count: int
+
+class ResolutionTimes(BaseModel):
+    """Resolution time (resolved_at - created_at) percentiles in seconds."""
+    resolved: int
+    p50_seconds: Optional[float] = None
+    p90_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+
+class ResolverResolutionTimes(ResolutionTimes):
+    resolver_id: Optional[str] = None  # None for complaints resolved without a recorded resolver
+    resolver_name: Optional[str] = None
+
+class ComplaintAnalytics(BaseModel):
+    bucket: str
+    start: datetime
+    end: datetime
+    generated_at: datetime
+    volume: List[ComplaintVolume]
+    resolution: ResolutionTimes
+    by_resolver: List[ResolverResolutionTimes]
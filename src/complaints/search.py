@@ -0,0 +1,101 @@
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.common.config import COMPLAINT_SEARCH_BACKEND
+from src.common.db import engine, SessionLocal
+from src.common.enums import Status, ComplainCategory
+from .models import Complaint
+from .search_index import InvertedIndex, tokenize
+
+
+class PostgresComplaintSearch:
+    """Full-text search over a generated tsvector column with a GIN index"""
+
+    def install(self):
+        with engine.begin() as connection:
+            connection.execute(text("""
+                ALTER TABLE complaints ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('english', coalesce(content, '')), 'B')
+                ) STORED
+            """))
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_complaints_search_vector "
+                "ON complaints USING GIN (search_vector)"
+            ))
+
+    def index(self, complaint_id: UUID, title: Optional[str], content: Optional[str]):
+        pass  # the generated column is maintained by Postgres
+
+    def search(self, db: Session, query: str, status: Optional[Status] = None,
+               category: Optional[ComplainCategory] = None, limit: int = 20) -> List[Tuple[UUID, float]]:
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Tokens are [a-z0-9]+ so they are safe to splice into tsquery syntax
+        ts_query = " & ".join(f"{token}:*" for token in tokens)
+
+        filters = ""
+        params = {"query": ts_query, "limit": limit}
+        if status:
+            filters += " AND c.status = :status"
+            params["status"] = status.name
+        if category:
+            filters += " AND c.category = :category"
+            params["category"] = category.name
+
+        rows = db.execute(text(f"""
+            SELECT c.id, ts_rank(c.search_vector, q) AS rank
+            FROM complaints c, to_tsquery('english', :query) q
+            WHERE c.search_vector @@ q{filters}
+            ORDER BY rank DESC
+            LIMIT :limit
+        """), params).all()
+        return [(row.id, float(row.rank)) for row in rows]
+
+
+class InMemoryComplaintSearch:
+    """Inverted index for SQLite/dev; built from the complaints table at startup"""
+
+    def __init__(self):
+        self._index = InvertedIndex()
+
+    def install(self):
+        with SessionLocal() as db:
+            self._index.build(db.query(Complaint.id, Complaint.title, Complaint.content).yield_per(1000))
+
+    def index(self, complaint_id: UUID, title: Optional[str], content: Optional[str]):
+        self._index.add(complaint_id, title, content)
+
+    def search(self, db: Session, query: str, status: Optional[Status] = None,
+               category: Optional[ComplainCategory] = None, limit: int = 20) -> List[Tuple[UUID, float]]:
+        if not status and not category:
+            return self._index.search(query, limit)
+
+        ranked = self._index.search(query)
+        if not ranked:
+            return []
+        filters = [Complaint.id.in_([complaint_id for complaint_id, _ in ranked])]
+        if status:
+            filters.append(Complaint.status == status)
+        if category:
+            filters.append(Complaint.category == category)
+        allowed = {row.id for row in db.query(Complaint.id).filter(*filters)}
+        return [hit for hit in ranked if hit[0] in allowed][:limit]
+
+
+def _build_backend():
+    backend = COMPLAINT_SEARCH_BACKEND
+    if backend == "auto":
+        backend = "postgres" if engine.dialect.name == "postgresql" else "memory"
+    if backend == "postgres":
+        return PostgresComplaintSearch()
+    if backend == "memory":
+        return InMemoryComplaintSearch()
+    raise ValueError(f"Unknown COMPLAINT_SEARCH_BACKEND: {COMPLAINT_SEARCH_BACKEND}")
+
+complaint_search = _build_backend()
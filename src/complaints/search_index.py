@@ -0,0 +1,115 @@
+"""Pure-Python inverted index for complaint search.
+
+Kept free of database and config imports so it can be built and benchmarked
+on its own (see benchmarks/complaint_search.py).
+"""
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+TITLE_WEIGHT = 2.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    """BM25-ranked index with prefix matching on every query term.
+
+    Postings map term -> {doc_id: weighted term frequency}; a sorted vocabulary
+    turns a prefix into a contiguous range found with bisect.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[Hashable, float]] = defaultdict(dict)
+        self._doc_terms: Dict[Hashable, Dict[str, float]] = {}
+        self._doc_length: Dict[Hashable, float] = {}
+        self._vocabulary: List[str] = []
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_length)
+
+    def add(self, doc_id: Hashable, title: Optional[str], content: Optional[str]):
+        terms: Dict[str, float] = defaultdict(float)
+        for token in tokenize(title):
+            terms[token] += TITLE_WEIGHT
+        for token in tokenize(content):
+            terms[token] += 1.0
+
+        with self._lock:
+            self.remove(doc_id)
+            for term, frequency in terms.items():
+                if term not in self._postings:
+                    insort(self._vocabulary, term)
+                self._postings[term][doc_id] = frequency
+            self._doc_terms[doc_id] = terms
+            length = sum(terms.values())
+            self._doc_length[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id: Hashable):
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    del self._vocabulary[bisect_left(self._vocabulary, term)]
+            self._total_length -= self._doc_length.pop(doc_id)
+
+    def build(self, documents: Iterable[Tuple[Hashable, Optional[str], Optional[str]]]):
+        for doc_id, title, content in documents:
+            self.add(doc_id, title, content)
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[Hashable, float]]:
+        """Documents matching every query term (as a prefix), best first"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_length)
+            if not doc_count:
+                return []
+            average_length = self._total_length / doc_count
+
+            scores: Optional[Dict[Hashable, float]] = None
+            for token in tokens:
+                token_scores: Dict[Hashable, float] = defaultdict(float)
+                for term in self._expand(token):
+                    postings = self._postings[term]
+                    idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, frequency in postings.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_length[doc_id] / average_length)
+                        token_scores[doc_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    # AND semantics: keep documents that match every term
+                    scores = {doc_id: score + token_scores[doc_id]
+                              for doc_id, score in scores.items() if doc_id in token_scores}
+                if not scores:
+                    return []
+
+        if limit:
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
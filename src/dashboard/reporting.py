@@ -0,0 +1,200 @@
+"""Pre-joined reporting views, refreshed in the background.
+
+Materialized views over halls/rooms/allocations/users/complaints that the chat
+model and the admin dashboard read instead of re-running the same joins per
+question. Each view has a refreshed_at column and a unique index, so it can be
+refreshed CONCURRENTLY (readers are never blocked) and its age is visible to
+anyone who reads it. One worker refreshes at a time, under an advisory lock.
+PostgreSQL only: on other databases (e.g. SQLite in development) the views are
+skipped and the reports are empty.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from src.common.config import REPORTING_REFRESH_SECONDS
+from src.common.db import engine
+from src.common.jobs import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+_REFRESH_LOCK_KEY = 740_047  # pg advisory lock shared by all workers
+
+
+@dataclass
+class ReportingView:
+    name: str
+    description: str  # one line, shown to the chat model next to the columns
+    key: Tuple[str, ...]  # unique per row; required by REFRESH ... CONCURRENTLY
+    query: str
+
+
+REPORTING_VIEWS: List[ReportingView] = [
+    ReportingView(
+        name="report_hall_occupancy",
+        description="current beds, occupancy and free beds per hall",
+        key=("hall_id",),
+        query="""
+            SELECT h.id AS hall_id,
+                   h.name AS hall_name,
+                   h.min_level,
+                   h.max_level,
+                   count(r.id) AS rooms,
+                   count(r.id) FILTER (WHERE r.is_available) AS available_rooms,
+                   coalesce(sum(r.capacity), 0) AS capacity,
+                   coalesce(sum(r.current_occupancy), 0) AS occupied,
+                   coalesce(sum(r.capacity - coalesce(r.current_occupancy, 0)), 0) AS free_beds,
+                   round(100.0 * coalesce(sum(r.current_occupancy), 0) / nullif(sum(r.capacity), 0), 1) AS occupancy_pct,
+                   now() AS refreshed_at
+            FROM halls h
+            LEFT JOIN rooms r ON r.hall_id = h.id
+            GROUP BY h.id
+        """,
+    ),
+    ReportingView(
+        name="report_student_rooms",
+        description="each currently allocated student with their hall and room",
+        key=("allocation_id",),
+        query="""
+            SELECT a.id AS allocation_id,
+                   u.id AS user_id,
+                   u.name AS student_name,
+                   u.email,
+                   u.department,
+                   u.level,
+                   h.id AS hall_id,
+                   h.name AS hall_name,
+                   r.id AS room_id,
+                   r.room_number,
+                   a.academic_year,
+                   a.allocated_at,
+                   now() AS refreshed_at
+            FROM room_allocations a
+            JOIN users u ON u.id = a.user_id
+            JOIN rooms r ON r.id = a.room_id
+            JOIN halls h ON h.id = a.hall_id
+            WHERE a.status = 'ALLOCATED'
+        """,
+    ),
+    ReportingView(
+        name="report_complaint_backlog",
+        description="unresolved complaints per category and status, with their age",
+        key=("category", "status"),
+        query="""
+            WITH unresolved AS (
+                SELECT c.id,
+                       coalesce(c.category, 'GENERAL') AS category,
+                       c.status,
+                       min(l.created_at) AS created_at
+                FROM complaints c
+                LEFT JOIN complains_logs l ON l.complaint_id = c.id
+                WHERE c.status IN ('PENDING', 'OPENED')
+                GROUP BY c.id
+            )
+            SELECT category,
+                   status,
+                   count(*) AS complaints,
+                   min(created_at) AS oldest_created_at,
+                   round((extract(epoch FROM avg(now() - created_at)) / 3600)::numeric, 1) AS avg_age_hours,
+                   now() AS refreshed_at
+            FROM unresolved
+            GROUP BY category, status
+        """,
+    ),
+]
+
+VIEWS_BY_NAME: Dict[str, ReportingView] = {view.name: view for view in REPORTING_VIEWS}
+
+
+class ReportingViews:
+
+    def __init__(self, views: List[ReportingView] = REPORTING_VIEWS):
+        self.views = views
+        self.available = engine.dialect.name == "postgresql"  # materialized views, advisory locks, FILTER
+        self._refreshes: Dict[str, dict] = {}  # view -> last refresh done by this worker
+        self.job = PeriodicJob("reporting-views", REPORTING_REFRESH_SECONDS, self.refresh)
+
+    def install(self):
+        """Create missing views (populated) and their unique indexes"""
+        if not self.available:
+            logger.info("Reporting views need PostgreSQL; skipped on %s", engine.dialect.name)
+            return
+        with engine.begin() as connection:
+            for view in self.views:
+                connection.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view.name} AS {view.query}"))
+                connection.execute(text(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{view.name} ON {view.name} ({', '.join(view.key)})"
+                ))
+
+    def refresh(self) -> bool:
+        """Refresh every view; False if another worker is already doing it"""
+        if not self.available:
+            return False
+        with engine.connect() as connection:
+            locked = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _REFRESH_LOCK_KEY}).scalar()
+            connection.commit()
+            if not locked:
+                return False
+            try:
+                for view in self.views:
+                    started = time.perf_counter()
+                    try:
+                        connection.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}"))
+                        connection.commit()
+                    except Exception:
+                        connection.rollback()
+                        logger.exception("Refreshing %s failed", view.name)
+                        self._note(view.name, started, failed=True)
+                        continue
+                    self._note(view.name, started)
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _REFRESH_LOCK_KEY})
+                connection.commit()
+        return True
+
+    def _note(self, name: str, started: float, failed: bool = False):
+        previous = self._refreshes.get(name, {"refreshes": 0, "failures": 0})
+        self._refreshes[name] = {
+            "refreshes": previous["refreshes"] + (0 if failed else 1),
+            "failures": previous["failures"] + (1 if failed else 0),
+            "last_refresh_ms": round((time.perf_counter() - started) * 1000, 1),
+            "last_attempt_at": datetime.now(UTC),
+        }
+
+    def stats(self) -> List[dict]:
+        """Per view: rows, when its data was computed (any worker) and this worker's refresh cost"""
+        if not self.available:
+            return []
+        now = datetime.now(UTC)
+        report = []
+        with engine.connect() as connection:
+            for view in self.views:
+                rows, refreshed_at = connection.execute(
+                    text(f"SELECT count(*), max(refreshed_at) FROM {view.name}")
+                ).one()
+                report.append({
+                    "view": view.name,
+                    "description": view.description,
+                    "rows": rows,
+                    "refreshed_at": refreshed_at,
+                    "staleness_seconds": round((now - refreshed_at).total_seconds(), 1) if refreshed_at else None,
+                    "refresh_interval_seconds": REPORTING_REFRESH_SECONDS,
+                    **self._refreshes.get(view.name, {}),
+                })
+        return report
+
+    def read(self, name: str, limit: int) -> Optional[List[dict]]:
+        """Rows of a reporting view; None if there is no such view"""
+        view = VIEWS_BY_NAME.get(name)
+        if view is None or not self.available:
+            return None
+        order = ", ".join(view.key)
+        with engine.connect() as connection:
+            result = connection.execute(text(f"SELECT * FROM {view.name} ORDER BY {order} LIMIT :limit"), {"limit": limit})
+            return [dict(row) for row in result.mappings()]
+
+reporting_views = ReportingViews()
@@ -1,8 +1,11 @@
 from fastapi import (
     APIRouter,
     Request,
-    Depends
+    Depends,
+    HTTPException,
+    Query
 )
+from starlette.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from src.common.security import(
     get_current_user,
@@ -10,6 +13,7 @@ from src.common.security import(
 )
 from src.auth.models import User
 from fastapi.responses import RedirectResponse
+from .reporting import reporting_views
 dashboard_router = APIRouter(
     prefix="/dashboard",
     tags=["DASHBOARD"]
@@ -30,4 +34,29 @@ def dashboard_redirect(current_user: User = Depends(get_current_user)):
     if current_user.is_admin:
         return RedirectResponse(url="/dashboard/admin-dashboard")
     else:
-        return RedirectResponse(url="/dashboard/student-dashboard")
\ No newline at end of file
+        return RedirectResponse(url="/dashboard/student-dashboard")
+
+@dashboard_router.get("/reports")
+def list_reports(current_admin: User = Depends(is_admin)):
+    """Reporting views with their size, staleness and last refresh cost"""
+    return reporting_views.stats()
+
+@dashboard_router.post("/reports/refresh")
+async def refresh_reports(current_admin: User = Depends(is_admin)):
+    """Refresh every reporting view now rather than waiting for the next cycle"""
+    if not reporting_views.available:
+        raise HTTPException(status_code=404, detail="Reporting views need PostgreSQL")
+    refreshed = await run_in_threadpool(reporting_views.refresh)
+    if not refreshed:
+        raise HTTPException(status_code=409, detail="A refresh is already running")
+    return reporting_views.stats()
+
+@dashboard_router.get("/reports/{name}")
+def read_report(name: str,
+                limit: int = Query(500, ge=1, le=5000),
+                current_admin: User = Depends(is_admin)):
+    """Rows of one reporting view"""
+    rows = reporting_views.read(name, limit)
+    if rows is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return rows
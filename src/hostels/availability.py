@@ -0,0 +1,30 @@
+from typing import Iterable, List, Tuple
+
+from src.common.broadcast import TickBroadcaster
+from src.common.config import AVAILABILITY_TICK_SECONDS
+from .models import Hall, Room
+
+# Free-bed deltas for the student dashboard, keyed by room id and hall id
+availability_feed = TickBroadcaster("availability", tick=AVAILABILITY_TICK_SECONDS)
+
+
+def snapshot_availability(rooms: Iterable[Room] = (), halls: Iterable[Hall] = ()) -> List[Tuple[str, str, dict]]:
+    """Capture free-bed figures before commit expires the instances"""
+    updates = []
+    for room in rooms:
+        free = max(room.capacity - room.current_occupancy, 0) if room.is_available else 0
+        updates.append(("rooms", room.id, {
+            "hall_id": str(room.hall_id),
+            "room_number": room.room_number,
+            "capacity": room.capacity,
+            "free": free
+        }))
+    for hall in halls:
+        updates.append(("halls", str(hall.id), {"free": hall.total_available_capacity}))
+    return updates
+
+
+def publish_availability(updates: List[Tuple[str, str, dict]]):
+    """Push captured figures to subscribers; call only after the commit succeeded"""
+    for channel, key, value in updates:
+        availability_feed.publish(channel, key, value)
@@ -0,0 +1,62 @@
+"""Command line entry points for hostel maintenance jobs.
+
+Usage:
+    python -m src.hostels.cli rollover 2025-2026 [--dry-run]
+"""
+import argparse
+import sys
+import time
+
+from src.common.db import SessionLocal
+from .service import RoomAllocationService
+
+
+def rollover(academic_year: str, dry_run: bool) -> int:
+    if not academic_year or not '-' in academic_year:
+        print("Academic year must be in format YYYY-YYYY", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+
+    def progress(message: str):
+        print(f"[{time.perf_counter() - started:7.2f}s] {message}", flush=True)
+
+    db = SessionLocal()
+    try:
+        result = RoomAllocationService(db).rollover_academic_year(
+            academic_year, dry_run=dry_run, progress=progress
+        )
+    finally:
+        db.close()
+
+    for hall in result["halls"]:
+        print(
+            f"  {hall['hall_name']}: {hall['active_allocations']} allocations, "
+            f"{hall['occupied_beds']} beds freed, capacity -> {hall['restored_capacity']} "
+            f"({hall['previous_academic_year']} -> {academic_year})"
+        )
+    action = "Would vacate" if dry_run else "Vacated"
+    print(
+        f"{action} {result['allocations_vacated']} allocations, "
+        f"{result['rooms_reset']} rooms, {result['halls_updated']} halls "
+        f"in {result['elapsed_ms']} ms"
+    )
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.hostels.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rollover_parser = commands.add_parser("rollover", help="Start a new academic year")
+    rollover_parser.add_argument("academic_year", help="New academic year, e.g. 2025-2026")
+    rollover_parser.add_argument("--dry-run", action="store_true", help="Report without writing")
+
+    args = parser.parse_args(argv)
+    if args.command == "rollover":
+        return rollover(args.academic_year, args.dry_run)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     Enum,
+    Float,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -63,5 +65,21 @@ class Hall(Base):
     
     rooms = relationship("Room", back_populates="hall", cascade="all, delete")
 
+# Append-only occupancy time series; old minute/hour points are downsampled
+class HallOccupancySnapshot(Base):
+    __tablename__ = "hall_occupancy_snapshots"
+    id = Column(Integer(), primary_key=True)
+    hall_id = Column(ForeignKey("halls.id", ondelete="CASCADE"), nullable=False)
+    resolution = Column(String(6), nullable=False)  # "minute", "hour" or "day"
+    bucket = Column(DateTime(timezone=True), nullable=False)
+    capacity = Column(Integer(), nullable=False)
+    occupancy = Column(Float(), nullable=False)  # mean over the bucket
+    occupancy_max = Column(Integer(), nullable=False)
+    samples = Column(Integer(), nullable=False, default=1)
+
+    __table_args__ = (
+        Index("ux_hall_occupancy_snapshots_bucket", "hall_id", "resolution", "bucket", unique=True),
+    )
+
 # Create or update tables
 Base.metadata.create_all(bind=engine)
\ No newline at end of file
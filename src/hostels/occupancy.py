@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta, UTC
+from typing import List, Optional
+
+from sqlalchemy import func, literal, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.common.config import (
+    OCCUPANCY_SAMPLE_SECONDS,
+    OCCUPANCY_MINUTE_RETENTION_HOURS,
+    OCCUPANCY_HOUR_RETENTION_DAYS
+)
+from src.common.db import SessionLocal
+from src.common.jobs import PeriodicJob
+from .models import HallOccupancySnapshot, Room
+
+RESOLUTIONS = ("minute", "hour", "day")
+RESOLUTION_SPAN = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+MAX_POINTS = 1000
+
+
+def _truncate(moment: datetime, resolution: str) -> datetime:
+    if resolution == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if resolution == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def retention_cutoff(resolution: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """Oldest bucket still stored at this resolution (None for day: kept forever)"""
+    now = now or datetime.now(UTC)
+    if resolution == "minute":
+        return _truncate(now - timedelta(hours=OCCUPANCY_MINUTE_RETENTION_HOURS), "hour")
+    if resolution == "hour":
+        return _truncate(now - timedelta(days=OCCUPANCY_HOUR_RETENTION_DAYS), "day")
+    return None
+
+
+def sample_occupancy(db: Session, now: Optional[datetime] = None) -> int:
+    """Write one minute-resolution point per hall from a single aggregate query"""
+    bucket = _truncate(now or datetime.now(UTC), "minute")
+    rows = [
+        {
+            "hall_id": hall_id,
+            "resolution": "minute",
+            "bucket": bucket,
+            "capacity": capacity or 0,
+            "occupancy": occupancy or 0,
+            "occupancy_max": occupancy or 0,
+            "samples": 1,
+        }
+        for hall_id, capacity, occupancy in db.query(
+            Room.hall_id,
+            func.sum(Room.capacity),
+            func.sum(Room.current_occupancy)
+        ).group_by(Room.hall_id).all()
+    ]
+    if rows:
+        # Several workers may sample the same minute; the first one wins
+        db.execute(insert(HallOccupancySnapshot).on_conflict_do_nothing(), rows)
+    db.commit()
+    return len(rows)
+
+
+def _merge_into(db: Session, source: str, target: str, cutoff: datetime) -> int:
+    """Fold source-resolution points older than cutoff into target buckets"""
+    S = HallOccupancySnapshot
+    target_bucket = func.date_trunc(target, S.bucket)
+    aggregated = (
+        select(
+            S.hall_id,
+            literal(target),
+            target_bucket,
+            func.max(S.capacity),
+            func.sum(S.occupancy * S.samples) / func.sum(S.samples),
+            func.max(S.occupancy_max),
+            func.sum(S.samples),
+        )
+        .where(S.resolution == source, S.bucket < cutoff)
+        .group_by(S.hall_id, target_bucket)
+    )
+    db.execute(
+        insert(S)
+        .from_select(
+            ["hall_id", "resolution", "bucket", "capacity", "occupancy", "occupancy_max", "samples"],
+            aggregated
+        )
+        .on_conflict_do_nothing()
+    )
+    return db.execute(
+        delete(S).where(S.resolution == source, S.bucket < cutoff)
+    ).rowcount
+
+
+def downsample_occupancy(db: Session, now: Optional[datetime] = None) -> dict:
+    """Apply the retention policy: minute -> hour -> day"""
+    now = now or datetime.now(UTC)
+    merged = {
+        "minute": _merge_into(db, "minute", "hour", retention_cutoff("minute", now)),
+        "hour": _merge_into(db, "hour", "day", retention_cutoff("hour", now)),
+    }
+    db.commit()
+    return merged
+
+
+def pick_resolution(start: datetime, end: datetime, now: Optional[datetime] = None) -> str:
+    """Finest resolution that is still retained for start and keeps the series short"""
+    for resolution in RESOLUTIONS:
+        cutoff = retention_cutoff(resolution, now)
+        if cutoff is not None and start < cutoff:
+            continue
+        if (end - start) / RESOLUTION_SPAN[resolution] <= MAX_POINTS:
+            return resolution
+    return "day"
+
+
+def get_occupancy_history(db: Session, hall_id: str, start: datetime, end: datetime, resolution: str) -> List[dict]:
+    """Points for [start, end) at the given resolution.
+
+    Finer points not yet downsampled are rolled up on the fly, so recent ranges
+    are complete at any resolution.
+    """
+    S = HallOccupancySnapshot
+    finer = RESOLUTIONS[:RESOLUTIONS.index(resolution) + 1]
+    bucket = func.date_trunc(resolution, S.bucket).label("bucket")
+    rows = db.execute(
+        select(
+            bucket,
+            func.max(S.capacity),
+            func.sum(S.occupancy * S.samples) / func.sum(S.samples),
+            func.max(S.occupancy_max),
+        )
+        .where(
+            S.hall_id == hall_id,
+            S.resolution.in_(finer),
+            S.bucket >= start,
+            S.bucket < end
+        )
+        .group_by(bucket)
+        .order_by(bucket)
+        .limit(MAX_POINTS)
+    ).all()
+    return [
+        {
+            "bucket": row[0],
+            "capacity": row[1],
+            "occupancy": round(float(row[2]), 2),
+            "occupancy_max": row[3],
+        }
+        for row in rows
+    ]
+
+
+class OccupancySampler:
+    """Sample every OCCUPANCY_SAMPLE_SECONDS and downsample about once an hour"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._last_downsample = None
+        self.job = PeriodicJob("occupancy-sampler", OCCUPANCY_SAMPLE_SECONDS, self.run, run_immediately=True)
+
+    def run(self):
+        now = datetime.now(UTC)
+        with self.session_factory() as db:
+            sample_occupancy(db, now)
+            if self._last_downsample is None or now - self._last_downsample >= timedelta(hours=1):
+                downsample_occupancy(db, now)
+                self._last_downsample = now
+
+occupancy_sampler = OccupancySampler()
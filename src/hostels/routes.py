@@ -1,11 +1,14 @@
+from datetime import datetime, timedelta, UTC
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from fastapi import (
     APIRouter,
     Depends,
+    Header,
     HTTPException,
     status,
 )
+from fastapi.responses import StreamingResponse
 from uuid import UUID
 from .models import Hall, Room
 from .schemas import (
@@ -20,11 +23,17 @@ from .schemas import (
     RoomCreate,
     RoomUpdate,
     RoomResponse,
-    HallAllocationSummary
+    HallAllocationSummary,
+    AcademicYearRollover,
+    RolloverReport,
+    OccupancyHistory
 )
 from .service import RoomAllocationService
+from .availability import availability_feed
+from .occupancy import MAX_POINTS, RESOLUTION_SPAN, get_occupancy_history, pick_resolution
 from src.common.enums import AllocationStatus
 from src.common.db import get_db
+from src.common.idempotency import run_idempotent
 from src.common.security import is_admin
 
 hall_router = APIRouter(
@@ -189,19 +198,30 @@ def delete_room(
 @allocation_router.post("/", response_model=RoomAllocationResponse, status_code=status.HTTP_201_CREATED)
 def create_allocation(
     allocation: RoomAllocationCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Allocate a user to a room"""
     service = RoomAllocationService(db)
-    try:
-        result = service.allocate_room(
-            user_id=(allocation.user_id),
-            room_id=allocation.room_id,
-            academic_year=allocation.academic_year
-        )
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    def allocate():
+        try:
+            return service.allocate_room(
+                user_id=(allocation.user_id),
+                room_id=allocation.room_id,
+                academic_year=allocation.academic_year
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return run_idempotent(
+        idempotency_key,
+        scope=f"allocate:{allocation.user_id}",
+        payload=allocation,
+        handler=allocate,
+        response_model=RoomAllocationResponse,
+        status_code=status.HTTP_201_CREATED
+    )
 
 @allocation_router.post("/bulk", response_model=List[RoomAllocationResponse], status_code=status.HTTP_201_CREATED)
 def bulk_allocate(
@@ -279,6 +299,15 @@ def get_available_rooms(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
+@allocation_router.get("/availability/stream")
+def stream_availability():
+    """Server-Sent Events stream of per-hall and per-room free-bed deltas"""
+    return StreamingResponse(
+        availability_feed.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @allocation_router.get("/allocations", response_model=List[RoomAllocationResponse])
 def get_all_allocations(
     status: Optional[AllocationStatus] = None,
@@ -334,6 +363,56 @@ def set_hall_allocation_status(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
+@hall_router.get("/{hall_id}/occupancy-history", response_model=OccupancyHistory)
+def get_hall_occupancy_history(
+    hall_id: UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: Optional[Literal["minute", "hour", "day"]] = None,
+    db: Session = Depends(get_db)
+):
+    """Occupancy time series for a hall; resolution is picked from the range when omitted"""
+    end = end or datetime.now(UTC)
+    start = start or end - timedelta(days=1)
+    # Naive datetimes are taken as UTC
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=UTC)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=UTC)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+
+    if resolution is None:
+        resolution = pick_resolution(start, end)
+    elif (end - start) / RESOLUTION_SPAN[resolution] > MAX_POINTS:
+        # The query stops at MAX_POINTS buckets; refuse rather than cut the range short
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too long for {resolution} resolution (at most {MAX_POINTS} points); "
+                   f"use a coarser resolution or a shorter range"
+        )
+    return {
+        "hall_id": hall_id,
+        "resolution": resolution,
+        "start": start,
+        "end": end,
+        "points": get_occupancy_history(db, hall_id, start, end, resolution)
+    }
+
+@hall_router.post("/rollover", response_model=RolloverReport)
+def rollover_academic_year(
+    rollover: AcademicYearRollover,
+    db: Session = Depends(get_db),
+    admin: bool = Depends(is_admin)
+):
+    """Vacate all active allocations and reset halls for a new academic year"""
+    
+    service = RoomAllocationService(db)
+    try:
+        return service.rollover_academic_year(rollover.academic_year, dry_run=rollover.dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @hall_router.get("/{hall_id}/summary", response_model=HallAllocationSummary)
 def get_hall_allocation_summary(
     hall_id: str,
@@ -148,4 +148,44 @@ class BulkRoomCreate(BaseModel):
         if len(room_numbers) != len(set(room_numbers)):
             raise ValueError('Duplicate room numbers are not allowed')
             
-        return v
\ No newline at end of file
+        return v
+
+class AcademicYearRollover(BaseModel):
+    academic_year: str
+    dry_run: bool = False
+
+    @validator('academic_year')
+    def validate_academic_year(cls, v):
+        if not v or not '-' in v:
+            raise ValueError('Academic year must be in format YYYY-YYYY')
+        return v
+
+class HallRolloverSummary(BaseModel):
+    hall_id: UUID4
+    hall_name: str
+    previous_academic_year: Optional[str]
+    active_allocations: int
+    occupied_beds: int
+    restored_capacity: int
+
+class RolloverReport(BaseModel):
+    academic_year: str
+    dry_run: bool
+    allocations_vacated: int
+    rooms_reset: int
+    halls_updated: int
+    elapsed_ms: float
+    halls: List[HallRolloverSummary]
+
+class OccupancyPoint(BaseModel):
+    bucket: datetime
+    capacity: int
+    occupancy: float
+    occupancy_max: int
+
+class OccupancyHistory(BaseModel):
+    hall_id: UUID4
+    resolution: str
+    start: datetime
+    end: datetime
+    points: List[OccupancyPoint]
@@ -1,11 +1,13 @@
+import time
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, or_, select, update
 from uuid import UUID
 
 from .models import Hall, Room, RoomAllocation
 from .schemas import HallOccupancyStats, RoomAllocationResponse
+from .availability import snapshot_availability, publish_availability
 from src.common.enums import AllocationStatus
 
 
@@ -59,7 +61,9 @@ class RoomAllocationService:
             hall.total_available_capacity -= 1
         
         self.db.add(allocation)
+        updates = snapshot_availability([room], [hall])
         self.db.commit()
+        publish_availability(updates)
         self.db.refresh(allocation)
         
         return allocation
@@ -128,7 +132,9 @@ class RoomAllocationService:
             allocations.append(allocation)
             self.db.add(allocation)
         
+        updates = snapshot_availability(available_rooms[:room_index + 1], [hall])
         self.db.commit()
+        publish_availability(updates)
         
         # Refresh all allocations
         for allocation in allocations:
@@ -160,7 +166,9 @@ class RoomAllocationService:
             hall.total_available_capacity += 1
         
         self.db.delete(allocation) 
+        updates = snapshot_availability([room], [hall])
         self.db.commit() 
+        publish_availability(updates)
         
         return allocation
 
@@ -289,6 +297,105 @@ class RoomAllocationService:
             "vacated_allocations": vacated_allocations
         }
 
+    def rollover_academic_year(self, academic_year: str, dry_run: bool = False,
+                               progress: Optional[Callable[[str], None]] = None) -> dict:
+        """Vacate every active allocation and reset rooms and halls for a new academic year.
+
+        Runs as a handful of set-based statements inside one transaction instead of
+        calling vacate_room once per allocation. With dry_run the report is built
+        from the same aggregates but nothing is written.
+        """
+        report = progress or (lambda message: None)
+        started = time.perf_counter()
+
+        # Per-hall aggregates for the report (also what the updates below will touch)
+        active_by_hall = dict(
+            self.db.query(RoomAllocation.hall_id, func.count(RoomAllocation.id))
+            .filter(RoomAllocation.status == AllocationStatus.ALLOCATED)
+            .group_by(RoomAllocation.hall_id)
+            .all()
+        )
+        room_totals = {
+            hall_id: (capacity or 0, occupied or 0)
+            for hall_id, capacity, occupied in self.db.query(
+                Room.hall_id,
+                func.sum(Room.capacity),
+                func.sum(Room.current_occupancy)
+            ).group_by(Room.hall_id).all()
+        }
+        halls = self.db.query(Hall.id, Hall.name, Hall.academic_year).all()
+
+        summaries = []
+        for hall_id, hall_name, previous_year in halls:
+            capacity, occupied = room_totals.get(hall_id, (0, 0))
+            summaries.append({
+                "hall_id": hall_id,
+                "hall_name": hall_name,
+                "previous_academic_year": previous_year,
+                "active_allocations": active_by_hall.get(hall_id, 0),
+                "occupied_beds": occupied,
+                "restored_capacity": capacity
+            })
+        report(f"Found {sum(active_by_hall.values())} active allocations across {len(halls)} halls")
+
+        rooms_to_reset = or_(Room.current_occupancy != 0, Room.is_available.isnot(True))
+
+        if dry_run:
+            allocations_vacated = sum(active_by_hall.values())
+            rooms_reset = self.db.query(func.count(Room.id)).filter(rooms_to_reset).scalar() or 0
+            report("Dry run: no changes written")
+        else:
+            try:
+                allocations_vacated = self.db.execute(
+                    update(RoomAllocation)
+                    .where(RoomAllocation.status == AllocationStatus.ALLOCATED)
+                    .values(status=AllocationStatus.VACATED, vacated_at=datetime.now())
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                report(f"Vacated {allocations_vacated} allocations")
+
+                rooms_reset = self.db.execute(
+                    update(Room)
+                    .where(rooms_to_reset)
+                    .values(current_occupancy=0, is_available=True)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                report(f"Reset {rooms_reset} rooms")
+
+                hall_capacity = (
+                    select(func.coalesce(func.sum(Room.capacity), 0))
+                    .where(Room.hall_id == Hall.id)
+                    .scalar_subquery()
+                )
+                self.db.execute(
+                    update(Hall)
+                    .values(total_available_capacity=hall_capacity, academic_year=academic_year)
+                    .execution_options(synchronize_session=False)
+                )
+                report(f"Restored capacity on {len(halls)} halls")
+
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            # Identity map still holds pre-rollover state
+            self.db.expire_all()
+            # Every room is free again after the reset, not only the halls' totals
+            publish_availability(snapshot_availability(
+                rooms=self.db.query(Room).all(),
+                halls=self.db.query(Hall).all()
+            ))
+
+        return {
+            "academic_year": academic_year,
+            "dry_run": dry_run,
+            "allocations_vacated": allocations_vacated,
+            "rooms_reset": rooms_reset,
+            "halls_updated": len(halls),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "halls": summaries
+        }
+
     # Hall CRUD methods
     def create_hall(self, name: str, no_of_rooms: int, min_level: int, max_level: int, 
                     is_open_for_allocation: bool = False, academic_year: str = None) -> Hall:
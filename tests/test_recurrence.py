@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.calendar.recurrence import Rule, expand, occurrences, parse_rule, series_end
+
+HOUR = timedelta(hours=1)
+
+
+def walk(rule, dtstart, window_start, window_end, duration=HOUR):
+    """Reference: every occurrence from dtstart, kept if it overlaps the window"""
+    found = []
+    for start in occurrences(rule, dtstart):
+        if start >= window_end:
+            break
+        if start + duration > window_start:
+            found.append(start)
+    return found
+
+
+def test_parse_rule():
+    rule = parse_rule("RRULE:freq=weekly;interval=2;byday=WE,MO;until=20261218")
+    assert rule == Rule("WEEKLY", 2, (0, 2), None, datetime(2026, 12, 18, 23, 59, 59))
+    assert parse_rule(str(rule)) == rule
+
+
+@pytest.mark.parametrize("text", [
+    "FREQ=YEARLY",
+    "FREQ=DAILY;INTERVAL=0",
+    "FREQ=DAILY;BYDAY=MO",
+    "FREQ=WEEKLY;BYDAY=XX",
+    "FREQ=DAILY;COUNT=0",
+    "FREQ=DAILY;COUNT=2;UNTIL=20261231",
+    "FREQ=DAILY;BYMONTH=1",
+    "FREQ=DAILY;UNTIL=tomorrow",
+])
+def test_parse_rule_rejects(text):
+    with pytest.raises(ValueError):
+        parse_rule(text)
+
+
+def test_weekly_byday_skips_days_before_dtstart():
+    # dtstart is a Wednesday; the Monday of that week is not an occurrence
+    rule = parse_rule("FREQ=WEEKLY;BYDAY=MO,WE;COUNT=4")
+    assert list(occurrences(rule, datetime(2026, 9, 9, 9))) == [
+        datetime(2026, 9, 9, 9), datetime(2026, 9, 14, 9), datetime(2026, 9, 16, 9), datetime(2026, 9, 21, 9),
+    ]
+
+
+def test_monthly_skips_months_without_the_day():
+    rule = parse_rule("FREQ=MONTHLY;COUNT=4")
+    assert [start.month for start in occurrences(rule, datetime(2026, 1, 31, 10))] == [1, 3, 5, 7]
+
+
+@pytest.mark.parametrize("text, dtstart", [
+    ("FREQ=DAILY;INTERVAL=3", datetime(2025, 2, 1, 8)),
+    ("FREQ=WEEKLY;BYDAY=TU,TH,SA", datetime(2024, 6, 6, 18)),
+    ("FREQ=WEEKLY;INTERVAL=2;COUNT=40", datetime(2025, 9, 3, 12)),
+    ("FREQ=MONTHLY;INTERVAL=2", datetime(2025, 1, 31, 10)),
+    ("FREQ=MONTHLY;COUNT=15", datetime(2025, 8, 30, 10)),
+    ("FREQ=MONTHLY;UNTIL=20261130", datetime(2024, 5, 31, 10)),
+])
+def test_windowed_expansion_matches_walking_from_dtstart(text, dtstart):
+    rule = parse_rule(text)
+    window_start = datetime(2026, 1, 1)
+    while window_start < datetime(2027, 1, 1):
+        window_end = window_start + timedelta(days=45)
+        assert list(expand(rule, dtstart, HOUR, window_start, window_end)) == walk(rule, dtstart, window_start, window_end)
+        window_start += timedelta(days=17)
+
+
+@pytest.mark.parametrize("text, dtstart, last", [
+    ("FREQ=DAILY", datetime(2026, 1, 1, 9), None),
+    ("FREQ=DAILY;COUNT=3", datetime(2026, 1, 1, 9), datetime(2026, 1, 3, 9)),
+    ("FREQ=WEEKLY;BYDAY=MO,FR;UNTIL=20261218", datetime(2026, 9, 7, 9), datetime(2026, 12, 18, 9)),
+    ("FREQ=MONTHLY;UNTIL=20261231", datetime(2026, 1, 15, 9), datetime(2026, 12, 15, 9)),
+    # Months with a 31st two apart run out in July; nothing falls in the last two months before UNTIL
+    ("FREQ=MONTHLY;INTERVAL=2;UNTIL=20261231", datetime(2026, 1, 31, 10), datetime(2026, 7, 31, 10)),
+    ("FREQ=MONTHLY;UNTIL=20261231", datetime(2026, 1, 31, 10), datetime(2026, 12, 31, 10)),
+    ("FREQ=MONTHLY;COUNT=4", datetime(2026, 1, 31, 10), datetime(2026, 7, 31, 10)),
+])
+def test_series_end(text, dtstart, last):
+    rule = parse_rule(text)
+    expected = last + HOUR if last is not None else None
+    assert series_end(rule, dtstart, HOUR) == expected
+    if last is not None:
+        assert list(occurrences(rule, dtstart))[-1] == last